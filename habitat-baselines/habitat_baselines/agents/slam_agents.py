@@ -26,7 +26,10 @@ from habitat.sims.habitat_simulator.actions import HabitatSimActions
 from habitat_baselines.config.default import get_config as cfg_baseline
 from habitat_baselines.slambased.mappers import DirectDepthMapper
 from habitat_baselines.slambased.monodepth import MonoDepthEstimator
-from habitat_baselines.slambased.path_planners import DifferentiableStarPlanner
+from habitat_baselines.slambased.path_planners import (
+    DifferentiableStarPlanner,
+    DijkstraPlanner,
+)
 from habitat_baselines.slambased.reprojection import (
     angle_to_pi_2_minus_pi_2 as norm_ang,
 )
@@ -91,6 +94,21 @@ def make_good_config_for_orbslam2(config):
     return
 
 
+def make_planner(config, device):
+    if config.planner == "differentiable":
+        planner_cls = DifferentiableStarPlanner
+    elif config.planner == "dijkstra":
+        planner_cls = DijkstraPlanner
+    else:
+        raise ValueError(f"Unknown planner {config.planner}")
+    return planner_cls(
+        max_steps=config.planner_max_steps,
+        preprocess=config.preprocess_map,
+        beta=config.beta,
+        device=device,
+    )
+
+
 class RandomAgent:
     r"""Simplest agent, which returns random actions,
     until reach the goal
@@ -203,12 +221,7 @@ class ORBSLAM2Agent(RandomAgent):
             map_cell_size=config.map_cell_size,
             device=device,
         )
-        self.planner = DifferentiableStarPlanner(
-            max_steps=config.planner_max_steps,
-            preprocess=config.preprocess_map,
-            beta=config.beta,
-            device=device,
-        )
+        self.planner = make_planner(config, device)
         self.slam_to_world = 1.0
         self.timestep = 0.1
         self.timing = False
@@ -562,12 +575,7 @@ class ORBSLAM2MonodepthAgent(ORBSLAM2Agent):
             map_cell_size=config.map_cell_size,
             device=device,
         )
-        self.planner = DifferentiableStarPlanner(
-            max_steps=config.planner_max_steps,
-            preprocess=config.preprocess_map,
-            beta=config.beta,
-            device=device,
-        )
+        self.planner = make_planner(config, device)
         self.slam_to_world = 1.0
         self.timestep = 0.1
         self.timing = False
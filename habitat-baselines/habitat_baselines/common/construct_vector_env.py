@@ -93,5 +93,6 @@ def construct_envs(
         make_env_fn=make_gym_from_config,
         env_fn_args=tuple((c,) for c in configs),
         workers_ignore_signals=workers_ignore_signals,
+        use_shared_memory=config.habitat_baselines.vector_env.use_shared_memory,
     )
     return envs
@@ -5,18 +5,100 @@
 # LICENSE file in the root directory of this source tree.
 
 import warnings
-from typing import Any, Dict, Iterator, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
 import numpy as np
 import torch
 
 from habitat_baselines.common.tensor_dict import DictTree, TensorDict
+from habitat_baselines.common.trajectory_recorder import TrajectoryRecorder
 from habitat_baselines.rl.models.rnn_state_encoder import (
     build_pack_info_from_dones,
     build_rnn_build_seq_info,
 )
 
 
+def discounted_recurrence(
+    bias: torch.Tensor,
+    masks: torch.Tensor,
+    discount: float,
+    last: torch.Tensor,
+) -> torch.Tensor:
+    r"""Computes :py:`out[t] = bias[t] + discount * out[t + 1] * masks[t]`
+    backwards over the first dimension of :p:`bias`, with :py:`out[T] = last`.
+
+    The operations are the ones of the step by step loop of
+    :ref:`RolloutStorage.compute_returns`, so the results are identical.
+    """
+    out = torch.empty_like(bias)
+    x = last
+    for step in range(bias.size(0) - 1, -1, -1):
+        x = bias[step] + discount * x * masks[step]
+        out[step] = x
+    return out
+
+
+def chunked_discounted_scan(
+    bias: torch.Tensor,
+    masks: torch.Tensor,
+    discount: float,
+    last: torch.Tensor,
+    chunk_size: int = 32,
+) -> torch.Tensor:
+    r"""Closed form of :ref:`discounted_recurrence`: within a chunk of
+    :p:`chunk_size` steps, every output is a weighted sum of the biases of
+    the following steps of the chunk and of the output following the chunk,
+    with weights given by cumulative products of the discounts. Only one
+    iteration per chunk is needed, at the cost of
+    :py:`chunk_size * chunk_size` weights per environment. The results
+    differ from :ref:`discounted_recurrence` by floating point rounding.
+    """
+    num_steps = bias.size(0)
+    out = torch.empty_like(bias)
+    factors = discount * masks.to(bias.dtype)
+    x = last
+    for end in range(num_steps, 0, -chunk_size):
+        start = max(end - chunk_size, 0)
+        length = end - start
+        # cum[i, j] is the product of the factors of the steps i to j
+        upper = torch.ones(
+            length, length, dtype=torch.bool, device=bias.device
+        ).triu()
+        cum = torch.where(
+            upper.view(length, length, *([1] * (bias.dim() - 1))),
+            factors[start:end].unsqueeze(0),
+            torch.ones((), dtype=bias.dtype, device=bias.device),
+        ).cumprod(1)
+        # The bias of step j is discounted by the factors of the steps i to
+        # j - 1, the output following the chunk by the ones of i to the end.
+        weights = torch.cat(
+            [torch.ones_like(cum[:, :1]), cum[:, :-1]], dim=1
+        ) * upper.view(length, length, *([1] * (bias.dim() - 1)))
+        x = (weights * bias[start:end].unsqueeze(0)).sum(1) + cum[:, -1] * x
+        out[start:end] = x
+        x = x[0]
+    return out
+
+
+_scripted_discounted_recurrence: Optional[Callable[..., torch.Tensor]] = None
+
+
+def _get_returns_fn(method: str) -> Callable[..., torch.Tensor]:
+    global _scripted_discounted_recurrence
+    if method == "vectorized":
+        return discounted_recurrence
+    elif method == "jit":
+        if _scripted_discounted_recurrence is None:
+            _scripted_discounted_recurrence = torch.jit.script(
+                discounted_recurrence
+            )
+        return _scripted_discounted_recurrence
+    elif method == "scan":
+        return chunked_discounted_scan
+    else:
+        raise ValueError(f"Unknown returns computation method {method}")
+
+
 class RolloutStorage:
     r"""Class for storing rollout information for RL trainers."""
 
@@ -94,6 +176,12 @@ class RolloutStorage:
         # The default device to torch is the CPU, so everything is on the CPU.
         self.device = torch.device("cpu")
 
+        # Steps are handed to the recorder, if there is one, once their
+        # returns are computed.
+        self.recorder: Optional[TrajectoryRecorder] = None
+        self._recorded_episode_ids = torch.zeros(num_envs, dtype=torch.int64)
+        self._num_recorded_steps = 0
+
     @property
     def current_rollout_step_idx(self) -> int:
         assert all(
@@ -166,8 +254,28 @@ class RolloutStorage:
             0 for _ in self.current_rollout_step_idxs
         ]
 
-    def compute_returns(self, next_value, use_gae, gamma, tau):
-        if use_gae:
+    def compute_returns(
+        self, next_value, use_gae, gamma, tau, method: str = "loop"
+    ):
+        r"""Computes the returns of the current rollout.
+
+        :param method: :py:`"loop"` computes the returns step by step,
+            :py:`"vectorized"` computes the terms that don't depend on the
+            following steps for the whole rollout at once and only loops
+            over the discounting, :py:`"jit"` runs the same loop as a
+            TorchScript function. Both return identical results to
+            :py:`"loop"`. :py:`"scan"` uses the closed form of
+            :ref:`chunked_discounted_scan`, which needs fewer iterations but
+            only matches up to floating point rounding.
+
+        The steps of the rollout are then recorded by :ref:`recorder`, if
+        it is set.
+        """
+        if method != "loop":
+            self._compute_returns_batched(
+                next_value, use_gae, gamma, tau, _get_returns_fn(method)
+            )
+        elif use_gae:
             assert isinstance(self.buffers["value_preds"], torch.Tensor)
             self.buffers["value_preds"][
                 self.current_rollout_step_idx
@@ -198,6 +306,64 @@ class RolloutStorage:
                     + self.buffers["rewards"][step]
                 )
 
+        self._record_rollout()
+
+    def _record_rollout(self) -> None:
+        if self.recorder is None:
+            return
+        num_steps = self.current_rollout_step_idx
+        steps = self.buffers[0:num_steps]
+
+        # A new episode starts at every done, the episode ids continue from
+        # those of the previous rollout.
+        dones = torch.logical_not(steps["masks"]).view(num_steps, -1).cpu()
+        episode_ids = self._recorded_episode_ids + torch.cumsum(dones, 0)
+        self._recorded_episode_ids = episode_ids[-1].clone()
+        steps["episode_ids"] = episode_ids
+        steps["environment_ids"] = torch.arange(self._num_envs).expand(
+            num_steps, -1
+        )
+        steps["step_ids"] = (
+            torch.arange(num_steps).view(-1, 1) + self._num_recorded_steps
+        ).expand(-1, self._num_envs)
+        self._num_recorded_steps += num_steps
+
+        self.recorder.record(steps.map(lambda v: v.flatten(0, 1)))
+
+    def _compute_returns_batched(
+        self,
+        next_value,
+        use_gae: bool,
+        gamma: float,
+        tau: float,
+        returns_fn: Callable[..., torch.Tensor],
+    ) -> None:
+        num_steps = self.current_rollout_step_idx
+        rewards = self.buffers["rewards"][:num_steps]
+        next_masks = self.buffers["masks"][1 : num_steps + 1]
+        assert isinstance(self.buffers["returns"], torch.Tensor)
+        if use_gae:
+            assert isinstance(self.buffers["value_preds"], torch.Tensor)
+            self.buffers["value_preds"][num_steps] = next_value
+            value_preds = self.buffers["value_preds"][: num_steps + 1]
+            deltas = (
+                rewards
+                + gamma * value_preds[1:] * next_masks
+                - value_preds[:-1]
+            )
+            advantages = returns_fn(
+                deltas, next_masks, gamma * tau, torch.zeros_like(deltas[0])
+            )
+            self.buffers["returns"][:num_steps] = advantages + value_preds[:-1]
+        else:
+            self.buffers["returns"][num_steps] = next_value
+            self.buffers["returns"][:num_steps] = returns_fn(
+                rewards,
+                next_masks,
+                gamma,
+                self.buffers["returns"][num_steps],
+            )
+
     def recurrent_generator(
         self,
         advantages: Optional[torch.Tensor],
@@ -251,7 +417,10 @@ class RolloutStorage:
             yield batch.to_tree()
 
     def __getstate__(self) -> Dict[str, Any]:
-        return self.__dict__
+        state = self.__dict__.copy()
+        # The recorder stays with the learner
+        state["recorder"] = None
+        return state
 
     def __setstate__(self, state: Dict[str, Any]):
         self.__dict__.update(state)
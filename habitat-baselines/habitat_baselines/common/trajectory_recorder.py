@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+r"""Recording of the experience collected during training, for offline
+analysis, behavior cloning or auxiliary losses, without re-running the
+simulator.
+
+When :py:`habitat_baselines.trajectory_recorder.directory` is set, the
+rollout storage hands the steps of every rollout to a
+:ref:`TrajectoryRecorder` once their returns are computed. A writer thread
+writes the steps to shards of at most
+:py:`habitat_baselines.trajectory_recorder.max_shard_bytes` in the
+directory: ``shard_000000/`` with one ``.npy`` file per buffer, which are
+memory mapped while they are written and when they are read, or
+``shard_000000.npz`` with compression. Every step has the
+``episode_ids``, ``environment_ids`` and ``step_ids`` of the steps of VER,
+so :ref:`TrajectoryReader` can rebuild the sequences of steps of each
+episode.
+"""
+
+import glob
+import os
+import os.path as osp
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from habitat_baselines.common.tensor_dict import DictTree, TensorDict
+from habitat_baselines.rl.models.rnn_state_encoder import (
+    build_pack_info_from_episode_ids,
+    build_rnn_build_seq_info,
+)
+
+ID_KEYS = ("episode_ids", "environment_ids", "step_ids")
+_KEY_SEP = "."
+
+
+def _flat_key(key: Tuple[str, ...]) -> str:
+    return _KEY_SEP.join(key)
+
+
+class TrajectoryRecorder:
+    r"""Writes steps of experience to shards in :p:`directory` on a
+    background thread.
+
+    :param directory: Where the shards are written. Created if needed.
+    :param max_shard_bytes: Maximum size of a shard. The steps are streamed
+        to the memory mapped files of the current shard, so this doesn't
+        bound the memory used, except with :p:`compress` where a shard is
+        kept in memory until it is written.
+    :param compress: Write compressed ``.npz`` shards instead of ``.npy``
+        files that can be memory mapped.
+    :param max_pending: Number of calls to :ref:`record` that can be waiting
+        for the writer thread before :ref:`record` blocks.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_shard_bytes: int = 256 * 1024 * 1024,
+        compress: bool = False,
+        max_pending: int = 16,
+    ):
+        self.directory = directory
+        self.max_shard_bytes = max_shard_bytes
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+        self._num_shards = len(_list_shards(directory))
+
+        # Memory mapped files of the shard being written, and its number of
+        # steps and capacity in steps
+        self._shard: Optional[Dict[str, np.ndarray]] = None
+        self._shard_steps = 0
+        self._shard_capacity = 0
+        # Compressed shards are kept in memory until they are written
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._pending_bytes = 0
+
+        self._queue: "queue.Queue[Optional[Dict[str, np.ndarray]]]" = (
+            queue.Queue(maxsize=max_pending)
+        )
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(
+        cls, config, rank: int = 0
+    ) -> Optional["TrajectoryRecorder"]:
+        r"""Builds the recorder of :py:`habitat_baselines.trajectory_recorder`,
+        None if it isn't enabled. Every rank writes in its own directory.
+        """
+        recorder_config = config.habitat_baselines.trajectory_recorder
+        if recorder_config.directory == "":
+            return None
+        return cls(
+            osp.join(recorder_config.directory, f"rank_{rank}"),
+            max_shard_bytes=recorder_config.max_shard_bytes,
+            compress=recorder_config.compress,
+        )
+
+    def record(self, steps: TensorDict) -> None:
+        r"""Records a batch of steps, with one step per element of the first
+        dimension. :p:`steps` is copied to the CPU before returning, so the
+        buffers it comes from can be reused right away.
+        """
+        self._raise_writer_error()
+        for k in ID_KEYS:
+            assert k in steps, f"Recorded steps need {k}"
+        keys, values = steps.flatten()
+        self._put(
+            {
+                _flat_key(k): v.detach().to(device="cpu", copy=True).numpy()
+                for k, v in zip(keys, values)
+            }
+        )
+
+    def close(self) -> None:
+        r"""Writes the steps that don't fill a shard yet and stops the writer
+        thread.
+        """
+        if not self._thread.is_alive():
+            # The writer already stopped, possibly because it failed
+            self._raise_writer_error()
+            return
+        self._put(None)
+        self._thread.join()
+        self._raise_writer_error()
+
+    def _put(self, steps: Optional[Dict[str, np.ndarray]]) -> None:
+        # Waits for room in the queue as long as the writer is running, a
+        # writer that stopped would never make room.
+        while True:
+            try:
+                self._queue.put(steps, timeout=1.0)
+                return
+            except queue.Full:
+                self._raise_writer_error()
+                if not self._thread.is_alive():
+                    raise RuntimeError(
+                        "The trajectory recorder writer stopped"
+                    )
+
+    def _raise_writer_error(self):
+        if self._error is not None:
+            raise RuntimeError(
+                "The trajectory recorder failed to write"
+            ) from self._error
+
+    def _writer(self):
+        while True:
+            steps = self._queue.get()
+            try:
+                if steps is None:
+                    self._finish_shard()
+                elif self.compress:
+                    self._pending.append(steps)
+                    self._pending_bytes += sum(
+                        v.nbytes for v in steps.values()
+                    )
+                    if self._pending_bytes >= self.max_shard_bytes:
+                        self._finish_shard()
+                else:
+                    self._stream_steps(steps)
+            except BaseException as e:  # noqa: B902
+                self._error = e
+                return
+            if steps is None:
+                return
+
+    def _shard_path(self) -> str:
+        return osp.join(self.directory, f"shard_{self._num_shards:06d}")
+
+    def _stream_steps(self, steps: Dict[str, np.ndarray]):
+        num_steps = len(steps[ID_KEYS[0]])
+        start = 0
+        while start < num_steps:
+            if self._shard is None:
+                self._open_shard(steps)
+            assert self._shard is not None
+            n = min(
+                num_steps - start, self._shard_capacity - self._shard_steps
+            )
+            for k, v in steps.items():
+                self._shard[k][self._shard_steps : self._shard_steps + n] = v[
+                    start : start + n
+                ]
+            self._shard_steps += n
+            start += n
+            if self._shard_steps == self._shard_capacity:
+                self._finish_shard()
+
+    def _open_shard(self, steps: Dict[str, np.ndarray]):
+        step_nbytes = sum(v.nbytes // len(v) for v in steps.values())
+        self._shard_capacity = max(1, self.max_shard_bytes // step_nbytes)
+        self._shard_steps = 0
+        # Write to a temporary directory so that readers never see
+        # partially written shards.
+        tmp_path = self._shard_path() + ".tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        self._shard = {
+            k: np.lib.format.open_memmap(
+                osp.join(tmp_path, k + ".npy"),
+                mode="w+",
+                dtype=v.dtype,
+                shape=(self._shard_capacity,) + v.shape[1:],
+            )
+            for k, v in steps.items()
+        }
+
+    def _finish_shard(self):
+        path = self._shard_path()
+        if self.compress:
+            if len(self._pending) == 0:
+                return
+            np.savez_compressed(
+                path + ".npz",
+                **{
+                    k: np.concatenate([p[k] for p in self._pending])
+                    for k in self._pending[0].keys()
+                },
+            )
+            self._pending = []
+            self._pending_bytes = 0
+        else:
+            if self._shard is None:
+                return
+            tmp_path = path + ".tmp"
+            for k, v in self._shard.items():
+                if self._shard_steps < self._shard_capacity:
+                    # Only the last shard isn't full, truncate its files
+                    np.save(
+                        osp.join(tmp_path, k + ".partial.npy"),
+                        v[: self._shard_steps],
+                    )
+                    os.replace(
+                        osp.join(tmp_path, k + ".partial.npy"),
+                        osp.join(tmp_path, k + ".npy"),
+                    )
+                else:
+                    v.flush()
+            self._shard = None
+            os.rename(tmp_path, path)
+        self._num_shards += 1
+
+
+def _list_shards(directory: str) -> List[str]:
+    return sorted(
+        p
+        for p in glob.glob(osp.join(directory, "shard_*"))
+        if not p.endswith(".tmp")
+    )
+
+
+class TrajectoryReader:
+    r"""Reads the shards written by a :ref:`TrajectoryRecorder`.
+
+    :param directory: Directory of the recorder, or of one of its ranks.
+        The shards of all the ranks are read in the former case.
+    :param mmap: Memory map the ``.npy`` files of uncompressed shards
+        instead of loading them.
+    """
+
+    def __init__(self, directory: str, mmap: bool = True):
+        self.mmap = mmap
+        self.shard_paths = _list_shards(directory)
+        for rank_dir in sorted(glob.glob(osp.join(directory, "rank_*"))):
+            self.shard_paths += _list_shards(rank_dir)
+
+    def __len__(self) -> int:
+        return len(self.shard_paths)
+
+    def _load_arrays(self, index: int) -> Dict[str, np.ndarray]:
+        path = self.shard_paths[index]
+        if path.endswith(".npz"):
+            with np.load(path) as npz:
+                return {k: npz[k] for k in npz.files}
+        return {
+            osp.basename(p)[: -len(".npy")]: np.load(
+                p, mmap_mode="r" if self.mmap else None
+            )
+            for p in glob.glob(osp.join(path, "*.npy"))
+        }
+
+    @staticmethod
+    def _to_tensor_dict(
+        arrays: Dict[str, np.ndarray], inds: Optional[np.ndarray] = None
+    ) -> TensorDict:
+        keys = sorted(arrays.keys())
+        return TensorDict.from_flattened(
+            [tuple(k.split(_KEY_SEP)) for k in keys],
+            # Indexing copies the steps out of the memory mapped arrays,
+            # which are read-only.
+            [
+                torch.from_numpy(
+                    np.array(arrays[k]) if inds is None else arrays[k][inds]
+                )
+                for k in keys
+            ],
+        )
+
+    def load_shard(self, index: int) -> TensorDict:
+        r"""Loads all the steps of a shard, with one step per element of the
+        first dimension.
+        """
+        return self._to_tensor_dict(self._load_arrays(index))
+
+    def recurrent_generator(
+        self,
+        num_mini_batch: int,
+        device: Optional[torch.device] = None,
+    ) -> Iterator[DictTree]:
+        r"""Yields minibatches in the format of
+        :ref:`VERRolloutStorage.recurrent_generator`, to use with the
+        recurrent policies. The sequences of steps of every shard are
+        shuffled and split into :p:`num_mini_batch` minibatches.
+        """
+        if device is None:
+            device = torch.device("cpu")
+        for index in range(len(self)):
+            # Only the steps of each minibatch are read from the memory
+            # mapped arrays.
+            arrays = self._load_arrays(index)
+            ids = {k: np.asarray(arrays[k]).reshape(-1) for k in ID_KEYS}
+            for mb_inds in _sequence_mini_batches(ids, num_mini_batch):
+                batch = self._to_tensor_dict(arrays, mb_inds).map(
+                    lambda t: t.to(device=device)
+                )
+                batch["rnn_build_seq_info"] = build_rnn_build_seq_info(
+                    device=device,
+                    build_fn_result=build_pack_info_from_episode_ids(
+                        *(ids[k][mb_inds] for k in ID_KEYS)
+                    ),
+                )
+                rnn_build_seq_info: Any = batch["rnn_build_seq_info"]
+                batch["recurrent_hidden_states"] = batch[
+                    "recurrent_hidden_states"
+                ].index_select(0, rnn_build_seq_info["first_step_for_env"])
+                yield batch.to_tree()
+
+
+def _sequence_mini_batches(
+    ids: Dict[str, np.ndarray], num_mini_batch: int
+) -> Iterator[np.ndarray]:
+    # Steps of the same episode, in order of their step ids
+    episode_keys = (
+        ids["episode_ids"] * (ids["environment_ids"].max() + 1)
+        + ids["environment_ids"]
+    )
+    ordering = np.lexsort((ids["step_ids"], episode_keys))
+    _, starts = np.unique(episode_keys[ordering], return_index=True)
+    sequences = np.split(ordering, starts[1:])
+    assert len(sequences) >= num_mini_batch, (
+        f"Only {len(sequences)} sequences of steps for"
+        f" {num_mini_batch} mini batches"
+    )
+    for mb_sequences in np.array_split(
+        np.random.permutation(len(sequences)), num_mini_batch
+    ):
+        yield np.concatenate([sequences[i] for i in mb_sequences])
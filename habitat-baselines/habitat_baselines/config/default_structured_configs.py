@@ -264,8 +264,16 @@ class PPOConfig(HabitatBaselinesBaseConfig):
     # Use double buffered sampling, typically helps
     # when environment time is similar or larger than
     # policy inference time during rollout generation
-    # Not that this does not change the memory requirements
+    # Not that this does not change the memory requirements.
+    # The actions of one half of the environments are computed while the
+    # other half steps, the achieved overlap is logged as perf/env_overlap
     use_double_buffered_sampler: bool = False
+    # How the returns of a rollout are computed, see
+    # RolloutStorage.compute_returns: "loop", "vectorized" or "jit" (which
+    # give identical results), or "scan" (closed form, equal up to floating
+    # point rounding). With VER, all methods but "loop" compute the returns
+    # on the learner device, see VERRolloutStorage.compute_returns
+    returns_computation: str = "vectorized"
 
 
 @dataclass
@@ -363,6 +371,10 @@ class ORBSLAMConfig(HabitatBaselinesBaseConfig):
     num_actions: int = 3
     dist_to_stop: float = 0.05
     planner_max_steps: int = 500
+    # "differentiable" for DifferentiableStarPlanner or "dijkstra" for the
+    # faster, non-differentiable DijkstraPlanner, which reuses its search
+    # between steps
+    planner: str = "differentiable"
     # depth_denorm = (
     #     get_task_config().habitat.simulator.depth_sensor.max_depth
     # )
@@ -375,6 +387,29 @@ class ProfilingConfig(HabitatBaselinesBaseConfig):
     num_steps_to_capture: int = -1
 
 
+@dataclass
+class VectorEnvConfig(HabitatBaselinesBaseConfig):
+    # Have the environment workers write their observations into
+    # preallocated shared memory buffers and only send a small header
+    # through the pipe. Saves pickling and copying images every step.
+    # The actions sent by the trainer also go through shared memory.
+    use_shared_memory: bool = False
+
+
+@dataclass
+class TrajectoryRecorderConfig(HabitatBaselinesBaseConfig):
+    # Directory where the steps collected during training are written,
+    # see habitat_baselines/common/trajectory_recorder.py. Nothing is
+    # recorded when empty.
+    directory: str = ""
+    # Maximum size in bytes of a shard. The shard being written is memory
+    # mapped, or kept in memory when compressed
+    max_shard_bytes: int = 256 * 1024 * 1024
+    # Write compressed .npz shards instead of .npy files that can be
+    # memory mapped
+    compress: bool = False
+
+
 @dataclass
 class HabitatBaselinesConfig(HabitatBaselinesBaseConfig):
     # task config can be a list of configs like "A.yaml,B.yaml"
@@ -421,6 +456,8 @@ class HabitatBaselinesConfig(HabitatBaselinesBaseConfig):
     load_resume_state_config: bool = True
     eval: EvalConfig = EvalConfig()
     profiling: ProfilingConfig = ProfilingConfig()
+    vector_env: VectorEnvConfig = VectorEnvConfig()
+    trajectory_recorder: TrajectoryRecorderConfig = TrajectoryRecorderConfig()
 
 
 @dataclass
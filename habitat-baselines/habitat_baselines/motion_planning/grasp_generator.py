@@ -4,6 +4,7 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import magnum as mn
 import numpy as np
 from PIL import Image
 
@@ -81,8 +82,13 @@ class GraspGenerator:
             self._mp_sim.set_arm_pos(desired_js)
             self._mp_sim.micro_step()
 
+            # Checked several times as the simulation settles, so the
+            # results can't come from the cache.
             state_valid = all(
-                [self._is_state_valid_fn(desired_js) for _ in range(5)]
+                [
+                    self._is_state_valid_fn(desired_js, use_cache=False)
+                    for _ in range(5)
+                ]
             )
             if state_valid:
                 found_sol = np.array(desired_js)
@@ -133,30 +139,38 @@ class GraspGenerator:
         size_y = obj_dat.bb.size_y() / 2.0
         return np.array([0.0, size_y, 0.0])
 
-    def _bounding_sphere_sample(
-        self, obj_idx: int, obj_dat: ObjectGraspTarget
-    ) -> RobotTarget:
-        obj_pos = np.array(obj_dat.transformation.translation)
+    def _sample_grasp_points(self, obj_idx: int, obj_pos: np.ndarray):
+        """
+        Samples the candidate grasp points around the object. Yields the
+        index of the candidates that are closer to the object than to any
+        other object (all of them if the other objects aren't known), with
+        their point in global space and in the robot's base coordinate
+        frame. The points are drawn as they are consumed, so that the random
+        draws are interleaved with the ones of the IK restarts of each
+        candidate.
+        """
+        scene_obj_ids = None
+        if self.knows_other_objs:
+            sim = self._mp_sim._sim
+            scene_obj_ids = np.array(sim.scene_obj_ids)
+            scene_obj_pos = np.array(sim.get_scene_pos())
 
         inv_robo_T = self._mp_sim.get_robot_transform().inverted()
+        rot = np.stack(
+            [
+                np.array(inv_robo_T.transform_vector(axis))
+                for axis in (
+                    mn.Vector3.x_axis(),
+                    mn.Vector3.y_axis(),
+                    mn.Vector3.z_axis(),
+                )
+            ],
+            axis=1,
+        )
+        trans = np.array(inv_robo_T.translation)
 
-        # Setup extra collision checkers
-        self.mp.setup_ee_margin(obj_idx)
-        self._is_state_valid_fn = self.mp._is_state_valid
-
-        # Get the candidate grasp points in global space.
         min_radius = self._grasp_thresh * 0.5
-
-        sim = self._mp_sim._sim
-        scene_obj_ids = sim.scene_obj_ids
-        scene_obj_pos = sim.get_scene_pos()
-
-        found_goal_js = None
-        real_ee_pos = None
-
         for i in range(self._n_gen_grasps):
-            self._verbose_log(f"Trying for {i}")
-
             # Generate a grasp 3D point
             radius = np.random.uniform(min_radius, self._grasp_thresh)
             point = np.random.randn(3)
@@ -164,7 +178,7 @@ class GraspGenerator:
             point = radius * (point / np.linalg.norm(point))
             point += obj_pos
 
-            if self.knows_other_objs:
+            if scene_obj_ids is not None:
                 closest_idx = np.argmin(
                     np.linalg.norm(scene_obj_pos - point, axis=-1)
                 )
@@ -174,8 +188,29 @@ class GraspGenerator:
                     )
                     continue
 
-            local_point = inv_robo_T.transform_point(point)
-            local_point = np.array(local_point)
+            yield i, point, rot @ point + trans
+
+    def _bounding_sphere_sample(
+        self, obj_idx: int, obj_dat: ObjectGraspTarget
+    ) -> RobotTarget:
+        obj_pos = np.array(obj_dat.transformation.translation)
+
+        # Setup extra collision checkers
+        self.mp.setup_ee_margin(obj_idx)
+        self._is_state_valid_fn = self.mp._is_state_valid
+
+        sim = self._mp_sim._sim
+        scene_obj_ids = sim.scene_obj_ids
+        scene_obj_pos = sim.get_scene_pos()
+
+        found_goal_js = None
+        real_ee_pos = None
+
+        # Get the candidate grasp points in global space.
+        for i, point, local_point in self._sample_grasp_points(
+            obj_idx, obj_pos
+        ):
+            self._verbose_log(f"Trying for {i}")
 
             self._grasp_debug_points(obj_pos, point)
 
@@ -8,8 +8,9 @@ import glob
 import os
 import os.path as osp
 import sys
+import time
 import uuid
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 from gym import spaces
@@ -63,6 +64,21 @@ class MotionPlanner:
         self._use_sim = self._get_sim()
         self.grasp_gen: Optional[GraspGenerator] = None
 
+        # Results of the collision checks, keyed by the joint states
+        # rounded to `valid_cache_resolution`. Only valid while the rest of
+        # the scene doesn't move, so cleared for every plan.
+        self._valid_cache_res: float = self._config.get(
+            "valid_cache_resolution", 1e-3
+        )
+        self._valid_cache: Dict[Tuple[int, ...], bool] = {}
+        self._reset_check_stats()
+
+    def _reset_check_stats(self):
+        self._valid_cache.clear()
+        self._num_cache_hits = 0
+        self._num_checks = 0
+        self._check_time = 0.0
+
     def set_should_render(self, should_render: bool):
         self._should_render = should_render
         if self._should_render:
@@ -109,10 +125,41 @@ class MotionPlanner:
             self._should_render,
         )
 
-    def _is_state_valid(self, x: np.ndarray, take_image: bool = False) -> bool:
+    def _is_state_valid(
+        self, x: np.ndarray, take_image: bool = False, use_cache: bool = True
+    ) -> bool:
         """Returns if a state is collision free.
         :param take_image: If true, will render a debug image.
+        :param use_cache: If true, reuses the result of a previous check of
+            the same joint state, up to `valid_cache_resolution`. The first
+            check of a plan, which can set collisions to ignore, and checks
+            that render are never cached.
         """
+        use_cache = (
+            use_cache
+            and not take_image
+            and self._valid_cache_res > 0
+            and self._coll_check_count > 0
+        )
+        if use_cache:
+            key = tuple(
+                np.round(np.asarray(x) / self._valid_cache_res)
+                .astype(np.int64)
+                .tolist()
+            )
+            if key in self._valid_cache:
+                self._num_cache_hits += 1
+                return self._valid_cache[key]
+
+        start_time = time.perf_counter()
+        is_valid = self._check_state_valid(x, take_image)
+        self._check_time += time.perf_counter() - start_time
+        self._num_checks += 1
+        if use_cache:
+            self._valid_cache[key] = is_valid
+        return is_valid
+
+    def _check_state_valid(self, x: np.ndarray, take_image: bool) -> bool:
         self._mp_space.set_arm(x)
         if self._ee_margin is not None and self._sphere_id is not None:
             self._use_sim.set_position(
@@ -172,6 +219,7 @@ class MotionPlanner:
         self._ignore_names = []
         self._ignore_first = ignore_first
         self._hold_id = self._sim.grasp_mgr.snap_idx
+        self._reset_check_stats()
         self._use_sim.setup(use_prev)
         if self.traj_viz_id is not None:
             self._sim.remove_traj_obj(self.traj_viz_id)
@@ -218,6 +266,8 @@ class MotionPlanner:
         """
         Return logging information about the most recent plan
         """
+        # Before the checks below, which aren't part of the plan
+        check_stats = self.get_check_stats(f"plan_{name}")
         is_start_bad = False
         is_goal_bad = False
         if not robo_targ.is_guess and plan is None:
@@ -233,6 +283,22 @@ class MotionPlanner:
             f"plan_{name}goal_bad": is_start_bad,
             f"plan_{name}start_bad": is_goal_bad,
             f"plan_{name}approx": self._is_approx_sol,
+            **check_stats,
+        }
+
+    def get_check_stats(self, prefix: str = "plan_") -> Dict[str, float]:
+        """
+        Statistics of the collision checks since the start of the most
+        recent plan: number of checks that ran, fraction of the queries
+        answered by the cache and average time per check in seconds.
+        """
+        num_queries = self._num_checks + self._num_cache_hits
+        return {
+            f"{prefix}num_coll_checks": self._num_checks,
+            f"{prefix}coll_cache_hit_rate": self._num_cache_hits
+            / max(num_queries, 1),
+            f"{prefix}coll_check_time": self._check_time
+            / max(self._num_checks, 1),
         }
 
     def motion_plan(
@@ -271,6 +337,7 @@ class MotionPlanner:
 
         self._ignore_names = ["ball_new", *ignore_names]
         self._coll_check_count = 0
+        self._reset_check_stats()
 
         self.setup_ee_margin(robot_target.obj_id_target)
 
@@ -3,7 +3,8 @@
 # LICENSE file in the root directory of this source tree.
 
 import os.path as osp
-from typing import Dict
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
 
 import gym.spaces as spaces
 import torch
@@ -111,6 +112,35 @@ class HierarchicalPolicy(Policy):
         self._call_high_level = self._call_high_level.to(device)
         self._cur_skills = self._cur_skills.to(device)
 
+    @staticmethod
+    def _group_by_skill(
+        skill_ids: torch.Tensor, env_mask: Optional[torch.Tensor] = None
+    ) -> Dict[int, List[int]]:
+        """
+        Groups the environments by the skill they use, so that each skill
+        processes all of its environments as one batch.
+
+        :param env_mask: Only the environments where this is True are
+            grouped, all of them if None.
+        :returns: Maps the skill index to the environment indices.
+        """
+        keep = (
+            [True] * skill_ids.shape[0]
+            if env_mask is None
+            else env_mask.view(-1).tolist()
+        )
+        grouped: Dict[int, List[int]] = defaultdict(list)
+        for batch_idx, (skill_idx, should_keep) in enumerate(
+            zip(skill_ids.tolist(), keep)
+        ):
+            if should_keep:
+                grouped[int(skill_idx)].append(batch_idx)
+        return grouped
+
+    @staticmethod
+    def _select_envs(observations, batch_idx: List[int]) -> Dict[str, Any]:
+        return {k: v[batch_idx] for k, v in observations.items()}
+
     def act(
         self,
         observations,
@@ -123,33 +153,33 @@ class HierarchicalPolicy(Policy):
         self._high_level_policy.apply_mask(masks)
         use_device = prev_actions.device
 
-        batched_observations = [
-            {k: v[batch_idx].unsqueeze(0) for k, v in observations.items()}
-            for batch_idx in range(self._num_envs)
-        ]
-        batched_rnn_hidden_states = rnn_hidden_states.unsqueeze(1)
-        batched_prev_actions = prev_actions.unsqueeze(1)
-        batched_masks = masks.unsqueeze(1)
+        rnn_hidden_states = rnn_hidden_states.clone()
+        prev_actions = prev_actions.clone()
 
         batched_bad_should_terminate = torch.zeros(
             self._num_envs, device=use_device, dtype=torch.bool
         )
 
-        # Check if skills should terminate.
-        for batch_idx, skill_idx in enumerate(self._cur_skills):
-            if masks[batch_idx] == 0.0:
-                # Don't check if the skill is done if the episode ended.
-                continue
-            should_terminate, bad_should_terminate = self._skills[
-                skill_idx.item()
+        # Check if skills should terminate. Don't check if the skill is done
+        # if the episode ended.
+        for skill_idx, batch_idx in self._group_by_skill(
+            self._cur_skills, masks
+        ).items():
+            (should_terminate, bad_should_terminate,) = self._skills[
+                skill_idx
             ].should_terminate(
-                batched_observations[batch_idx],
-                batched_rnn_hidden_states[batch_idx],
-                batched_prev_actions[batch_idx],
-                batched_masks[batch_idx],
+                self._select_envs(observations, batch_idx),
+                rnn_hidden_states[batch_idx],
+                prev_actions[batch_idx],
+                masks[batch_idx],
+                batch_idx,
+            )
+            batched_bad_should_terminate[batch_idx] = bad_should_terminate.to(
+                use_device
+            )
+            self._call_high_level[batch_idx] = should_terminate.to(
+                self._call_high_level.device
             )
-            batched_bad_should_terminate[batch_idx] = bad_should_terminate
-            self._call_high_level[batch_idx] = should_terminate
 
         # Always call high-level if the episode is over.
         self._call_high_level = self._call_high_level | (~masks).view(-1)
@@ -172,20 +202,18 @@ class HierarchicalPolicy(Policy):
                 self._call_high_level,
             )
 
-            for new_skill_batch_idx in torch.nonzero(self._call_high_level):
-                skill_idx = new_skills[new_skill_batch_idx.item()]
-
-                skill = self._skills[skill_idx.item()]
-
+            for skill_idx, batch_idx in self._group_by_skill(
+                new_skills, self._call_high_level
+            ).items():
                 (
-                    batched_rnn_hidden_states[new_skill_batch_idx],
-                    batched_prev_actions[new_skill_batch_idx],
-                ) = skill.on_enter(
-                    new_skill_args[new_skill_batch_idx],
-                    new_skill_batch_idx.item(),
-                    batched_observations[new_skill_batch_idx],
-                    batched_rnn_hidden_states[new_skill_batch_idx],
-                    batched_prev_actions[new_skill_batch_idx],
+                    rnn_hidden_states[batch_idx],
+                    prev_actions[batch_idx],
+                ) = self._skills[skill_idx].on_enter(
+                    [new_skill_args[i] for i in batch_idx],
+                    batch_idx,
+                    self._select_envs(observations, batch_idx),
+                    rnn_hidden_states[batch_idx],
+                    prev_actions[batch_idx],
                 )
             self._cur_skills = (
                 (~self._call_high_level) * self._cur_skills
@@ -195,24 +223,24 @@ class HierarchicalPolicy(Policy):
         actions = torch.zeros(
             self._num_envs, get_num_actions(self._action_space)
         )
-        for batch_idx, skill_idx in enumerate(self._cur_skills):
-            action, batched_rnn_hidden_states[batch_idx] = self._skills[
-                skill_idx.item()
-            ].act(
-                batched_observations[batch_idx],
-                batched_rnn_hidden_states[batch_idx],
-                batched_prev_actions[batch_idx],
-                batched_masks[batch_idx],
+        for skill_idx, batch_idx in self._group_by_skill(
+            self._cur_skills
+        ).items():
+            action, rnn_hidden_states[batch_idx] = self._skills[skill_idx].act(
+                self._select_envs(observations, batch_idx),
+                rnn_hidden_states[batch_idx],
+                prev_actions[batch_idx],
+                masks[batch_idx],
                 batch_idx,
             )
-            actions[batch_idx] = action
+            actions[batch_idx] = action.to(actions.device)
 
         should_terminate = batched_bad_should_terminate | hl_terminate
         if should_terminate.sum() > 0:
             # End the episode where requested.
             for batch_idx in torch.nonzero(should_terminate):
                 baselines_logger.info(
-                    f"Calling stop action for batch {batch_idx}, {bad_should_terminate}, {hl_terminate}"
+                    f"Calling stop action for batch {batch_idx}, {batched_bad_should_terminate}, {hl_terminate}"
                 )
                 actions[batch_idx, self._stop_action_idx] = 1.0
 
@@ -220,7 +248,7 @@ class HierarchicalPolicy(Policy):
             None,
             actions,
             None,
-            batched_rnn_hidden_states.view(rnn_hidden_states.shape),
+            rnn_hidden_states,
         )
 
     @classmethod
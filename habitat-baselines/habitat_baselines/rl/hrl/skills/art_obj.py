@@ -16,21 +16,32 @@ from habitat_baselines.rl.hrl.skills.nn_skill import NnSkillPolicy
 class ArtObjSkillPolicy(NnSkillPolicy):
     def on_enter(
         self,
-        skill_arg: List[str],
-        batch_idx: int,
+        skill_arg: List[List[str]],
+        batch_idx: List[int],
         observations,
         rnn_hidden_states,
         prev_actions,
     ) -> Tuple[torch.Tensor, torch.Tensor]:
-        super().on_enter(
+        ret = super().on_enter(
             skill_arg, batch_idx, observations, rnn_hidden_states, prev_actions
         )
-        self._did_leave_start_zone = torch.zeros(
-            self._batch_size, device=prev_actions.device
-        )
-        self._episode_start_resting_pos = observations[
+        start_resting_pos = observations[
             RelativeRestingPositionSensor.cls_uuid
         ]
+        if not hasattr(self, "_did_leave_start_zone"):
+            self._did_leave_start_zone = torch.zeros(
+                self._batch_size,
+                device=prev_actions.device,
+                dtype=torch.bool,
+            )
+            self._episode_start_resting_pos = torch.zeros(
+                (self._batch_size, *start_resting_pos.shape[1:]),
+                device=start_resting_pos.device,
+                dtype=start_resting_pos.dtype,
+            )
+        self._did_leave_start_zone[batch_idx] = False
+        self._episode_start_resting_pos[batch_idx] = start_resting_pos
+        return ret
 
     def _is_skill_done(
         self,
@@ -38,18 +49,20 @@ class ArtObjSkillPolicy(NnSkillPolicy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> torch.BoolTensor:
 
         cur_resting_pos = observations[RelativeRestingPositionSensor.cls_uuid]
 
         did_leave_start_zone = (
             torch.norm(
-                cur_resting_pos - self._episode_start_resting_pos, dim=-1
+                cur_resting_pos - self._episode_start_resting_pos[batch_idx],
+                dim=-1,
             )
             > self._config.start_zone_radius
         )
-        self._did_leave_start_zone = torch.logical_or(
-            self._did_leave_start_zone, did_leave_start_zone
+        self._did_leave_start_zone[batch_idx] = torch.logical_or(
+            self._did_leave_start_zone[batch_idx], did_leave_start_zone
         )
 
         cur_resting_dist = torch.norm(
@@ -61,7 +74,11 @@ class ArtObjSkillPolicy(NnSkillPolicy):
         )
 
         is_not_holding = ~is_holding
-        return is_not_holding & is_within_thresh & self._did_leave_start_zone
+        return (
+            is_not_holding
+            & is_within_thresh
+            & self._did_leave_start_zone[batch_idx]
+        )
 
     def _parse_skill_arg(self, skill_arg):
         self._internal_log(f"Parsing skill argument {skill_arg}")
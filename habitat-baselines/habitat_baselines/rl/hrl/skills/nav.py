@@ -3,6 +3,7 @@
 # LICENSE file in the root directory of this source tree.
 
 from dataclasses import dataclass
+from typing import List
 
 import gym.spaces as spaces
 import torch
@@ -47,13 +48,16 @@ class NavSkillPolicy(NnSkillPolicy):
         ret_obs = super()._get_filtered_obs(observations, cur_batch_idx)
 
         if TargetOrGoalStartPointGoalSensor.cls_uuid in ret_obs:
-            if self._cur_skill_args[cur_batch_idx].is_target:
-                replace_sensor = TargetGoalGpsCompassSensor.cls_uuid
-            else:
-                replace_sensor = TargetStartGpsCompassSensor.cls_uuid
-            ret_obs[TargetOrGoalStartPointGoalSensor.cls_uuid] = observations[
-                replace_sensor
-            ]
+            goal_obs = observations[TargetGoalGpsCompassSensor.cls_uuid]
+            is_target = torch.tensor(
+                [self._cur_skill_args[i].is_target for i in cur_batch_idx],
+                device=goal_obs.device,
+            ).view(-1, *([1] * (goal_obs.dim() - 1)))
+            ret_obs[TargetOrGoalStartPointGoalSensor.cls_uuid] = torch.where(
+                is_target,
+                goal_obs,
+                observations[TargetStartGpsCompassSensor.cls_uuid],
+            )
         return ret_obs
 
     def _get_multi_sensor_index(self, batch_idx: int, sensor_name: str) -> int:
@@ -65,6 +69,7 @@ class NavSkillPolicy(NnSkillPolicy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> torch.BoolTensor:
         filtered_prev_actions = prev_actions[
             :, self._ac_start : self._ac_start + self._ac_len
@@ -74,9 +79,8 @@ class NavSkillPolicy(NnSkillPolicy):
             filtered_prev_actions[:, 0],
             filtered_prev_actions[:, 1],
         )
-        should_stop = (
-            torch.abs(lin_vel) < self._config.lin_speed_stop
-            and torch.abs(ang_vel) < self._config.ang_speed_stop
+        should_stop = (torch.abs(lin_vel) < self._config.lin_speed_stop) & (
+            torch.abs(ang_vel) < self._config.ang_speed_stop
         )
         return should_stop
 
@@ -4,6 +4,7 @@
 
 import os.path as osp
 from dataclasses import dataclass
+from typing import List
 
 import numpy as np
 import torch
@@ -111,10 +112,13 @@ class OracleNavPolicy(NnSkillPolicy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> torch.BoolTensor:
         ret = torch.zeros(masks.shape[0], dtype=torch.bool).to(masks.device)
 
-        for env_i, skill_arg in enumerate(self._cur_skill_args):
+        for env_i, skill_arg in enumerate(
+            self._cur_skill_args[i] for i in batch_idx
+        ):
             if skill_arg.is_target_obj:
                 dist, angle = observations[
                     TargetStartGpsCompassSensor.cls_uuid
@@ -182,8 +186,11 @@ class OracleNavPolicy(NnSkillPolicy):
     ):
         full_action = torch.zeros(prev_actions.shape, device=masks.device)
         full_action = self._keep_holding_state(full_action, observations)
-        cur_args = self._cur_skill_args[cur_batch_idx]
 
-        full_action[:, self._oracle_nav_ac_idx] = cur_args.action_idx + 1
+        full_action[:, self._oracle_nav_ac_idx] = torch.tensor(
+            [self._cur_skill_args[i].action_idx + 1 for i in cur_batch_idx],
+            device=full_action.device,
+            dtype=full_action.dtype,
+        )
 
         return full_action, rnn_hidden_states
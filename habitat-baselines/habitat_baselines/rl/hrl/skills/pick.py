@@ -2,6 +2,8 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+from typing import List
+
 import torch
 
 from habitat.tasks.rearrange.rearrange_sensors import (
@@ -18,6 +20,7 @@ class PickSkillPolicy(NnSkillPolicy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> torch.BoolTensor:
         # Is the agent holding the object and is the end-effector at the
         # resting position?
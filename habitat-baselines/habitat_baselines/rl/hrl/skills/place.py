@@ -3,6 +3,7 @@
 # LICENSE file in the root directory of this source tree.
 
 from dataclasses import dataclass
+from typing import List
 
 import torch
 
@@ -36,6 +37,7 @@ class PlaceSkillPolicy(PickSkillPolicy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> torch.BoolTensor:
         # Is the agent not holding an object and is the end-effector at the
         # resting position?
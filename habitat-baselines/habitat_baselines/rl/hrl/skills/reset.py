@@ -21,6 +21,7 @@ class ResetArmSkill(SkillPolicy):
     ):
         super().__init__(config, action_space, batch_size, True)
         self._target = np.array([float(x) for x in config.reset_joint_state])
+        self._initial_delta = np.zeros((batch_size, len(self._target)))
 
         self._ac_start = 0
         for k, space in action_space.items():
@@ -31,8 +32,8 @@ class ResetArmSkill(SkillPolicy):
 
     def on_enter(
         self,
-        skill_arg: List[str],
-        batch_idx: int,
+        skill_arg: List[List[str]],
+        batch_idx: List[int],
         observations,
         rnn_hidden_states,
         prev_actions,
@@ -41,7 +42,7 @@ class ResetArmSkill(SkillPolicy):
             skill_arg, batch_idx, observations, rnn_hidden_states, prev_actions
         )
 
-        self._initial_delta = (
+        self._initial_delta[batch_idx] = (
             self._target - observations["joint"].cpu().numpy()
         )
 
@@ -51,7 +52,7 @@ class ResetArmSkill(SkillPolicy):
         return None
 
     def _is_skill_done(
-        self, observations, rnn_hidden_states, prev_actions, masks
+        self, observations, rnn_hidden_states, prev_actions, masks, batch_idx
     ):
         current_joint_pos = observations["joint"].cpu().numpy()
 
@@ -80,7 +81,7 @@ class ResetArmSkill(SkillPolicy):
         # always in [-1,1] and has the benefit of reducing the delta
         # amount was we converge to the target.
         delta = delta / np.maximum(
-            self._initial_delta.max(-1, keepdims=True), 1e-5
+            self._initial_delta[cur_batch_idx].max(-1, keepdims=True), 1e-5
         )
 
         action = torch.zeros_like(prev_actions)
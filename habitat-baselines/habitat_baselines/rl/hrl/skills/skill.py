@@ -81,12 +81,15 @@ class SkillPolicy(Policy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> Tuple[torch.BoolTensor, torch.BoolTensor]:
         """
-        :returns: A (batch_size,) size tensor where 1 indicates the skill wants to end and 0 if not.
+        Passes in the data of the environments `batch_idx`, which are all
+        using this skill.
+        :returns: A (len(batch_idx),) size tensor where 1 indicates the skill wants to end and 0 if not.
         """
         is_skill_done = self._is_skill_done(
-            observations, rnn_hidden_states, prev_actions, masks
+            observations, rnn_hidden_states, prev_actions, masks, batch_idx
         )
         if is_skill_done.sum() > 0:
             self._internal_log(
@@ -94,13 +97,14 @@ class SkillPolicy(Policy):
                 observations,
             )
 
+        cur_skill_step = self._cur_skill_step[batch_idx]
         bad_terminate = torch.zeros(
-            self._cur_skill_step.shape,
-            device=self._cur_skill_step.device,
+            cur_skill_step.shape,
+            device=cur_skill_step.device,
             dtype=torch.bool,
         )
         if self._config.max_skill_steps > 0:
-            over_max_len = self._cur_skill_step > self._config.max_skill_steps
+            over_max_len = cur_skill_step > self._config.max_skill_steps
             if self._config.force_end_on_timeout:
                 bad_terminate = over_max_len
             else:
@@ -108,7 +112,7 @@ class SkillPolicy(Policy):
 
         if bad_terminate.sum() > 0:
             self._internal_log(
-                f"Bad terminating due to timeout {self._cur_skill_step}, {bad_terminate}",
+                f"Bad terminating due to timeout {cur_skill_step}, {bad_terminate}",
                 observations,
             )
 
@@ -116,27 +120,31 @@ class SkillPolicy(Policy):
 
     def on_enter(
         self,
-        skill_arg: List[str],
-        batch_idx: int,
+        skill_arg: List[List[str]],
+        batch_idx: List[int],
         observations,
         rnn_hidden_states,
         prev_actions,
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         """
-        Passes in the data at the current `batch_idx`
+        Passes in the data of the environments `batch_idx` entering the
+        skill, with the skill arguments of each environment.
         :returns: The new hidden state and prev_actions ONLY at the batch_idx.
         """
         self._cur_skill_step[batch_idx] = 0
-        self._cur_skill_args[batch_idx] = self._parse_skill_arg(skill_arg)
+        for env_idx, env_skill_arg in zip(batch_idx, skill_arg):
+            self._cur_skill_args[env_idx] = self._parse_skill_arg(
+                env_skill_arg
+            )
 
-        self._internal_log(
-            f"Entering skill with arguments {skill_arg} parsed to {self._cur_skill_args[batch_idx]}",
-            observations,
-        )
+            self._internal_log(
+                f"Entering skill with arguments {env_skill_arg} parsed to {self._cur_skill_args[env_idx]}",
+                observations,
+            )
 
         return (
-            rnn_hidden_states[batch_idx] * 0.0,
-            prev_actions[batch_idx] * 0.0,
+            rnn_hidden_states * 0.0,
+            prev_actions * 0.0,
         )
 
     @classmethod
@@ -151,10 +159,12 @@ class SkillPolicy(Policy):
         rnn_hidden_states,
         prev_actions,
         masks,
-        cur_batch_idx,
+        cur_batch_idx: List[int],
         deterministic=False,
     ):
         """
+        Passes in the data of the environments `cur_batch_idx`, which are
+        all using this skill.
         :returns: Predicted action and next rnn hidden state.
         """
         self._cur_skill_step[cur_batch_idx] += 1
@@ -174,22 +184,27 @@ class SkillPolicy(Policy):
     def to(self, device):
         self._cur_skill_step = self._cur_skill_step.to(device)
 
-    def _select_obs(self, obs, cur_batch_idx):
+    def _select_obs(self, obs, cur_batch_idx: List[int]):
         """
         Selects out the part of the observation that corresponds to the current goal of the skill.
         """
         for k in self._config.obs_skill_inputs:
-            cur_multi_sensor_index = self._get_multi_sensor_index(
-                cur_batch_idx, k
-            )
+            cur_multi_sensor_index = [
+                self._get_multi_sensor_index(env_idx, k)
+                for env_idx in cur_batch_idx
+            ]
             if k not in obs:
                 raise ValueError(
                     f"Skill {self._config.skill_name}: Could not find {k} out of {obs.keys()}"
                 )
             entity_positions = obs[k].view(
-                1, -1, self._config.get("obs_skill_input_dim", 3)
+                len(cur_batch_idx),
+                -1,
+                self._config.get("obs_skill_input_dim", 3),
             )
-            obs[k] = entity_positions[:, cur_multi_sensor_index]
+            obs[k] = entity_positions[
+                torch.arange(len(cur_batch_idx)), cur_multi_sensor_index
+            ]
         return obs
 
     def _is_skill_done(
@@ -198,13 +213,12 @@ class SkillPolicy(Policy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> torch.BoolTensor:
         """
-        :returns: A (batch_size,) size tensor where 1 indicates the skill wants to end and 0 if not.
+        :returns: A (len(batch_idx),) size tensor where 1 indicates the skill wants to end and 0 if not.
         """
-        return torch.zeros(observations.shape[0], dtype=torch.bool).to(
-            masks.device
-        )
+        return torch.zeros(masks.shape[0], dtype=torch.bool).to(masks.device)
 
     def _parse_skill_arg(self, skill_arg: str) -> Any:
         """
@@ -218,7 +232,7 @@ class SkillPolicy(Policy):
         rnn_hidden_states,
         prev_actions,
         masks,
-        cur_batch_idx,
+        cur_batch_idx: List[int],
         deterministic=False,
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         raise NotImplementedError()
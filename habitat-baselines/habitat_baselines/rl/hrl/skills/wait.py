@@ -2,7 +2,7 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
-from typing import Any
+from typing import Any, List
 
 import gym.spaces as spaces
 import torch
@@ -18,11 +18,11 @@ class WaitSkillPolicy(SkillPolicy):
         batch_size,
     ):
         super().__init__(config, action_space, batch_size, True)
-        self._wait_time = -1
 
     def _parse_skill_arg(self, skill_arg: str) -> Any:
-        self._wait_time = int(skill_arg[0])
-        self._internal_log(f"Requested wait time {self._wait_time}")
+        wait_time = int(skill_arg[0])
+        self._internal_log(f"Requested wait time {wait_time}")
+        return wait_time
 
     def _is_skill_done(
         self,
@@ -30,9 +30,14 @@ class WaitSkillPolicy(SkillPolicy):
         rnn_hidden_states,
         prev_actions,
         masks,
+        batch_idx: List[int],
     ) -> torch.BoolTensor:
-        assert self._wait_time > 0
-        return self._cur_skill_step >= self._wait_time
+        wait_time = torch.tensor(
+            [self._cur_skill_args[i] for i in batch_idx],
+            device=self._cur_skill_step.device,
+        )
+        assert (wait_time > 0).all()
+        return self._cur_skill_step[batch_idx] >= wait_time
 
     def _internal_act(
         self,
@@ -21,6 +21,7 @@ from torch.optim.lr_scheduler import LambdaLR
 
 from habitat import Config, VectorEnv, logger
 from habitat.config import read_write
+from habitat.core.vector_env import CURRENT_EPISODE_NAME
 from habitat.tasks.nav.nav import NON_SCALAR_METRICS
 from habitat.tasks.rearrange.rearrange_sensors import GfxReplayMeasure
 from habitat.tasks.rearrange.utils import write_gfx_replay
@@ -40,6 +41,7 @@ from habitat_baselines.common.tensorboard_utils import (
     TensorboardWriter,
     get_writer,
 )
+from habitat_baselines.common.trajectory_recorder import TrajectoryRecorder
 from habitat_baselines.rl.ddppo.algo import DDPPO
 from habitat_baselines.rl.ddppo.ddp_utils import (
     EXIT,
@@ -337,6 +339,9 @@ class PPOTrainer(BaseRLTrainer):
             discrete_actions=discrete_actions,
         )
         self.rollouts.to(self.device)
+        self.rollouts.recorder = TrajectoryRecorder.from_config(
+            self.config, get_distrib_size()[1]
+        )
 
         observations = self.envs.reset()
         batch = batch_obs(observations, device=self.device)
@@ -361,6 +366,14 @@ class PPOTrainer(BaseRLTrainer):
 
         self.env_time = 0.0
         self.pth_time = 0.0
+        # Time spent blocked waiting for the environments, and time between
+        # sending the actions to the environments and getting their results.
+        # With the double buffered sampler, the trainer computes the actions
+        # of one half of the environments while the other half steps, so it
+        # waits for less than the environments take to step.
+        self.env_wait_time = 0.0
+        self.env_in_flight_time = 0.0
+        self._env_step_start_times = [0.0 for _ in range(self._nbuffers)]
         self.t_start = time.time()
 
     @rank0_only
@@ -482,20 +495,19 @@ class PPOTrainer(BaseRLTrainer):
         profiling_wrapper.range_pop()  # compute actions
 
         t_step_env = time.time()
-
-        for index_env, act in zip(
-            range(env_slice.start, env_slice.stop), actions.cpu().unbind(0)
-        ):
-            if is_continuous_action_space(self.policy_action_space):
-                # Clipping actions to the specified limits
-                act = np.clip(
-                    act.numpy(),
-                    self.policy_action_space.low,
-                    self.policy_action_space.high,
-                )
-            else:
-                act = act.item()
-            self.envs.async_step_at(index_env, act)
+        self._env_step_start_times[buffer_index] = t_step_env
+
+        actions_np = actions.cpu().numpy()
+        if is_continuous_action_space(self.policy_action_space):
+            # Clipping actions to the specified limits
+            actions_np = np.clip(
+                actions_np,
+                self.policy_action_space.low,
+                self.policy_action_space.high,
+            )
+        self.envs.async_step_batch(
+            actions_np, range(env_slice.start, env_slice.stop)
+        )
 
         self.env_time += time.time() - t_step_env
 
@@ -515,16 +527,18 @@ class PPOTrainer(BaseRLTrainer):
         )
 
         t_step_env = time.time()
-        outputs = [
-            self.envs.wait_step_at(index_env)
-            for index_env in range(env_slice.start, env_slice.stop)
-        ]
+        outputs = self.envs.wait_all(range(env_slice.start, env_slice.stop))
 
         observations, rewards_l, dones, infos = [
             list(x) for x in zip(*outputs)
         ]
 
-        self.env_time += time.time() - t_step_env
+        t_envs_done = time.time()
+        self.env_time += t_envs_done - t_step_env
+        self.env_wait_time += t_envs_done - t_step_env
+        self.env_in_flight_time += (
+            t_envs_done - self._env_step_start_times[buffer_index]
+        )
 
         t_update_stats = time.time()
         batch = batch_obs(observations, device=self.device)
@@ -583,8 +597,25 @@ class PPOTrainer(BaseRLTrainer):
 
     @profiling_wrapper.RangeContext("_collect_rollout_step")
     def _collect_rollout_step(self):
-        self._compute_actions_and_step_envs()
-        return self._collect_environment_result()
+        r"""Collects one step of all the environments. :ref:`train` instead
+        pipelines the steps of the two halves of the environments when the
+        double buffered sampler is used.
+        """
+        for buffer_index in range(self._nbuffers):
+            self._compute_actions_and_step_envs(buffer_index)
+        return sum(
+            self._collect_environment_result(buffer_index)
+            for buffer_index in range(self._nbuffers)
+        )
+
+    @property
+    def env_overlap(self) -> float:
+        r"""Fraction of the time spent by the environments stepping during
+        which the trainer was doing something else than waiting for them.
+        """
+        if self.env_in_flight_time == 0:
+            return 0.0
+        return 1.0 - self.env_wait_time / self.env_in_flight_time
 
     @profiling_wrapper.RangeContext("_update_agent")
     def _update_agent(self):
@@ -603,7 +634,11 @@ class PPOTrainer(BaseRLTrainer):
             )
 
         self.rollouts.compute_returns(
-            next_value, ppo_cfg.use_gae, ppo_cfg.gamma, ppo_cfg.tau
+            next_value,
+            ppo_cfg.use_gae,
+            ppo_cfg.gamma,
+            ppo_cfg.tau,
+            method=ppo_cfg.returns_computation,
         )
 
         self.agent.train()
@@ -684,6 +719,9 @@ class PPOTrainer(BaseRLTrainer):
 
         fps = self.num_steps_done / ((time.time() - self.t_start) + prev_time)
         writer.add_scalar("perf/fps", fps, self.num_steps_done)
+        writer.add_scalar(
+            "perf/env_overlap", self.env_overlap, self.num_steps_done
+        )
 
         # log stats
         if (
@@ -699,10 +737,13 @@ class PPOTrainer(BaseRLTrainer):
 
             logger.info(
                 "update: {}\tenv-time: {:.3f}s\tpth-time: {:.3f}s\t"
+                "env-wait-time: {:.3f}s\tenv-overlap: {:.3f}\t"
                 "frames: {}".format(
                     self.num_updates_done,
                     self.env_time,
                     self.pth_time,
+                    self.env_wait_time,
+                    self.env_overlap,
                     self.num_steps_done,
                 )
             )
@@ -762,6 +803,10 @@ class PPOTrainer(BaseRLTrainer):
             requeue_stats = resume_state["requeue_stats"]
             self.env_time = requeue_stats["env_time"]
             self.pth_time = requeue_stats["pth_time"]
+            self.env_wait_time = requeue_stats.get("env_wait_time", 0.0)
+            self.env_in_flight_time = requeue_stats.get(
+                "env_in_flight_time", 0.0
+            )
             self.num_steps_done = requeue_stats["num_steps_done"]
             self.num_updates_done = requeue_stats["num_updates_done"]
             self._last_checkpoint_percent = requeue_stats[
@@ -799,6 +844,8 @@ class PPOTrainer(BaseRLTrainer):
                     requeue_stats = dict(
                         env_time=self.env_time,
                         pth_time=self.pth_time,
+                        env_wait_time=self.env_wait_time,
+                        env_in_flight_time=self.env_in_flight_time,
                         count_checkpoints=count_checkpoints,
                         num_steps_done=self.num_steps_done,
                         num_updates_done=self.num_updates_done,
@@ -823,6 +870,7 @@ class PPOTrainer(BaseRLTrainer):
                     profiling_wrapper.range_pop()  # train update
 
                     self.envs.close()
+                    self._close_recorder()
 
                     requeue_job()
 
@@ -893,6 +941,11 @@ class PPOTrainer(BaseRLTrainer):
                 profiling_wrapper.range_pop()  # train update
 
             self.envs.close()
+            self._close_recorder()
+
+    def _close_recorder(self):
+        if self.rollouts.recorder is not None:
+            self.rollouts.recorder.close()
 
     def _eval_checkpoint(
         self,
@@ -1026,12 +1079,11 @@ class PPOTrainer(BaseRLTrainer):
 
         pbar = tqdm.tqdm(total=number_of_eval_episodes * evals_per_ep)
         self.actor_critic.eval()
+        current_episodes_info = self.envs.current_episodes()
         while (
             len(stats_episodes) < (number_of_eval_episodes * evals_per_ep)
             and self.envs.num_envs > 0
         ):
-            current_episodes_info = self.envs.current_episodes()
-
             with inference_mode():
                 (
                     _,
@@ -1063,7 +1115,11 @@ class PPOTrainer(BaseRLTrainer):
             else:
                 step_data = [a.item() for a in actions.cpu()]
 
-            outputs = self.envs.step(step_data)
+            # Fetch the next episodes in the same round-trip as the step
+            outputs, call_results = self.envs.step_and_call(
+                step_data, [CURRENT_EPISODE_NAME]
+            )
+            next_episodes_info = [r[0] for r in call_results]
 
             observations, rewards_l, dones, infos = [
                 list(x) for x in zip(*outputs)
@@ -1084,7 +1140,6 @@ class PPOTrainer(BaseRLTrainer):
                 rewards_l, dtype=torch.float, device="cpu"
             ).unsqueeze(1)
             current_episode_reward += rewards
-            next_episodes_info = self.envs.current_episodes()
             envs_to_pause = []
             n_envs = self.envs.num_envs
             for i in range(n_envs):
@@ -1158,6 +1213,11 @@ class PPOTrainer(BaseRLTrainer):
                         )
 
             not_done_masks = not_done_masks.to(device=self.device)
+            current_episodes_info = [
+                info
+                for i, info in enumerate(next_episodes_info)
+                if i not in envs_to_pause
+            ]
             (
                 self.envs,
                 test_recurrent_hidden_states,
@@ -4,8 +4,14 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import multiprocessing
+import multiprocessing.queues
+import queue
+import time
 from typing import TYPE_CHECKING
 
+from habitat_baselines.rl.ver.ring_buffer_queue import RingBufferQueue
+
 try:
     import faster_fifo
 
@@ -14,6 +20,46 @@ except ImportError:
     use_faster_fifo = False
 
 
+class MultiprocessingBatchedQueue(multiprocessing.queues.Queue):
+    r"""Batched interface over a :py:`multiprocessing.Queue`, which gets and
+    puts the messages one by one. Only kept as a baseline, see
+    :ref:`RingBufferQueue` for the queue used without faster_fifo.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        # Like for RingBufferQueue, the semaphores of the spawn context can
+        # be used by processes of any start method.
+        super().__init__(maxsize, ctx=multiprocessing.get_context("spawn"))
+
+    def get_many(
+        self,
+        block=True,
+        timeout=10.0,
+        max_messages_to_get=1_000_000_000,
+    ):
+        msgs = [self.get(block, timeout)]
+        while len(msgs) < max_messages_to_get:
+            try:
+                msgs.append(self.get_nowait())
+            except queue.Empty:
+                break
+
+        return msgs
+
+    def put_many(self, xs, block=True, timeout=10.0):
+
+        t_start = time.perf_counter()
+        n_put = 0
+        for x in xs:
+            self.put(x, block, timeout - (t_start - time.perf_counter()))
+            n_put += 1
+
+        if n_put != len(xs):
+            raise RuntimeError(
+                f"Couldn't put all. Put {n_put}, needed to put {len(xs)}"
+            )
+
+
 if not TYPE_CHECKING and use_faster_fifo:
     # This package contains the implementation
     # for pickling FasterFifo with ForkingPickler,
@@ -22,42 +68,4 @@ if not TYPE_CHECKING and use_faster_fifo:
 
     BatchedQueue = faster_fifo.Queue
 else:
-    import queue
-    import time
-    import warnings
-
-    import torch
-
-    warnings.warn(
-        "Unable to import faster_fifo."
-        " Using the fallback. This may reduce performance."
-    )
-
-    class BatchedQueue(torch.multiprocessing.Queue):
-        def get_many(
-            self,
-            block=True,
-            timeout=10.0,
-            max_messages_to_get=1_000_000_000,
-        ):
-            msgs = [self.get(block, timeout)]
-            while len(msgs) < max_messages_to_get:
-                try:
-                    msgs.append(self.get_nowait())
-                except queue.Empty:
-                    break
-
-            return msgs
-
-        def put_many(self, xs, block=True, timeout=10.0):
-
-            t_start = time.perf_counter()
-            n_put = 0
-            for x in xs:
-                self.put(x, block, timeout - (t_start - time.perf_counter()))
-                n_put += 1
-
-            if n_put != len(xs):
-                raise RuntimeError(
-                    f"Couldn't put all. Put {n_put}, needed to put {len(xs)}"
-                )
+    BatchedQueue = RingBufferQueue
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import multiprocessing
+import pickle
+import queue
+import struct
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+_HEADER = struct.Struct("<I")
+# Indices of the counters in the shared state. Both positions only ever
+# increase, their difference is the number of bytes in use.
+_READ_POS = 0
+_WRITE_POS = 1
+_NUM_MESSAGES = 2
+
+
+class RingBufferQueue:
+    r"""Multi-producer multi-consumer queue of pickled messages, stored in a
+    ring buffer in shared memory. It has the same interface as
+    :py:`faster_fifo.Queue` and is used as the
+    :ref:`habitat_baselines.rl.ver.queue.BatchedQueue` when faster_fifo is
+    not installed.
+
+    Each message is stored as its length followed by its pickled bytes.
+    :ref:`put_many` and :ref:`get_many` write and read all of their messages
+    with a single acquisition of the lock, which is what makes them faster
+    than putting or getting the messages one by one.
+
+    The queue can be passed to processes when they are started, the ring
+    buffer is a shared memory tensor and the lock is a named semaphore.
+
+    :param max_size_bytes: Size of the ring buffer. A message, or all the
+        messages of a :ref:`put_many` call, must fit in it.
+    """
+
+    def __init__(self, max_size_bytes: int = 1024 * 1024):
+        self.max_size_bytes = max_size_bytes
+        self._buffer_t = torch.zeros(
+            (max_size_bytes,), dtype=torch.uint8
+        ).share_memory_()
+        self._state_t = torch.zeros((3,), dtype=torch.int64).share_memory_()
+
+        # Semaphores of the spawn context are named, so they can be used by
+        # processes of any start method.
+        mp_ctx = multiprocessing.get_context("spawn")
+        self._lock = mp_ctx.Lock()
+        self._not_empty = mp_ctx.Condition(self._lock)
+        self._not_full = mp_ctx.Condition(self._lock)
+
+        self._set_views()
+
+    def _set_views(self):
+        self._buffer: np.ndarray = self._buffer_t.numpy()
+        self._state: np.ndarray = self._state_t.numpy()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_buffer"]
+        del state["_state"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._set_views()
+
+    def _used_bytes(self) -> int:
+        return int(self._state[_WRITE_POS] - self._state[_READ_POS])
+
+    def _write(self, pos: int, data: bytes):
+        offset = pos % self.max_size_bytes
+        first = min(len(data), self.max_size_bytes - offset)
+        src = np.frombuffer(data, dtype=np.uint8)
+        self._buffer[offset : offset + first] = src[:first]
+        if first < len(data):
+            self._buffer[: len(data) - first] = src[first:]
+
+    def _read(self, pos: int, size: int) -> bytes:
+        offset = pos % self.max_size_bytes
+        first = min(size, self.max_size_bytes - offset)
+        if first == size:
+            return self._buffer[offset : offset + size].tobytes()
+        return (
+            self._buffer[offset:].tobytes()
+            + self._buffer[: size - first].tobytes()
+        )
+
+    @staticmethod
+    def _deadline(block: bool, timeout: Optional[float]) -> Optional[float]:
+        if not block:
+            return time.perf_counter()
+        if timeout is None:
+            return None
+        return time.perf_counter() + timeout
+
+    @staticmethod
+    def _wait(condition, deadline: Optional[float]) -> bool:
+        if deadline is None:
+            return condition.wait()
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        return condition.wait(remaining)
+
+    def put_many(
+        self, xs: List[Any], block: bool = True, timeout: float = 10.0
+    ):
+        r"""Puts all the messages of :p:`xs`, or none of them.
+
+        :raises queue.Full: If there isn't room for all the messages before
+            the timeout.
+        """
+        records = []
+        for x in xs:
+            data = pickle.dumps(x, protocol=pickle.HIGHEST_PROTOCOL)
+            records.append(_HEADER.pack(len(data)))
+            records.append(data)
+        # A single copy to the ring buffer for all the messages
+        packed = b"".join(records)
+        size = len(packed)
+        if size > self.max_size_bytes:
+            raise ValueError(
+                f"Messages of {size} bytes don't fit in a queue of"
+                f" {self.max_size_bytes} bytes"
+            )
+
+        deadline = self._deadline(block, timeout)
+        with self._lock:
+            while self.max_size_bytes - self._used_bytes() < size:
+                if not self._wait(self._not_full, deadline):
+                    raise queue.Full
+
+            pos = int(self._state[_WRITE_POS])
+            self._write(pos, packed)
+            self._state[_WRITE_POS] = pos + size
+            self._state[_NUM_MESSAGES] += len(xs)
+            self._not_empty.notify_all()
+
+    def put(self, x: Any, block: bool = True, timeout: float = 10.0):
+        self.put_many([x], block, timeout)
+
+    def put_nowait(self, x: Any):
+        self.put(x, block=False)
+
+    def get_many(
+        self,
+        block: bool = True,
+        timeout: float = 10.0,
+        max_messages_to_get: int = 1_000_000_000,
+    ) -> List[Any]:
+        r"""Gets up to :p:`max_messages_to_get` messages, waiting until
+        there is at least one.
+
+        :raises queue.Empty: If there are no messages before the timeout.
+        """
+        deadline = self._deadline(block, timeout)
+        with self._lock:
+            while self._state[_NUM_MESSAGES] == 0:
+                if not self._wait(self._not_empty, deadline):
+                    raise queue.Empty
+
+            num_messages = int(self._state[_NUM_MESSAGES])
+            read_pos = int(self._state[_READ_POS])
+            if num_messages <= max_messages_to_get:
+                # Take everything with a single copy out of the ring buffer
+                size = self._used_bytes()
+                packed = self._read(read_pos, size)
+            else:
+                num_messages = max_messages_to_get
+                size = 0
+                for _ in range(num_messages):
+                    (msg_size,) = _HEADER.unpack(
+                        self._read(read_pos + size, _HEADER.size)
+                    )
+                    size += _HEADER.size + msg_size
+                packed = self._read(read_pos, size)
+            self._state[_READ_POS] = read_pos + size
+            self._state[_NUM_MESSAGES] -= num_messages
+            self._not_full.notify_all()
+
+        # Unpickle outside of the lock so that other processes can use the
+        # queue in the meantime.
+        msgs = []
+        view = memoryview(packed)
+        offset = 0
+        for _ in range(num_messages):
+            (msg_size,) = _HEADER.unpack_from(view, offset)
+            offset += _HEADER.size
+            msgs.append(pickle.loads(view[offset : offset + msg_size]))
+            offset += msg_size
+        return msgs
+
+    def get(self, block: bool = True, timeout: float = 10.0) -> Any:
+        return self.get_many(block, timeout, max_messages_to_get=1)[0]
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        return int(self._state[_NUM_MESSAGES])
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        return self._used_bytes() >= self.max_size_bytes
+
+    def close(self):
+        pass
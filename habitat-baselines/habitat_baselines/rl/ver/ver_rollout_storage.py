@@ -4,12 +4,15 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 import torch
 
-from habitat_baselines.common.rollout_storage import RolloutStorage
+from habitat_baselines.common.rollout_storage import (
+    RolloutStorage,
+    _get_returns_fn,
+)
 from habitat_baselines.common.tensor_dict import DictTree, TensorDict
 from habitat_baselines.rl.models.rnn_state_encoder import (
     _np_invert_permutation,
@@ -66,6 +69,39 @@ def partition_n_into_p(n: int, p: int) -> List[int]:
     return [n // p + (1 if i < (n % p) else 0) for i in range(p)]
 
 
+def build_sequence_grid(
+    num_seqs_at_step: np.ndarray,
+    sequence_lengths: np.ndarray,
+    last_sequence_in_batch_mask: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    r"""Lays the steps of packed sequences (see
+    :ref:`build_pack_info_from_episode_ids`) out on a
+    :py:`(max_length, num_sequences)` grid, so that the steps of every
+    sequence can be scanned at once.
+
+    :return: The packed index of the step of each grid cell (the number
+        of packed steps for the cells past the end of their sequence), the
+        mask of the grid cells holding a step, and the mask of the grid
+        cells holding the bootstrap step of an environment, i.e. the last
+        step of its last sequence.
+    """
+    max_length = num_seqs_at_step.shape[0]
+    num_sequences = int(num_seqs_at_step[0])
+    step_offsets = np.cumsum(num_seqs_at_step) - num_seqs_at_step
+    seq_slots = np.arange(num_sequences)
+    is_valid = seq_slots[np.newaxis, :] < num_seqs_at_step[:, np.newaxis]
+    grid_inds = np.where(
+        is_valid,
+        step_offsets[:, np.newaxis] + seq_slots[np.newaxis, :],
+        int(num_seqs_at_step.sum()),
+    )
+    is_bootstrap = (
+        np.arange(max_length)[:, np.newaxis]
+        == (sequence_lengths - 1)[np.newaxis, :]
+    ) & last_sequence_in_batch_mask[np.newaxis, :]
+    return grid_inds, is_valid, is_bootstrap
+
+
 def generate_ver_mini_batches(
     num_mini_batch: int,
     sequence_lengths: np.ndarray,
@@ -438,10 +474,31 @@ class VERRolloutStorage(RolloutStorage):
         use_gae,
         gamma,
         tau,
+        method: str = "loop",
     ):
+        r"""Computes the returns of the steps of the current rollout. Stale
+        steps keep their previous return if they have one, and the last step
+        of every environment, which is only collected to bootstrap the
+        returns, gets a NaN return.
+
+        :param method: :py:`"loop"` computes the returns on the CPU, one
+            step of all sequences at a time. The other methods lay the
+            sequences out on a grid with :ref:`build_sequence_grid` and scan
+            all of them at once on the device of the storage, with the
+            corresponding method of :ref:`RolloutStorage.compute_returns`.
+            The results differ from :py:`"loop"` by floating point rounding.
+        """
         if not use_gae:
             tau = 1.0
 
+        if self.recorder is not None:
+            # The steps that get a new return, see below
+            assert isinstance(self.buffers["is_stale"], torch.Tensor)
+            assert isinstance(self.buffers["returns"], torch.Tensor)
+            unrecorded = torch.logical_not(self.buffers["is_stale"]) | (
+                torch.logical_not(torch.isfinite(self.buffers["returns"]))
+            )
+
         assert isinstance(self.buffers["masks"], torch.Tensor)
         not_masks = torch.logical_not(self.buffers["masks"]).to(
             device="cpu", non_blocking=True
@@ -467,6 +524,15 @@ class VERRolloutStorage(RolloutStorage):
         self.environment_ids_cpu = environment_ids_cpu_t.view(-1).numpy()
         self.step_ids_cpu = step_ids_cpu_t.view(-1).numpy()
 
+        if method != "loop":
+            self._compute_returns_segmented(
+                gamma, tau, _get_returns_fn(method)
+            )
+            self.current_rollout_step_idxs[0] = self.num_steps
+            if self.recorder is not None:
+                self._record_steps(unrecorded)
+            return
+
         assert isinstance(self.buffers["rewards"], torch.Tensor)
         rewards_t = self.buffers["rewards"].to(device="cpu", non_blocking=True)
         assert isinstance(self.buffers["returns"], torch.Tensor)
@@ -480,25 +546,7 @@ class VERRolloutStorage(RolloutStorage):
             device="cpu", non_blocking=True
         )
 
-        rnn_build_seq_info = build_pack_info_from_episode_ids(
-            self.episode_ids_cpu,
-            self.environment_ids_cpu,
-            self.step_ids_cpu,
-        )
-
-        (
-            self.select_inds,
-            self.num_seqs_at_step,
-            self.sequence_lengths,
-            self.sequence_starts,
-            self.last_sequence_in_batch_mask,
-        ) = (
-            rnn_build_seq_info["select_inds"],
-            rnn_build_seq_info["num_seqs_at_step"],
-            rnn_build_seq_info["sequence_lengths"],
-            rnn_build_seq_info["sequence_starts"],
-            rnn_build_seq_info["last_sequence_in_batch_mask"],
-        )
+        self._build_pack_info()
 
         if self.device.type == "cuda":
             torch.cuda.synchronize(self.device)
@@ -572,6 +620,109 @@ class VERRolloutStorage(RolloutStorage):
 
         self.buffers["returns"].copy_(returns_t, non_blocking=True)
         self.current_rollout_step_idxs[0] = self.num_steps
+        if self.recorder is not None:
+            self._record_steps(unrecorded)
+
+    def _record_steps(self, unrecorded: torch.Tensor) -> None:
+        # Every step is recorded once, when it gets its return. The last
+        # step of each environment only gets one in the next rollout.
+        assert self.recorder is not None
+        assert isinstance(self.buffers["returns"], torch.Tensor)
+        record_inds = torch.nonzero(
+            (unrecorded & torch.isfinite(self.buffers["returns"])).view(-1)
+        ).squeeze(-1)
+        self.recorder.record(
+            self.buffers.map(
+                lambda v: v.flatten(0, 1).index_select(0, record_inds)
+            )
+        )
+
+    def _build_pack_info(self):
+        rnn_build_seq_info = build_pack_info_from_episode_ids(
+            self.episode_ids_cpu,
+            self.environment_ids_cpu,
+            self.step_ids_cpu,
+        )
+
+        (
+            self.select_inds,
+            self.num_seqs_at_step,
+            self.sequence_lengths,
+            self.sequence_starts,
+            self.last_sequence_in_batch_mask,
+        ) = (
+            rnn_build_seq_info["select_inds"],
+            rnn_build_seq_info["num_seqs_at_step"],
+            rnn_build_seq_info["sequence_lengths"],
+            rnn_build_seq_info["sequence_starts"],
+            rnn_build_seq_info["last_sequence_in_batch_mask"],
+        )
+
+    def _compute_returns_segmented(
+        self,
+        gamma: float,
+        tau: float,
+        returns_fn: Callable[..., torch.Tensor],
+    ) -> None:
+        # Only the ids are needed on the CPU, to build the sequences. The
+        # rewards, values and returns stay on the device.
+        self._build_pack_info()
+        grid_inds, is_valid, is_bootstrap = build_sequence_grid(
+            self.num_seqs_at_step,
+            self.sequence_lengths,
+            self.last_sequence_in_batch_mask,
+        )
+        select_inds = torch.from_numpy(self.select_inds).to(self.device)
+        grid_inds_t = torch.from_numpy(grid_inds).to(self.device)
+        is_valid_t = torch.from_numpy(is_valid).to(self.device)
+        is_bootstrap_t = torch.from_numpy(is_bootstrap).to(self.device)
+
+        def to_grid(t: torch.Tensor) -> torch.Tensor:
+            # Packs the steps and pads the grid cells past the end of their
+            # sequence with zeros.
+            packed = t.view(-1, 1).index_select(0, select_inds)
+            packed = torch.cat([packed, packed.new_zeros((1, 1))], 0)
+            return packed[grid_inds_t]
+
+        assert isinstance(self.buffers["rewards"], torch.Tensor)
+        assert isinstance(self.buffers["value_preds"], torch.Tensor)
+        assert isinstance(self.buffers["returns"], torch.Tensor)
+        assert isinstance(self.buffers["is_stale"], torch.Tensor)
+        rewards = to_grid(self.buffers["rewards"])
+        values = to_grid(self.buffers["value_preds"])
+        next_values = torch.cat([values[1:], torch.zeros_like(values[:1])], 0)
+
+        # The value of the step after the end of a sequence is zero and the
+        # bootstrap steps have no advantage, so that the step before them
+        # bootstraps from their value.
+        deltas = rewards + gamma * next_values - values
+        deltas[is_bootstrap_t] = 0.0
+        advantages = returns_fn(
+            deltas,
+            torch.ones_like(deltas),
+            gamma * tau,
+            torch.zeros_like(deltas[0]),
+        )
+
+        # Keep the return of stale steps if they have one.
+        new_returns = (advantages + values)[is_valid_t]
+        returns = self.buffers["returns"].view(-1, 1)
+        old_returns = returns.index_select(0, select_inds)
+        use_new_value = torch.logical_not(
+            self.buffers["is_stale"].view(-1, 1).index_select(0, select_inds)
+        ) | torch.logical_not(torch.isfinite(old_returns))
+        new_returns = torch.where(use_new_value, new_returns, old_returns)
+        new_returns[is_bootstrap_t[is_valid_t]] = float("nan")
+        returns.index_copy_(0, select_inds, new_returns)
+
+        if not self.variable_experience:
+            assert torch.all(torch.isfinite(self.buffers["returns"][:-1])), (
+                self.buffers["returns"].squeeze().cpu()
+            )
+        else:
+            assert torch.isfinite(self.buffers["returns"]).long().sum() == (
+                self.num_steps * self._num_envs
+            ), (self.buffers["returns"].squeeze().cpu())
 
     def recurrent_generator(
         self,
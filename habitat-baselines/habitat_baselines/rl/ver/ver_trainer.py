@@ -19,6 +19,7 @@ from habitat import logger
 from habitat.config import read_write
 from habitat.utils import profiling_wrapper
 from habitat_baselines.common.baseline_registry import baseline_registry
+from habitat_baselines.common.trajectory_recorder import TrajectoryRecorder
 from habitat_baselines.rl.ddppo.ddp_utils import (
     EXIT,
     add_signal_handlers,
@@ -253,6 +254,11 @@ class VERTrainer(PPOTrainer):
             else:
                 self.learning_rollouts = self.rollouts
 
+            # Steps are recorded by the learner, once they have a return
+            self.learning_rollouts.recorder = TrajectoryRecorder.from_config(
+                self.config, get_distrib_size()[1]
+            )
+
             storage_kwargs["observation_space"] = actor_obs_space
             storage_kwargs["numsteps"] = 1
 
@@ -378,6 +384,7 @@ class VERTrainer(PPOTrainer):
                     ppo_cfg.use_gae,
                     ppo_cfg.gamma,
                     ppo_cfg.tau,
+                    method=ppo_cfg.returns_computation,
                 )
 
             compute_returns_time = time.perf_counter() - t_compute_returns
@@ -574,6 +581,8 @@ class VERTrainer(PPOTrainer):
 
         [w.close() for w in self._all_workers]
         [w.join() for w in self._all_workers]
+        if self.learning_rollouts.recorder is not None:
+            self.learning_rollouts.recorder.close()
 
         if self._is_distributed:
             torch.distributed.barrier()
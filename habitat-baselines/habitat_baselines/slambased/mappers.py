@@ -4,14 +4,13 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
-import numpy as np
 import torch
 from torch import nn as nn
 
 from habitat_baselines.slambased.reprojection import (
+    batch_reproject_local_to_global,
     get_map_size_in_cells,
     project2d_pcl_into_worldmap,
-    reproject_local_to_global,
 )
 
 
@@ -35,35 +34,83 @@ def depth2local3d(depth, fx, fy, cx, cy):
     )  # z
 
 
-def pcl_to_obstacles(pts3d, map_size=40, cell_size=0.2, min_pts=10):
-    r"""Counts number of 3d points in 2d map cell.
-    Height is sum-pooled.
+def batch_depth2local3d(depths, fx, fy, cx, cy):
+    r"""Projects depth maps of shape [b,h,w] to 3d point clouds
+    of shape [b,h*w,3] with origin in the camera focus
     """
-    device = pts3d.device
-    map_size_in_cells = get_map_size_in_cells(map_size, cell_size) - 1
-    init_map = torch.zeros(
-        (map_size_in_cells, map_size_in_cells), device=device
+    device = depths.device
+    b, h, w = depths.size()
+    x = torch.arange(w, dtype=torch.float32, device=device).view(1, 1, w)
+    y = torch.arange(h, dtype=torch.float32, device=device).view(1, h, 1)
+    return torch.stack(
+        [
+            depths * (x - cx) / fx,
+            depths * (y - cy) / fy,
+            depths,
+        ],
+        dim=3,
+    ).view(b, h * w, 3)
+
+
+def _count_points_in_cells(
+    data_idxs, batch_idxs, batch_size, map_size_in_cells
+):
+    r"""Histograms map cell indices of shape [n,2] into batch_size maps
+    with a single bincount over the linear cell indices.
+    Points outside of the map are ignored.
+    """
+    data_idxs = data_idxs.long()
+    in_map = ((data_idxs >= 0) & (data_idxs < map_size_in_cells)).all(dim=1)
+    linear_idxs = (
+        batch_idxs * map_size_in_cells + data_idxs[:, 0]
+    ) * map_size_in_cells + data_idxs[:, 1]
+    counts = torch.bincount(
+        linear_idxs[in_map], minlength=batch_size * map_size_in_cells**2
     )
-    if len(pts3d) <= 1:
-        return init_map
-    num_pts, dim = pts3d.size()
-    pts2d = torch.cat([pts3d[:, 2:3], pts3d[:, 0:1]], dim=1)
+    return counts.view(batch_size, map_size_in_cells, map_size_in_cells).to(
+        torch.float32
+    )
+
+
+def batch_pcl_to_obstacles(
+    pts3d, batch_idxs, batch_size, map_size=40, cell_size=0.2, min_pts=10
+):
+    r"""Counts number of 3d points in 2d map cell for the point clouds of
+    several maps at once. Point i belongs to map batch_idxs[i].
+    Returns maps of shape [batch_size,m,m], those with at most
+    min_pts points are empty.
+    """
+    map_size_in_cells = get_map_size_in_cells(map_size, cell_size) - 1
+    pts2d = torch.stack([pts3d[:, 2], pts3d[:, 0]], dim=1)
     data_idxs = torch.round(
         project2d_pcl_into_worldmap(pts2d, map_size, cell_size)
     )
-    if len(data_idxs) > min_pts:
-        u, counts = np.unique(
-            data_idxs.detach().cpu().numpy(), axis=0, return_counts=True
-        )
-        init_map[u[:, 0], u[:, 1]] = torch.from_numpy(counts).to(
-            dtype=torch.float32, device=device
-        )
-    return init_map
+    obstacle_maps = _count_points_in_cells(
+        data_idxs, batch_idxs, batch_size, map_size_in_cells
+    )
+    num_pts = torch.bincount(batch_idxs, minlength=batch_size)
+    obstacle_maps[num_pts <= min_pts] = 0
+    return obstacle_maps
+
+
+def pcl_to_obstacles(pts3d, map_size=40, cell_size=0.2, min_pts=10):
+    r"""Counts number of 3d points in 2d map cell.
+    Height is sum-pooled.
+    """
+    return batch_pcl_to_obstacles(
+        pts3d,
+        torch.zeros(len(pts3d), dtype=torch.int64, device=pts3d.device),
+        1,
+        map_size,
+        cell_size,
+        # Maps of a single point are empty too
+        max(min_pts, 1),
+    )[0]
 
 
 class DirectDepthMapper(nn.Module):
     r"""Estimates obstacle map given the depth image
-    ToDo: replace numpy histogram counting with differentiable
+    ToDo: replace histogram counting with differentiable
     pytorch soft count like in
     https://papers.nips.cc/paper/7545-unsupervised-learning-of-shape-and-pose-with-differentiable-point-clouds.pdf
     """
@@ -92,36 +139,44 @@ class DirectDepthMapper(nn.Module):
         return
 
     def forward(self, depth, pose=torch.eye(4).float()):  # noqa: B008
-        self.device = depth.device
+        return self.forward_batch(
+            depth.squeeze().unsqueeze(0), pose.view(1, 4, 4)
+        )[0]
+
+    def forward_batch(self, depths, poses):
+        r"""Estimates the obstacle maps of the depth images of shape [b,h,w]
+        taken from the poses of shape [b,4,4], e.g. of several environments,
+        at once
+        """
+        self.device = depths.device
+        batch_size, height, width = depths.size()
         # Works for FOV = 90 degrees
         # Should be adjusted, if FOV changed
-        self.fx = float(depth.size(1)) / 2.0
-        self.fy = float(depth.size(0)) / 2.0
+        self.fx = float(width) / 2.0
+        self.fy = float(height) / 2.0
         self.cx = int(self.fx) - 1
         self.cy = int(self.fy) - 1
-        pose = pose.to(self.device)
-        local_3d_pcl = depth2local3d(depth, self.fx, self.fy, self.cx, self.cy)
-        idxs = (torch.abs(local_3d_pcl[:, 2]) < self.far_th) * (
-            torch.abs(local_3d_pcl[:, 2]) >= self.near_th
+        poses = poses.to(self.device)
+        local_3d_pcl = batch_depth2local3d(
+            depths, self.fx, self.fy, self.cx, self.cy
         )
-        survived_points = local_3d_pcl[idxs]
-        if len(survived_points) < 20:
-            map_size_in_cells = (
-                get_map_size_in_cells(self.map_size_meters, self.map_cell_size)
-                - 1
-            )
-            init_map = torch.zeros(
-                (map_size_in_cells, map_size_in_cells), device=self.device
-            )
-            return init_map
-        global_3d_pcl = reproject_local_to_global(survived_points, pose)[:, :3]
+        depth_abs = torch.abs(local_3d_pcl[..., 2])
+        survived = (depth_abs < self.far_th) & (depth_abs >= self.near_th)
+        global_3d_pcl = batch_reproject_local_to_global(local_3d_pcl, poses)
         # Because originally y looks down and from agent camera height
-        global_3d_pcl[:, 1] = -global_3d_pcl[:, 1] + self.camera_height
-        idxs = (global_3d_pcl[:, 1] > self.h_min_th) * (
-            global_3d_pcl[:, 1] < self.h_max_th
+        heights = -global_3d_pcl[..., 1] + self.camera_height
+        idxs = (
+            survived
+            & (heights > self.h_min_th)
+            & (heights < self.h_max_th)
+            # Maps with too few points in range are empty
+            & (survived.sum(dim=1, keepdim=True) >= 20)
         )
-        global_3d_pcl = global_3d_pcl[idxs]
-        obstacle_map = pcl_to_obstacles(
-            global_3d_pcl, self.map_size_meters, self.map_cell_size
+        batch_idxs = torch.arange(batch_size, device=self.device)
+        return batch_pcl_to_obstacles(
+            global_3d_pcl[idxs],
+            batch_idxs.view(-1, 1).expand_as(idxs)[idxs],
+            batch_size,
+            self.map_size_meters,
+            self.map_cell_size,
         )
-        return obstacle_map
@@ -4,6 +4,8 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import heapq
+
 import numpy as np
 import torch
 from matplotlib import pyplot as plt
@@ -507,3 +509,221 @@ class DifferentiableStarPlanner(nn.Module):
             if count1 > 250:
                 break
         return out_path, cost
+
+
+# Offsets of the neighbours of a cell, in the order of the channels of
+# DifferentiableStarPlanner.calculate_local_path_costs
+NEIGHBOR_OFFSETS = [(k % 3 - 1, k // 3 - 1) for k in range(9)]
+
+
+class _GridDijkstra:
+    r"""Dijkstra's algorithm on an 8-connected grid, which can be resumed
+    for other goals and after the costs changed.
+
+    costs[k, y, x] is the cost of entering (y, x) from its neighbour k.
+    The grid is padded with a border of closed cells so that the search
+    loop doesn't need bounds checks.
+    """
+
+    def __init__(self, costs, start):
+        _, h, w = costs.shape
+        self.shape = (h + 2, w + 2)
+        self.start_index = start
+        self.start = self._to_padded_index(start, w)
+        self.steps = [
+            dy * self.shape[1] + dx
+            for k, (dy, dx) in enumerate(NEIGHBOR_OFFSETS)
+            if k != 4
+        ]
+        self._set_costs(costs)
+        self.dist = [np.inf] * (self.shape[0] * self.shape[1])
+        self.parent = [-1] * len(self.dist)
+        self.closed = bytearray(self._border().reshape(-1).tobytes())
+        self.dist[self.start] = 0.0
+        self.heap = [(0.0, self.start)]
+        # All the nodes closer than this to the start are closed
+        self.radius = 0.0
+
+    def _to_padded_index(self, idx, w):
+        return (idx // w + 1) * self.shape[1] + idx % w + 1
+
+    def to_index(self, padded_idx):
+        y, x = divmod(padded_idx, self.shape[1])
+        return y - 1, x - 1
+
+    def _shifted(self, dy, dx):
+        # The inner cells, shifted by (dy, dx)
+        return (
+            slice(1 + dy, self.shape[0] - 1 + dy),
+            slice(1 + dx, self.shape[1] - 1 + dx),
+        )
+
+    def _border(self):
+        border = np.ones(self.shape, dtype=np.bool_)
+        border[1:-1, 1:-1] = False
+        return border
+
+    def _set_costs(self, costs):
+        self.costs = costs
+        padded = np.full((9,) + self.shape, np.inf)
+        padded[:, 1:-1, 1:-1] = costs
+        self._costs_lists = [
+            padded[k].reshape(-1).tolist() for k in range(9) if k != 4
+        ]
+
+    def run_until(self, goal, w):
+        r"""Expands nodes until the goal is closed, returns its padded
+        index.
+        """
+        goal = self._to_padded_index(goal, w)
+        dist, parent, closed, heap = (
+            self.dist,
+            self.parent,
+            self.closed,
+            self.heap,
+        )
+        steps_and_costs = list(zip(self.steps, self._costs_lists))
+        while not closed[goal] and heap:
+            d, u = heapq.heappop(heap)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            self.radius = d
+            for step, costs in steps_and_costs:
+                # u is the neighbour of v at offset step
+                v = u - step
+                if closed[v]:
+                    continue
+                new_dist = d + costs[v]
+                if new_dist < dist[v]:
+                    dist[v] = new_dist
+                    parent[v] = u
+                    heapq.heappush(heap, (new_dist, v))
+        return goal
+
+    def update_costs(self, costs):
+        r"""Keeps the part of the search tree that can't be affected by the
+        new costs and restarts the search from its boundary.
+        """
+        changed = np.zeros(self.shape, dtype=np.bool_)
+        changed[1:-1, 1:-1] = (costs != self.costs).any(axis=0)
+        self._set_costs(costs)
+        if not changed.any():
+            return
+
+        dist = np.array(self.dist).reshape(self.shape)
+        closed = np.frombuffer(self.closed, dtype=np.bool_).reshape(self.shape)
+        # A path through a changed cost first reaches one of the neighbours
+        # of the changed cells. Nodes that are closer to the start than all
+        # of them keep their distance and their path to the start.
+        inner = (slice(1, -1), slice(1, -1))
+        sources = np.zeros_like(changed)
+        for dy, dx in NEIGHBOR_OFFSETS:
+            sources[inner] |= changed[self._shifted(dy, dx)]
+        min_dist = np.where(closed, dist, self.radius)[sources].min()
+        keep = closed & (dist < min_dist)
+        border = self._border()
+
+        # Relax the edges from the kept nodes to the other ones
+        new_dist = np.where(keep, dist, np.inf)
+        parent = np.where(keep, np.array(self.parent).reshape(self.shape), -1)
+        padded_costs = np.full((9,) + self.shape, np.inf)
+        padded_costs[:, 1:-1, 1:-1] = costs
+        indices = np.arange(dist.size).reshape(self.shape)
+        for k, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+            if k == 4:
+                continue
+            src = self._shifted(dy, dx)
+            cand = np.where(
+                keep[src], new_dist[src] + padded_costs[k][inner], np.inf
+            )
+            better = ~keep[inner] & (cand < new_dist[inner])
+            new_dist[inner][better] = cand[better]
+            parent[inner][better] = indices[src][better]
+
+        if not keep[np.unravel_index(self.start, self.shape)]:
+            new_dist[:] = np.inf
+            parent[:] = -1
+            new_dist.reshape(-1)[self.start] = 0.0
+        open_nodes = np.flatnonzero(np.isfinite(new_dist) & ~keep)
+        self.heap = list(
+            zip(new_dist.reshape(-1)[open_nodes].tolist(), open_nodes.tolist())
+        )
+        heapq.heapify(self.heap)
+        self.dist = new_dist.reshape(-1).tolist()
+        self.parent = parent.reshape(-1).tolist()
+        self.closed = bytearray((keep | border).reshape(-1).tobytes())
+        self.radius = min(self.radius, min_dist)
+
+    def path_to(self, goal):
+        path = [goal]
+        while path[-1] != self.start:
+            path.append(self.parent[path[-1]])
+        return path
+
+
+class DijkstraPlanner(DifferentiableStarPlanner):
+    r"""Non-differentiable drop-in replacement of
+    :ref:`DifferentiableStarPlanner` for evaluation. Runs Dijkstra's
+    algorithm with a binary heap over the same cost map, until the goal is
+    reached, and returns the path in the same format.
+
+    The search tree grows from the start and is kept between calls. When
+    the start stays the same, as the goal of the SLAM agents does, only
+    the nodes whose distance can be affected by the changes of the
+    obstacle map are searched again.
+    """
+
+    def __init__(self, **kwargs):
+        super(DijkstraPlanner, self).__init__(**kwargs)
+        self.reset()
+
+    def reset(self):
+        self._search = None
+
+    def forward(
+        self,
+        obstacles,
+        coords,
+        start_map,
+        goal_map,
+        non_obstacle_cost_map=None,
+        additional_steps=50,
+        return_path=True,
+    ):
+        with torch.no_grad():
+            self.obstacles = self.preprocess_obstacle_map(
+                obstacles.to(self.device)
+            )
+            self.coords = coords.to(self.device)
+            self.height = obstacles.size(2)
+            self.width = obstacles.size(3)
+            c_map = (
+                self.calculate_local_path_costs(non_obstacle_cost_map)[0]
+                .cpu()
+                .numpy()
+                .astype(np.float64)
+            )
+        start = int(torch.argmax(start_map.view(-1)).item())
+        goal = int(torch.argmax(goal_map.view(-1)).item())
+
+        if (
+            self._search is None
+            or self._search.costs.shape != c_map.shape
+            or self._search.start_index != start
+        ):
+            self._search = _GridDijkstra(c_map, start)
+        else:
+            self._search.update_costs(c_map)
+        padded_goal = self._search.run_until(goal, self.width)
+        if not return_path:
+            return None
+
+        out_path = [
+            torch.tensor(self._search.to_index(idx), dtype=torch.float32)
+            for idx in self._search.path_to(padded_goal)
+        ]
+        cost = torch.tensor(
+            [[self._search.dist[padded_goal]]], device=self.device
+        )
+        return out_path, cost
@@ -75,6 +75,17 @@ def reproject_local_to_global(xyz_local, p):
     return xyz_global.t()
 
 
+def batch_reproject_local_to_global(xyz_local, ps):
+    r"""Batched version of :ref:`reproject_local_to_global`, for point
+    clouds of shape [b,n,3] and poses of shape [b,4,4]
+    """
+    xyz = torch.cat(
+        [xyz_local, torch.ones_like(xyz_local[..., :1])],
+        dim=2,
+    )
+    return torch.bmm(xyz, ps.transpose(1, 2))
+
+
 def project2d_pcl_into_worldmap(zx, map_size, cell_size):
     device = zx.device
     shift = int(floor(get_map_size_in_cells(map_size, cell_size) / 2.0))
@@ -684,10 +684,44 @@ class EpisodeInfoMeasurementConfig(MeasurementConfig):
     type: str = "EpisodeInfo"
 
 
+@dataclass
+class GeodesicDistanceCacheConfig:
+    # Memoizes the distances computed by the measure, per scene and goal set.
+    # Distances are computed at the first position visited in each cell of
+    # size quantization and reused for the whole cell.
+    enabled: bool = False
+    max_entries: int = 100000
+    max_scenes: int = 4
+    quantization: float = 0.01
+    # Directory the cached distances are persisted to, None to keep them
+    # in memory only
+    cache_dir: Optional[str] = None
+
+
+@dataclass
+class GeodesicDistanceFieldConfig:
+    # Precomputes the distance to the goals over a grid of the navmesh, at
+    # the height of the episode start position, and interpolates it.
+    enabled: bool = False
+    resolution: float = 0.25
+    height_tolerance: float = 0.5
+    # Below this interpolated distance, the exact distance is computed, so
+    # that success is decided on exact distances
+    exact_distance_threshold: float = 1.0
+    max_fields: int = 16
+    cache_dir: Optional[str] = None
+
+
 @dataclass
 class DistanceToGoalMeasurementConfig(MeasurementConfig):
     type: str = "DistanceToGoal"
     distance_to: str = "POINT"
+    geodesic_cache: GeodesicDistanceCacheConfig = GeodesicDistanceCacheConfig()
+    distance_field: GeodesicDistanceFieldConfig = GeodesicDistanceFieldConfig()
+    # With distance_to VIEW_POINTS, compute the geodesic distance to the k
+    # view points closest in Euclidean distance first, then only to the
+    # ones that could still be closer. 0 to query all the view points.
+    view_points_prefilter_k: int = 0
 
 
 @dataclass
@@ -927,6 +961,9 @@ class SimulatorConfig(HabitatBaseConfig):
     requires_textures: bool = True
     lag_observations: int = 0
     auto_sleep: bool = False
+    # Directory the data RearrangeSim derives from the navmeshes (vertices,
+    # islands) is cached to, None to cache it next to the navmesh files
+    navmesh_cache_dir: Optional[str] = None
     step_physics: bool = True
     concur_render: bool = False
     # If markers should be updated at every step:
@@ -11,6 +11,7 @@ of a ``habitat.Agent`` inside ``habitat.Env``.
 import copy
 import os
 import random
+from collections import Counter
 from itertools import groupby
 from typing import (
     Any,
@@ -23,6 +24,7 @@ from typing import (
     Sequence,
     TypeVar,
     Union,
+    cast,
 )
 
 import attr
@@ -30,6 +32,7 @@ import numpy as np
 from numpy import ndarray
 
 from habitat.config import Config
+from habitat.core.episode_store import LazyEpisodes
 from habitat.core.utils import DatasetJSONEncoder, not_none_validator
 
 ALL_SCENES_MASK = "*"
@@ -133,6 +136,24 @@ class Dataset(Generic[T]):
         dataset = cls(config)  # type: ignore[call-arg]
         return list(map(cls.scene_from_scene_path, dataset.scene_ids))
 
+    @classmethod
+    def get_scene_episode_counts(cls, config: Config) -> Dict[str, int]:
+        r"""Returns the number of episodes of each scene name that would be
+        loaded with this dataset.
+
+        Useful for balancing the episodes between different workers.
+
+        :param config: The config for the dataset
+
+        :return: A dict from scene name to number of episodes
+        """
+        assert cls.check_config_paths_exist(config)  # type: ignore[attr-defined]
+        dataset = cls(config)  # type: ignore[call-arg]
+        counts: Dict[str, int] = Counter()
+        for scene_id, count in dataset.scene_episode_counts.items():
+            counts[cls.scene_from_scene_path(scene_id)] += count
+        return dict(counts)
+
     @classmethod
     def build_content_scenes_filter(cls, config) -> Callable[[T], bool]:
         r"""Returns a filter function that takes an episode and returns True if that
@@ -156,14 +177,27 @@ class Dataset(Generic[T]):
     @property
     def scene_ids(self) -> List[str]:
         r"""unique scene ids present in the dataset."""
+        if isinstance(self.episodes, LazyEpisodes):
+            return self.episodes.unique_scene_ids()
         return sorted({episode.scene_id for episode in self.episodes})
 
+    @property
+    def scene_episode_counts(self) -> Dict[str, int]:
+        r"""number of episodes of each scene id present in the dataset."""
+        if isinstance(self.episodes, LazyEpisodes):
+            scene_ids = self.episodes.scene_ids()
+        else:
+            scene_ids = [episode.scene_id for episode in self.episodes]
+        return dict(sorted(Counter(scene_ids).items()))
+
     def get_scene_episodes(self, scene_id: str) -> List[T]:
         r"""..
 
         :param scene_id: id of scene in scene dataset.
         :return: list of episodes for the :p:`scene_id`.
         """
+        if isinstance(self.episodes, LazyEpisodes):
+            return list(self.episodes.filter_scenes(lambda s: s == scene_id))
         return list(
             filter(lambda x: x.scene_id == scene_id, iter(self.episodes))
         )
@@ -299,12 +333,20 @@ class Dataset(Generic[T]):
         if collate_scene_ids:
             scene_ids: Dict[str, List[int]] = {}
             for rand_ind in rand_items:
-                scene = self.episodes[rand_ind].scene_id
+                scene = self._get_scene_id(rand_ind)
                 if scene not in scene_ids:
                     scene_ids[scene] = []
                 scene_ids[scene].append(rand_ind)
             rand_items = []
             list(map(rand_items.extend, scene_ids.values()))
+        if isinstance(self.episodes, LazyEpisodes):
+            return self._get_lazy_splits(
+                rand_items,
+                split_lengths,
+                remove_unused_episodes,
+                sort_by_episode_id,
+            )
+
         ep_ind = 0
         new_episodes = []
         for nn in range(num_splits):
@@ -321,6 +363,36 @@ class Dataset(Generic[T]):
             self.episodes = new_episodes
         return new_datasets
 
+    def _get_scene_id(self, index: int) -> str:
+        if isinstance(self.episodes, LazyEpisodes):
+            return self.episodes.scene_id(index)
+        return self.episodes[index].scene_id
+
+    def _get_lazy_splits(
+        self,
+        items: List[int],
+        split_lengths: List[int],
+        remove_unused_episodes: bool,
+        sort_by_episode_id: bool,
+    ) -> List["Dataset"]:
+        r"""Same as the end of :ref:`get_splits`, for :ref:`LazyEpisodes`.
+        Splits the episode indices so that no episode has to be built.
+        """
+        lazy_episodes = cast(LazyEpisodes, self.episodes)
+        new_datasets = []
+        ep_ind = 0
+        for split_length in split_lengths:
+            split_items = items[ep_ind : ep_ind + split_length]
+            ep_ind += split_length
+            if sort_by_episode_id:
+                split_items.sort(key=lazy_episodes.episode_id)
+            new_dataset = copy.copy(self)  # Creates a shallow copy
+            new_dataset.episodes = lazy_episodes.select(split_items)
+            new_datasets.append(new_dataset)
+        if remove_unused_episodes:
+            self.episodes = lazy_episodes.select(items[:ep_ind])
+        return new_datasets
+
 
 class EpisodeIterator(Iterator[T]):
     r"""Episode Iterator class that gives options for how a list of episodes
@@ -364,7 +436,9 @@ class EpisodeIterator(Iterator[T]):
     ) -> None:
         r"""..
 
-        :param episodes: list of episodes.
+        :param episodes: list of episodes. If it is a :ref:`LazyEpisodes`,
+            the iterator works on episode indices and only builds the
+            episodes it yields.
         :param cycle: if :py:`True`, cycle back to first episodes when
             StopIteration.
         :param shuffle: if :py:`True`, shuffle scene groups when cycle. No
@@ -387,6 +461,11 @@ class EpisodeIterator(Iterator[T]):
             random.seed(seed)
             np.random.seed(seed)
 
+        self._lazy_episodes: Optional[LazyEpisodes] = None
+        if isinstance(episodes, LazyEpisodes):
+            self._lazy_episodes = episodes
+            episodes = list(range(len(episodes)))  # type: ignore[arg-type]
+
         # sample episodes
         if num_episode_sample >= 0:
             episodes = np.random.choice(  # type: ignore[assignment]
@@ -441,23 +520,33 @@ class EpisodeIterator(Iterator[T]):
 
             next_episode = next(self._iterator)
 
+        next_scene_id = self._scene_id(next_episode)
         if (
-            self._prev_scene_id != next_episode.scene_id
+            self._prev_scene_id != next_scene_id
             and self._prev_scene_id is not None
         ):
             self._rep_count = 0
             self._step_count = 0
 
-        self._prev_scene_id = next_episode.scene_id
+        self._prev_scene_id = next_scene_id
+        if self._lazy_episodes is not None:
+            return self._lazy_episodes[next_episode]
         return next_episode
 
+    def _scene_id(self, episode: Any) -> str:
+        r"""Scene id of an item of :ref:`episodes`, which are episode
+        indices when iterating over :ref:`LazyEpisodes`.
+        """
+        if self._lazy_episodes is not None:
+            return self._lazy_episodes.scene_id(episode)
+        return episode.scene_id
+
     def _forced_scene_switch(self) -> None:
         r"""Internal method to switch the scene. Moves remaining episodes
         from current scene to the end and switch to next scene episodes.
         """
         grouped_episodes = [
-            list(g)
-            for k, g in groupby(self._iterator, key=lambda x: x.scene_id)
+            list(g) for k, g in groupby(self._iterator, key=self._scene_id)
         ]
 
         if len(grouped_episodes) > 1:
@@ -494,10 +583,11 @@ class EpisodeIterator(Iterator[T]):
 
         scene_sort_keys: Dict[str, int] = {}
         for e in episodes:
-            if e.scene_id not in scene_sort_keys:
-                scene_sort_keys[e.scene_id] = len(scene_sort_keys)
+            scene_id = self._scene_id(e)
+            if scene_id not in scene_sort_keys:
+                scene_sort_keys[scene_id] = len(scene_sort_keys)
 
-        return sorted(episodes, key=lambda e: scene_sort_keys[e.scene_id])  # type: ignore[arg-type]
+        return sorted(episodes, key=lambda e: scene_sort_keys[self._scene_id(e)])  # type: ignore[arg-type]
 
     def step_taken(self) -> None:
         self._step_count += 1
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+r"""Compact, columnar on-disk storage for episodes.
+
+An episode store is a directory holding the episodes of a dataset file in a
+format that can be memory-mapped: fixed-dtype NumPy arrays for the start
+positions and rotations, a scene table with a per-episode index into it and
+offset-indexed blobs for the episode ids and for the remaining, variable
+fields (stored as JSON). Datasets expose the episodes of a store as
+:ref:`LazyEpisodes`, which only build the :ref:`Episode` objects when they
+are accessed (for instance when :ref:`EpisodeIterator` yields them).
+
+Use ``python -m habitat.datasets.convert_to_episode_store`` to convert the
+``json.gz`` files of an existing dataset.
+"""
+
+import json
+import os
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
+
+EPISODE_STORE_EXT = ".episodes"
+EPISODE_STORE_VERSION = 1
+
+_META_FILE = "meta.json"
+# Columns stored as fixed-dtype arrays, with the length of each entry.
+_ARRAY_COLUMNS = {"start_position": 3, "start_rotation": 4}
+
+T = TypeVar("T")
+
+
+def is_episode_store(path: str) -> bool:
+    r"""Whether :p:`path` is an episode store directory."""
+    return os.path.isfile(os.path.join(path, _META_FILE))
+
+
+def episode_store_path(json_path: str) -> str:
+    r"""Path of the episode store corresponding to a ``.json.gz`` (or
+    ``.json``) dataset file.
+    """
+    for ext in (".json.gz", ".json"):
+        if json_path.endswith(ext):
+            return json_path[: -len(ext)] + EPISODE_STORE_EXT
+    return json_path + EPISODE_STORE_EXT
+
+
+def _write_strings(path: str, name: str, strings: Sequence[str]) -> None:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    np.save(os.path.join(path, f"{name}.offsets.npy"), offsets)
+    np.save(
+        os.path.join(path, f"{name}.blob.npy"),
+        np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    )
+
+
+def write_episode_store(
+    deserialized: Dict[str, Any], path: str
+) -> Dict[str, Any]:
+    r"""Writes the content of a deserialized dataset file to an episode
+    store.
+
+    :param deserialized: the dataset file as loaded by :py:`json.loads`.
+        Everything but the episodes is kept verbatim in the store metadata.
+    :param path: directory of the store, created if needed.
+    :return: the metadata of the store.
+    """
+    os.makedirs(path, exist_ok=True)
+    episodes: List[Dict[str, Any]] = deserialized["episodes"]
+
+    scenes: List[str] = []
+    scene_to_index: Dict[str, int] = {}
+    scene_index = np.empty(len(episodes), dtype=np.int32)
+    for i, episode in enumerate(episodes):
+        scene_id = episode["scene_id"]
+        if scene_id not in scene_to_index:
+            scene_to_index[scene_id] = len(scenes)
+            scenes.append(scene_id)
+        scene_index[i] = scene_to_index[scene_id]
+    np.save(os.path.join(path, "scene_index.npy"), scene_index)
+
+    array_columns = []
+    for name, size in _ARRAY_COLUMNS.items():
+        # Only store a column as an array if every episode has a value of
+        # the right size, otherwise keep it with the variable fields.
+        if not all(
+            isinstance(ep.get(name, None), (list, tuple))
+            and len(ep[name]) == size
+            for ep in episodes
+        ):
+            continue
+        np.save(
+            os.path.join(path, f"{name}.npy"),
+            np.array([ep[name] for ep in episodes], dtype=np.float64).reshape(
+                len(episodes), size
+            ),
+        )
+        array_columns.append(name)
+
+    _write_strings(
+        path, "episode_id", [str(ep["episode_id"]) for ep in episodes]
+    )
+    skipped = {"episode_id", "scene_id", *array_columns}
+    _write_strings(
+        path,
+        "extra",
+        [
+            json.dumps({k: v for k, v in ep.items() if k not in skipped})
+            for ep in episodes
+        ],
+    )
+
+    meta = {
+        "version": EPISODE_STORE_VERSION,
+        "num_episodes": len(episodes),
+        "scenes": scenes,
+        "array_columns": array_columns,
+        "episode_id_types": sorted(
+            {type(ep["episode_id"]).__name__ for ep in episodes}
+        ),
+        "dataset": {k: v for k, v in deserialized.items() if k != "episodes"},
+    }
+    with open(os.path.join(path, _META_FILE), "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+class _StringColumn:
+    def __init__(self, path: str, name: str):
+        self._offsets = np.load(
+            os.path.join(path, f"{name}.offsets.npy"), mmap_mode="r"
+        )
+        self._blob = np.load(
+            os.path.join(path, f"{name}.blob.npy"), mmap_mode="r"
+        )
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+
+class EpisodeStore:
+    r"""Read-only, memory-mapped view of an episode store. Nothing but the
+    metadata is read from disk until episodes are accessed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, _META_FILE), "r") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        if self.meta["version"] != EPISODE_STORE_VERSION:
+            raise ValueError(
+                f"Unsupported episode store version {self.meta['version']}"
+                f" in {path}, expected {EPISODE_STORE_VERSION}."
+            )
+        self._open()
+
+    def _open(self) -> None:
+        self.scene_index = np.load(
+            os.path.join(self.path, "scene_index.npy"), mmap_mode="r"
+        )
+        self._arrays = {
+            name: np.load(
+                os.path.join(self.path, f"{name}.npy"), mmap_mode="r"
+            )
+            for name in self.meta["array_columns"]
+        }
+        self._episode_ids = _StringColumn(self.path, "episode_id")
+        self._extra = _StringColumn(self.path, "extra")
+        # Episode ids are stored as strings, convert back ints if needed
+        self._int_episode_ids = self.meta["episode_id_types"] == ["int"]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Reopen the memory maps instead of copying their content
+        return {"path": self.path, "meta": self.meta}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self) -> int:
+        return self.meta["num_episodes"]
+
+    @property
+    def scenes(self) -> List[str]:
+        r"""Table of the scene ids of the store, :ref:`scene_index` indexes
+        into it.
+        """
+        return self.meta["scenes"]
+
+    @property
+    def dataset_fields(self) -> Dict[str, Any]:
+        r"""Top-level fields of the original dataset file, other than the
+        episodes.
+        """
+        return self.meta["dataset"]
+
+    def episode_id(self, index: int) -> Union[str, int]:
+        episode_id = self._episode_ids[index]
+        return int(episode_id) if self._int_episode_ids else episode_id
+
+    def episode_dict(self, index: int) -> Dict[str, Any]:
+        r"""Rebuilds the deserialized episode at :p:`index`, exactly as it
+        was in the original dataset file.
+        """
+        episode = json.loads(self._extra[index])
+        episode["episode_id"] = self.episode_id(index)
+        episode["scene_id"] = self.scenes[self.scene_index[index]]
+        for name, array in self._arrays.items():
+            episode[name] = array[index].tolist()
+        return episode
+
+
+class LazyEpisodes(Sequence[T], Generic[T]):
+    r"""Sequence of episodes backed by one or more :ref:`EpisodeStore`. An
+    episode object is only built when it is accessed, and a new one is built
+    on every access.
+
+    Scene ids can be queried without building episodes, which is all that is
+    needed to group, filter and split the episodes by scene.
+    """
+
+    def __init__(
+        self,
+        stores: List[EpisodeStore],
+        episode_fn: Callable[[Dict[str, Any], int], T],
+        scene_id_fn: Optional[Callable[[str], str]] = None,
+        store_indices: Optional[np.ndarray] = None,
+        rows: Optional[np.ndarray] = None,
+    ):
+        r"""..
+
+        :param stores: the stores holding the episodes.
+        :param episode_fn: builds an episode from its deserialized dict and
+            its index in its dataset file.
+        :param scene_id_fn: transformation applied to the scene ids of the
+            stores, it must match the one :p:`episode_fn` applies.
+        :param store_indices: store of every episode of the sequence,
+            defaults to all the episodes of all the stores.
+        :param rows: row of every episode in its store.
+        """
+        self.stores = stores
+        self.episode_fn = episode_fn
+        self.scene_id_fn = scene_id_fn
+        if store_indices is None or rows is None:
+            store_indices = np.concatenate(
+                [
+                    np.full(len(s), i, dtype=np.int32)
+                    for i, s in enumerate(stores)
+                ]
+                or [np.empty(0, dtype=np.int32)]
+            )
+            rows = np.concatenate(
+                [np.arange(len(s), dtype=np.int64) for s in stores]
+                or [np.empty(0, dtype=np.int64)]
+            )
+        self._store_indices = store_indices
+        self._rows = rows
+        self._scene_tables = [
+            [scene_id_fn(s) if scene_id_fn else s for s in store.scenes]
+            for store in stores
+        ]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return self.select(np.arange(len(self))[index])
+        store = self.stores[self._store_indices[index]]
+        row = int(self._rows[index])
+        return self.episode_fn(store.episode_dict(row), row)
+
+    def __iter__(self) -> Iterator[T]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def scene_id(self, index: int) -> str:
+        r"""Scene id of the episode at :p:`index`, without building it."""
+        store_index = self._store_indices[index]
+        store = self.stores[store_index]
+        return self._scene_tables[store_index][
+            store.scene_index[self._rows[index]]
+        ]
+
+    def episode_id(self, index: int) -> Union[str, int]:
+        r"""Episode id of the episode at :p:`index`, without building it."""
+        store = self.stores[self._store_indices[index]]
+        return store.episode_id(int(self._rows[index]))
+
+    def scene_ids(self) -> List[str]:
+        r"""Scene id of every episode, without building them."""
+        return [self.scene_id(i) for i in range(len(self))]
+
+    def unique_scene_ids(self) -> List[str]:
+        r"""Sorted unique scene ids of the episodes."""
+        scenes = set()
+        for store_index, table in enumerate(self._scene_tables):
+            mask = self._store_indices == store_index
+            if not np.any(mask):
+                continue
+            used = np.unique(
+                self.stores[store_index].scene_index[self._rows[mask]]
+            )
+            scenes.update(table[i] for i in used)
+        return sorted(scenes)
+
+    def select(
+        self, indices: Union[Sequence[int], np.ndarray]
+    ) -> "LazyEpisodes[T]":
+        r"""Subset of the episodes at :p:`indices` (or where the boolean
+        mask :p:`indices` is true), still lazy.
+        """
+        indices = np.asarray(indices)
+        if indices.dtype != np.bool_:
+            indices = indices.astype(np.int64)
+        return LazyEpisodes(
+            self.stores,
+            self.episode_fn,
+            self.scene_id_fn,
+            store_indices=self._store_indices[indices],
+            rows=self._rows[indices],
+        )
+
+    def filter_scenes(
+        self, filter_fn: Callable[[str], bool]
+    ) -> "LazyEpisodes[T]":
+        r"""Subset of the episodes whose scene id passes :p:`filter_fn`.
+        The filter is evaluated once per scene.
+        """
+        mask = np.zeros(len(self), dtype=np.bool_)
+        for store_index, table in enumerate(self._scene_tables):
+            keep = np.array([filter_fn(s) for s in table], dtype=np.bool_)
+            in_store = self._store_indices == store_index
+            if len(keep) == 0 or not np.any(in_store):
+                continue
+            rows = self._rows[in_store]
+            mask[in_store] = keep[self.stores[store_index].scene_index[rows]]
+        return self.select(mask)
+
+    def __add__(self, other: "LazyEpisodes[T]") -> "LazyEpisodes[T]":
+        r"""Concatenates two sequences built by the same dataset."""
+        assert isinstance(other, LazyEpisodes)
+        stores = list(self.stores)
+        other_store_indices = np.empty(len(other), dtype=np.int32)
+        for store_index, store in enumerate(other.stores):
+            if store not in stores:
+                stores.append(store)
+            other_store_indices[
+                other._store_indices == store_index
+            ] = stores.index(store)
+        return LazyEpisodes(
+            stores,
+            self.episode_fn,
+            self.scene_id_fn,
+            store_indices=np.concatenate(
+                [self._store_indices, other_store_indices]
+            ),
+            rows=np.concatenate([self._rows, other._rows]),
+        )
@@ -6,6 +6,7 @@
 
 import signal
 import warnings
+from multiprocessing import connection as mp_connection
 from multiprocessing.connection import Connection
 from multiprocessing.context import BaseContext
 from queue import Queue
@@ -41,6 +42,14 @@ from habitat.utils.pickle5_multiprocessing import (
     CloudpickleWrapper,
     ConnectionWrapper,
 )
+from habitat.utils.shared_memory import (
+    SharedActionBuffer,
+    SharedActionReader,
+    SharedObservationBuffers,
+    SharedObservationWriter,
+    action_from_row,
+    start_resource_tracker,
+)
 
 try:
     # Use torch.multiprocessing if we can.
@@ -60,6 +69,10 @@ RENDER_COMMAND = "render"
 CLOSE_COMMAND = "close"
 CALL_COMMAND = "call"
 COUNT_EPISODES_COMMAND = "count_episodes"
+SHARED_MEMORY_COMMAND = "shared_memory"
+SHARED_ACTIONS_COMMAND = "shared_actions"
+STEP_SHARED_ACTION_COMMAND = "step_shared_action"
+BATCH_COMMAND = "batch"
 
 EPISODE_OVER_NAME = "episode_over"
 GET_METRICS_NAME = "get_metrics"
@@ -85,14 +98,22 @@ def _make_env_fn(
     return habitat_env
 
 
+class _BatchResults(list):
+    r"""Results of a :py:`BATCH_COMMAND`, one per command of the batch."""
+
+
 @attr.s(auto_attribs=True, slots=True)
 class _ReadWrapper:
     r"""Convenience wrapper to track if a connection to a worker process
     should have something to read.
+
+    :property conn: the connection :ref:`read_fn` reads from, if it can be
+        polled with :py:`multiprocessing.connection.wait`.
     """
     read_fn: Callable[[], Any]
     rank: int
     is_waiting: bool = False
+    conn: Optional[Connection] = None
 
     def __call__(self) -> Any:
         if not self.is_waiting:
@@ -106,14 +127,33 @@ class _ReadWrapper:
         return res
 
 
+@attr.s(auto_attribs=True, slots=True)
+class _SharedMemoryReadFn:
+    r"""Read function that replaces the observations headers sent by a worker
+    using shared memory with views into its :ref:`SharedObservationBuffers`.
+    """
+    read_fn: Callable[[], Any]
+    buffers: SharedObservationBuffers
+
+    def __call__(self) -> Any:
+        result = self.read_fn()
+        if isinstance(result, _BatchResults):
+            return _BatchResults(self.buffers.restore(r) for r in result)
+        return self.buffers.restore(result)
+
+
 @attr.s(auto_attribs=True, slots=True)
 class _WriteWrapper:
     r"""Convenience wrapper to track if a connection to a worker process
     can be written to safely.  In other words, checks to make sure the
     result returned from the last write was read.
+
+    :property action_buffer: the buffer :ref:`VectorEnv.async_step_batch`
+        writes the actions of the worker into, once it has been attached.
     """
     write_fn: Callable[[Any], None]
     read_wrapper: _ReadWrapper
+    action_buffer: Optional[SharedActionBuffer] = None
 
     def __call__(self, data: Any) -> None:
         if self.read_wrapper.is_waiting:
@@ -151,6 +191,7 @@ class VectorEnv:
         auto_reset_done: bool = True,
         multiprocessing_start_method: str = "forkserver",
         workers_ignore_signals: bool = False,
+        use_shared_memory: bool = False,
     ) -> None:
         """..
 
@@ -168,8 +209,19 @@ class VectorEnv:
             used, the subproccess  must be started before any other GPU usage.
         :param workers_ignore_signals: Whether or not workers will ignore SIGINT and SIGTERM
             and instead will only exit when :ref:`close` is called
+        :param use_shared_memory: Whether workers write the fixed-shape
+            :ref:`spaces.Box` observations into preallocated shared-memory
+            buffers instead of sending them through the pipe. The
+            observations returned by :ref:`wait_step` and :ref:`reset` are
+            then zero-copy views which are only valid until the same env has
+            been stepped or reset twice more. The actions of
+            :ref:`async_step_batch` are also passed through shared memory.
         """
         self._is_closed = True
+        self._shared_memory_buffers: List[SharedObservationBuffers] = []
+        self._use_shared_memory = (
+            use_shared_memory and self._supports_shared_memory
+        )
 
         assert (
             env_fn_args is not None and len(env_fn_args) > 0
@@ -182,6 +234,8 @@ class VectorEnv:
         ).format(self._valid_start_methods, multiprocessing_start_method)
         self._auto_reset_done = auto_reset_done
         self._mp_ctx = mp.get_context(multiprocessing_start_method)
+        if use_shared_memory:
+            start_resource_tracker()
         self._workers = []
         (
             self._connection_read_fns,
@@ -218,6 +272,34 @@ class VectorEnv:
         ]
         self._paused: List[Tuple] = []
 
+        if use_shared_memory:
+            self._setup_shared_memory()
+
+    def _setup_shared_memory(self) -> None:
+        r"""Allocates the shared-memory observation buffers of every worker
+        and makes the workers write their observations into them.
+        """
+        if not self._supports_shared_memory:
+            logger.warn(
+                f"{type(self).__name__} does not support shared memory"
+                " observations, falling back to sending them through the pipe."
+            )
+            return
+
+        for index_env, obs_space in enumerate(self.observation_spaces):
+            buffers = SharedObservationBuffers(obs_space)
+            if not buffers.is_active:
+                continue
+            self._shared_memory_buffers.append(buffers)
+            self._connection_write_fns[index_env](
+                (SHARED_MEMORY_COMMAND, buffers.worker_args())
+            )
+            read_wrapper = self._connection_read_fns[index_env]
+            read_wrapper()
+            read_wrapper.read_fn = _SharedMemoryReadFn(
+                read_wrapper.read_fn, buffers
+            )
+
     @property
     def num_envs(self):
         r"""number of individual environments."""
@@ -246,44 +328,71 @@ class VectorEnv:
         env = EnvCountEpisodeWrapper(EnvObsDictWrapper(env_fn(*env_fn_args)))
         if parent_pipe is not None:
             parent_pipe.close()
-        try:
-            command, data = connection_read_fn()
-            while command != CLOSE_COMMAND:
-                if command == STEP_COMMAND:
-                    observations, reward, done, info = env.step(data)
-                    if auto_reset_done and done:
-                        observations = env.reset()
-                    with profiling_wrapper.RangeContext(
-                        "worker write after step"
-                    ):
-                        connection_write_fn((observations, reward, done, info))
-
-                elif command == RESET_COMMAND:
+        shared_memory_writer: Optional[SharedObservationWriter] = None
+        shared_action_reader: Optional[SharedActionReader] = None
+
+        def run_command(command: str, data: Any) -> Any:
+            nonlocal shared_memory_writer, shared_action_reader
+            if command == STEP_SHARED_ACTION_COMMAND:
+                assert shared_action_reader is not None
+                return run_command(STEP_COMMAND, shared_action_reader.read())
+
+            elif command == STEP_COMMAND:
+                observations, reward, done, info = env.step(data)
+                if auto_reset_done and done:
                     observations = env.reset()
-                    connection_write_fn(observations)
+                if shared_memory_writer is not None:
+                    observations = shared_memory_writer.write(observations)
+                return observations, reward, done, info
 
-                elif command == RENDER_COMMAND:
-                    connection_write_fn(env.render(*data[0], **data[1]))
+            elif command == RESET_COMMAND:
+                observations = env.reset()
+                if shared_memory_writer is not None:
+                    observations = shared_memory_writer.write(observations)
+                return observations
 
-                elif command == CALL_COMMAND:
-                    function_name, function_args = data
-                    if function_args is None:
-                        function_args = {}
+            elif command == RENDER_COMMAND:
+                return env.render(*data[0], **data[1])
 
-                    result_or_fn = getattr(env, function_name)
+            elif command == CALL_COMMAND:
+                function_name, function_args = data
+                if function_args is None:
+                    function_args = {}
 
-                    if len(function_args) > 0 or callable(result_or_fn):
-                        result = result_or_fn(**function_args)
-                    else:
-                        result = result_or_fn
+                result_or_fn = getattr(env, function_name)
 
-                    connection_write_fn(result)
+                if len(function_args) > 0 or callable(result_or_fn):
+                    return result_or_fn(**function_args)
+                else:
+                    return result_or_fn
 
-                elif command == COUNT_EPISODES_COMMAND:
-                    connection_write_fn(len(env.episodes))
+            elif command == COUNT_EPISODES_COMMAND:
+                return len(env.episodes)
 
-                else:
-                    raise NotImplementedError(f"Unknown command {command}")
+            elif command == BATCH_COMMAND:
+                return _BatchResults(run_command(*cmd) for cmd in data)
+
+            elif command == SHARED_MEMORY_COMMAND:
+                shared_memory_writer = SharedObservationWriter(*data)
+                return None
+
+            elif command == SHARED_ACTIONS_COMMAND:
+                if shared_action_reader is not None:
+                    shared_action_reader.close()
+                shared_action_reader = SharedActionReader(*data)
+                return None
+
+            else:
+                raise NotImplementedError(f"Unknown command {command}")
+
+        try:
+            command, data = connection_read_fn()
+            while command != CLOSE_COMMAND:
+                result = run_command(command, data)
+                with profiling_wrapper.RangeContext(
+                    f"worker write after {command}"
+                ):
+                    connection_write_fn(result)
 
                 with profiling_wrapper.RangeContext("worker wait for command"):
                     command, data = connection_read_fn()
@@ -293,6 +402,10 @@ class VectorEnv:
         finally:
             if child_pipe is not None:
                 child_pipe.close()
+            if shared_memory_writer is not None:
+                shared_memory_writer.close()
+            if shared_action_reader is not None:
+                shared_action_reader.close()
             env.close()
 
     def _spawn_workers(
@@ -330,7 +443,7 @@ class VectorEnv:
             worker_conn.close()
 
         read_fns = [
-            _ReadWrapper(p.recv, rank)
+            _ReadWrapper(p.recv, rank, conn=p.conn)
             for rank, p in enumerate(parent_connections)
         ]
         write_fns = [
@@ -340,49 +453,105 @@ class VectorEnv:
 
         return read_fns, write_fns
 
-    def current_episodes(self):
+    def _broadcast(self, command: str, data: Any = None) -> List[Any]:
+        r"""Sends the same command to all the envs and waits for the results.
+
+        :return: list of results, in the order of the envs.
+        """
         for write_fn in self._connection_write_fns:
-            write_fn((CALL_COMMAND, (CURRENT_EPISODE_NAME, None)))
-        results = []
-        for read_fn in self._connection_read_fns:
-            results.append(read_fn())
-        return results
+            write_fn((command, data))
+        return self.wait_all()
+
+    def current_episodes(self):
+        return self._broadcast(CALL_COMMAND, (CURRENT_EPISODE_NAME, None))
 
     def count_episodes(self):
-        for write_fn in self._connection_write_fns:
-            write_fn((COUNT_EPISODES_COMMAND, None))
-        results = []
-        for read_fn in self._connection_read_fns:
-            results.append(read_fn())
-        return results
+        return self._broadcast(COUNT_EPISODES_COMMAND)
 
     def episode_over(self):
-        for write_fn in self._connection_write_fns:
-            write_fn((CALL_COMMAND, (EPISODE_OVER_NAME, None)))
-        results = []
-        for read_fn in self._connection_read_fns:
-            results.append(read_fn())
-        return results
+        return self._broadcast(CALL_COMMAND, (EPISODE_OVER_NAME, None))
 
     def get_metrics(self):
-        for write_fn in self._connection_write_fns:
-            write_fn((CALL_COMMAND, (GET_METRICS_NAME, None)))
-        results = []
-        for read_fn in self._connection_read_fns:
-            results.append(read_fn())
-        return results
+        return self._broadcast(CALL_COMMAND, (GET_METRICS_NAME, None))
 
     def reset(self):
         r"""Reset all the vectorized environments
 
         :return: list of outputs from the reset method of envs.
         """
-        for write_fn in self._connection_write_fns:
-            write_fn((RESET_COMMAND, None))
-        results = []
-        for read_fn in self._connection_read_fns:
-            results.append(read_fn())
-        return results
+        return self._broadcast(RESET_COMMAND)
+
+    def wait_any(
+        self,
+        index_envs: Optional[Sequence[int]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Tuple[int, Any]]:
+        r"""Waits until at least one of the envs has a result ready and reads
+        the results of all the envs that are ready. This allows handling
+        results in completion order instead of having the slowest env (one
+        loading a new scene for instance) block all the others.
+
+        :param index_envs: envs to wait for, defaults to all the envs. Envs
+            that have nothing to read are ignored.
+        :param timeout: maximum number of seconds to wait for. Waits forever
+            if :py:`None`.
+        :return: list of :py:`(index_env, result)` for the envs whose result
+            was ready, empty if there was nothing to wait for or on timeout.
+        """
+        if index_envs is None:
+            index_envs = range(self.num_envs)
+        pending = [
+            index_env
+            for index_env in index_envs
+            if self._connection_read_fns[index_env].is_waiting
+        ]
+        if len(pending) == 0:
+            return []
+
+        conns = [self._connection_read_fns[i].conn for i in pending]
+        ready: List[int]
+        if any(conn is None for conn in conns):
+            # The connections can't be polled, fall back to reading in order
+            ready = pending[:1]
+        else:
+            ready_conns = set(mp_connection.wait(conns, timeout))
+            ready = [
+                index_env
+                for index_env, conn in zip(pending, conns)
+                if conn in ready_conns
+            ]
+
+        return [
+            (index_env, self._connection_read_fns[index_env]())
+            for index_env in ready
+        ]
+
+    def wait_all(
+        self, index_envs: Optional[Sequence[int]] = None
+    ) -> List[Any]:
+        r"""Waits for the results of all the given envs, reading them as
+        they complete.
+
+        :param index_envs: envs to wait for, defaults to all the envs. They
+            must all have something to read.
+        :return: list of results, in the order of :p:`index_envs`.
+        """
+        if index_envs is None:
+            index_envs = range(self.num_envs)
+        index_envs = list(index_envs)
+        for index_env in index_envs:
+            if not self._connection_read_fns[index_env].is_waiting:
+                raise RuntimeError(
+                    f"Tried to wait for process {index_env}"
+                    " but there is nothing waiting to be read"
+                )
+
+        results: Dict[int, Any] = {}
+        while len(results) < len(index_envs):
+            results.update(
+                self.wait_any([i for i in index_envs if i not in results])
+            )
+        return [results[index_env] for index_env in index_envs]
 
     def reset_at(self, index_env: int):
         r"""Reset in the index_env environment in the vector.
@@ -400,6 +569,61 @@ class VectorEnv:
         self._warn_cuda_tensors(action)
         self._connection_write_fns[index_env]((STEP_COMMAND, action))
 
+    def async_step_batch(
+        self,
+        actions: np.ndarray,
+        env_indices: Optional[Sequence[int]] = None,
+    ) -> None:
+        r"""Asynchronously steps the environments with a batch of actions,
+        wait for the results with :ref:`wait_all` or :ref:`wait_step`.
+
+        With shared memory, every row is copied into the shared action
+        buffer of its environment and only the step command goes through
+        the pipe. Otherwise the rows are sent through the pipe.
+
+        :param actions: one row of actions per environment, as a single
+            CPU array. Rows holding a single integer are passed to the
+            environments as a python :py:`int`, like discrete actions, other
+            rows as arrays.
+        :param env_indices: the environments to step, all of them if None.
+        """
+        if env_indices is None:
+            env_indices = range(self.num_envs)
+        actions = np.asarray(actions)
+        assert len(actions) == len(
+            env_indices
+        ), f"Got {len(actions)} actions for {len(env_indices)} environments"
+
+        if not self._use_shared_memory:
+            for index_env, row in zip(env_indices, actions):
+                self._connection_write_fns[index_env](
+                    (STEP_COMMAND, action_from_row(row))
+                )
+            return
+
+        for index_env, row in zip(env_indices, actions):
+            write_fn = self._connection_write_fns[index_env]
+            if write_fn.action_buffer is None or not (
+                write_fn.action_buffer.matches(row)
+            ):
+                self._attach_action_buffer(index_env, row)
+            assert write_fn.action_buffer is not None
+            write_fn.action_buffer.write(row)
+            write_fn((STEP_SHARED_ACTION_COMMAND, None))
+
+    def _attach_action_buffer(self, index_env: int, row: np.ndarray) -> None:
+        r"""Allocates a shared action buffer for the shape and dtype of
+        :p:`row` and waits for the worker to attach to it.
+        """
+        write_fn = self._connection_write_fns[index_env]
+        if write_fn.action_buffer is not None:
+            write_fn.action_buffer.close()
+            write_fn.action_buffer = None
+        action_buffer = SharedActionBuffer(row.shape, row.dtype)
+        write_fn((SHARED_ACTIONS_COMMAND, action_buffer.worker_args()))
+        self._connection_read_fns[index_env]()
+        write_fn.action_buffer = action_buffer
+
     @profiling_wrapper.RangeContext("wait_step_at")
     def wait_step_at(self, index_env: int) -> Any:
         return self._connection_read_fns[index_env]()
@@ -428,9 +652,7 @@ class VectorEnv:
     @profiling_wrapper.RangeContext("wait_step")
     def wait_step(self) -> List[Any]:
         r"""Wait until all the asynchronized environments have synchronized."""
-        return [
-            self.wait_step_at(index_env) for index_env in range(self.num_envs)
-        ]
+        return self.wait_all()
 
     def step(self, data: Sequence[Union[int, np.ndarray]]) -> List[Any]:
         r"""Perform actions in the vectorized environments.
@@ -443,6 +665,45 @@ class VectorEnv:
         self.async_step(data)
         return self.wait_step()
 
+    def _make_calls(
+        self,
+        function_names: List[str],
+        function_args_list: Optional[List[Any]] = None,
+    ) -> List[Tuple[str, Tuple[str, Any]]]:
+        if function_args_list is None:
+            function_args_list = [None] * len(function_names)
+        assert len(function_names) == len(function_args_list)
+        return [
+            (CALL_COMMAND, func_args)
+            for func_args in zip(function_names, function_args_list)
+        ]
+
+    def step_and_call(
+        self,
+        data: Sequence[Union[int, np.ndarray]],
+        function_names: List[str],
+        function_args_list: Optional[List[Any]] = None,
+    ) -> Tuple[List[Any], List[List[Any]]]:
+        r"""Performs actions in the vectorized environments and then calls
+        a list of functions on every env, using a single round-trip per env.
+
+        :param data: list of size _num_envs containing the actions, as for
+            :ref:`step`.
+        :param function_names: the name of the functions to call (or the
+            properties to retrieve) on every env after it stepped.
+        :param function_args_list: list of function args for each function.
+        :return: the list of outputs of the step method of the envs and, for
+            every env, the list of results of the functions.
+        """
+        calls = self._make_calls(function_names, function_args_list)
+        for index_env, act in enumerate(data):
+            self._warn_cuda_tensors(act)
+            self._connection_write_fns[index_env](
+                (BATCH_COMMAND, [(STEP_COMMAND, act)] + calls)
+            )
+        results = self.wait_all()
+        return [r[0] for r in results], [r[1:] for r in results]
+
     def close(self) -> None:
         if self._is_closed:
             return
@@ -463,6 +724,17 @@ class VectorEnv:
         for _, _, _, process in self._paused:
             process.join()
 
+        for buffers in self._shared_memory_buffers:
+            buffers.close()
+        self._shared_memory_buffers = []
+
+        for write_fn in self._connection_write_fns + [
+            write_fn for _, _, write_fn, _ in self._paused
+        ]:
+            if write_fn.action_buffer is not None:
+                write_fn.action_buffer.close()
+                write_fn.action_buffer = None
+
         self._is_closed = True
 
     def pause_at(self, index: int) -> None:
@@ -504,11 +776,28 @@ class VectorEnv:
         :param function_args: optional function args.
         :return: result of calling the function.
         """
+        self.async_call_at(index, function_name, function_args)
+        result = self._connection_read_fns[index]()
+        return result
+
+    def async_call_at(
+        self,
+        index: int,
+        function_name: str,
+        function_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        r"""Starts calling a function on the selected env without waiting for
+        the result, which is read with :ref:`wait_any` or :ref:`wait_all`.
+        This allows keeping all the envs busy with calls that take different
+        amounts of time.
+
+        :param index: which env to call the function on.
+        :param function_name: the name of the function to call or property to retrieve on the env.
+        :param function_args: optional function args.
+        """
         self._connection_write_fns[index](
             (CALL_COMMAND, (function_name, function_args))
         )
-        result = self._connection_read_fns[index]()
-        return result
 
     def call(
         self,
@@ -524,26 +813,37 @@ class VectorEnv:
             :py:`len(function_names)`.
         :return: result of calling the function.
         """
-        if function_args_list is None:
-            function_args_list = [None] * len(function_names)
-        assert len(function_names) == len(function_args_list)
-        func_args = zip(function_names, function_args_list)
-        for write_fn, func_args_on in zip(
-            self._connection_write_fns, func_args
-        ):
-            write_fn((CALL_COMMAND, func_args_on))
-        results = []
-        for read_fn in self._connection_read_fns:
-            results.append(read_fn())
-        return results
+        calls = self._make_calls(function_names, function_args_list)
+        for write_fn, call in zip(self._connection_write_fns, calls):
+            write_fn(call)
+        return self.wait_all()
+
+    def call_many(
+        self,
+        function_names: List[str],
+        function_args_list: Optional[List[Any]] = None,
+    ) -> List[List[Any]]:
+        r"""Calls all the given functions (which are passed by name) on every
+        env, sending a single message to each env.
+
+        :param function_names: the name of the functions to call (or the
+            properties to retrieve) on every env.
+        :param function_args_list: list of function args for each function.
+            If provided, :py:`len(function_args_list)` should be as long as
+            :py:`len(function_names)`.
+        :return: for every env, the list of results of the functions.
+        """
+        return self._broadcast(
+            BATCH_COMMAND, self._make_calls(function_names, function_args_list)
+        )
 
     def render(
         self, mode: str = "human", *args, **kwargs
     ) -> Optional[np.ndarray]:
         r"""Render observations from all environments in a tiled image."""
-        for write_fn in self._connection_write_fns:
-            write_fn((RENDER_COMMAND, (args, {"mode": "rgb_array", **kwargs})))
-        images = [read_fn() for read_fn in self._connection_read_fns]
+        images = self._broadcast(
+            RENDER_COMMAND, (args, {"mode": "rgb_array", **kwargs})
+        )
         tile = tile_images(images)
         if mode == "human":
             from habitat.core.utils import try_cv2_import
@@ -562,6 +862,10 @@ class VectorEnv:
     def _valid_start_methods(self) -> Set[str]:
         return {"forkserver", "spawn", "fork"}
 
+    @property
+    def _supports_shared_memory(self) -> bool:
+        return True
+
     def _warn_cuda_tensors(
         self,
         action: Union[int, np.ndarray, Dict[str, Any]],
@@ -600,6 +904,11 @@ class ThreadedVectorEnv(VectorEnv):
     performance.
     """
 
+    @property
+    def _supports_shared_memory(self) -> bool:
+        # Observations are never serialized between threads
+        return False
+
     def _spawn_workers(
         self,
         env_fn_args: Sequence[Tuple],
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Script to convert the `json.gz` files of a dataset to episode stores (see
+`habitat/core/episode_store.py`). Every `X.json.gz` file is converted to a
+`X.episodes` directory next to it, including the per-scene files of the
+`content` directory if there is one. For example:
+```
+python -m habitat.datasets.convert_to_episode_store data/datasets/objectnav/hm3d/v1/val/val.json.gz
+```
+Then load the converted dataset by pointing `habitat.dataset.data_path` to
+the store instead of the `json.gz` file:
+```
+habitat.dataset.data_path=data/datasets/objectnav/hm3d/v1/{split}/{split}.episodes
+```
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+from typing import List
+
+from habitat.core.episode_store import episode_store_path, write_episode_store
+
+
+def convert_dataset_file(path: str, overwrite: bool = False) -> str:
+    store_path = episode_store_path(path)
+    if os.path.exists(store_path) and not overwrite:
+        print("Skipping ", path, ", already converted")
+        return store_path
+
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt") as f:
+            deserialized = json.loads(f.read())
+    else:
+        with open(path, "r") as f:
+            deserialized = json.loads(f.read())
+
+    meta = write_episode_store(deserialized, store_path)
+    print(
+        "Converted ",
+        path,
+        f"({meta['num_episodes']} episodes, {len(meta['scenes'])} scenes)",
+    )
+    return store_path
+
+
+def convert_dataset(path: str, overwrite: bool = False) -> List[str]:
+    r"""Converts a dataset file and the per-scene files of its `content`
+    directory, if any.
+    """
+    converted = [convert_dataset_file(path, overwrite)]
+    content_dir = os.path.join(os.path.dirname(path), "content")
+    for content_path in sorted(
+        glob.glob(os.path.join(content_dir, "*.json.gz"))
+    ):
+        converted.append(convert_dataset_file(content_path, overwrite))
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        type=str,
+        help="Dataset files to convert, e.g. data/datasets/pointnav/habitat-test-scenes/v1/train/train.json.gz",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Convert files that already have an episode store.",
+    )
+    args = parser.parse_args()
+
+    for path in args.paths:
+        convert_dataset(path, args.overwrite)
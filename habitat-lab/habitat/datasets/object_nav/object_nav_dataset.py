@@ -5,20 +5,17 @@
 # LICENSE file in the root directory of this source tree.
 
 import json
-import os
 from typing import Any, Dict, List, Optional, Sequence
 
 from habitat.config import Config
+from habitat.core.episode_store import LazyEpisodes
 from habitat.core.registry import registry
 from habitat.core.simulator import AgentState, ShortestPathPoint
 from habitat.core.utils import DatasetFloatJSONEncoder
-from habitat.datasets.pointnav.pointnav_dataset import (
-    CONTENT_SCENES_PATH_FIELD,
-    DEFAULT_SCENE_PATH_PREFIX,
-    PointNavDatasetV1,
-)
+from habitat.datasets.pointnav.pointnav_dataset import PointNavDatasetV1
 from habitat.tasks.nav.object_nav_task import (
     ObjectGoal,
+    ObjectGoalList,
     ObjectGoalNavEpisode,
     ObjectViewLocation,
 )
@@ -72,7 +69,8 @@ class ObjectNavDatasetV1(PointNavDatasetV1):
     def __init__(self, config: Optional[Config] = None) -> None:
         self.goals_by_category = {}
         super().__init__(config)
-        self.episodes = list(self.episodes)
+        if not isinstance(self.episodes, LazyEpisodes):
+            self.episodes = list(self.episodes)
 
     @staticmethod
     def __deserialize_goal(serialized_goal: Dict[str, Any]) -> ObjectGoal:
@@ -85,12 +83,8 @@ class ObjectNavDatasetV1(PointNavDatasetV1):
 
         return g
 
-    def from_json(
-        self, json_str: str, scenes_dir: Optional[str] = None
-    ) -> None:
-        deserialized = json.loads(json_str)
-        if CONTENT_SCENES_PATH_FIELD in deserialized:
-            self.content_scenes_path = deserialized[CONTENT_SCENES_PATH_FIELD]
+    def _load_dataset_fields(self, deserialized: Dict[str, Any]) -> None:
+        super()._load_dataset_fields(deserialized)
 
         if "category_to_task_category_id" in deserialized:
             self.category_to_task_category_id = deserialized[
@@ -115,39 +109,59 @@ class ObjectNavDatasetV1(PointNavDatasetV1):
             self.category_to_scene_annotation_category_id.keys()
         ), "category_to_task and category_to_mp3d must have the same keys"
 
-        if len(deserialized["episodes"]) == 0:
-            return
+        for k, v in deserialized.get("goals_by_category", {}).items():
+            self.goals_by_category[k] = ObjectGoalList(
+                self.__deserialize_goal(g) for g in v
+            )
+
+    def _build_episode(  # type: ignore[override]
+        self,
+        episode: Dict[str, Any],
+        index: int,
+        scenes_dir: Optional[str] = None,
+    ) -> ObjectGoalNavEpisode:
+        nav_episode = ObjectGoalNavEpisode(**episode)
+        nav_episode.episode_id = str(index)
+        nav_episode.scene_id = self._scene_id_in_scenes_dir(
+            nav_episode.scene_id, scenes_dir
+        )
+
+        if len(nav_episode.goals) > 0:
+            # Episode stores converted from a dataset file without
+            # goals_by_category keep the goals in every episode
+            nav_episode.goals = ObjectGoalList(
+                self.__deserialize_goal(g) for g in nav_episode.goals  # type: ignore
+            )
+        else:
+            nav_episode.goals = self.goals_by_category[nav_episode.goals_key]
+
+        if nav_episode.shortest_paths is not None:
+            for path in nav_episode.shortest_paths:
+                for p_index, point in enumerate(path):
+                    if point is None or isinstance(point, (int, str)):
+                        point = {
+                            "action": point,
+                            "rotation": None,
+                            "position": None,
+                        }
+
+                    path[p_index] = ShortestPathPoint(**point)
+
+        return nav_episode
 
-        if "goals_by_category" not in deserialized:
+    def from_json(
+        self, json_str: str, scenes_dir: Optional[str] = None
+    ) -> None:
+        deserialized = json.loads(json_str)
+        if (
+            len(deserialized["episodes"]) > 0
+            and "goals_by_category" not in deserialized
+        ):
             deserialized = self.dedup_goals(deserialized)
 
-        for k, v in deserialized["goals_by_category"].items():
-            self.goals_by_category[k] = [self.__deserialize_goal(g) for g in v]
+        self._load_dataset_fields(deserialized)
 
         for i, episode in enumerate(deserialized["episodes"]):
-            episode = ObjectGoalNavEpisode(**episode)
-            episode.episode_id = str(i)
-
-            if scenes_dir is not None:
-                if episode.scene_id.startswith(DEFAULT_SCENE_PATH_PREFIX):
-                    episode.scene_id = episode.scene_id[
-                        len(DEFAULT_SCENE_PATH_PREFIX) :
-                    ]
-
-                episode.scene_id = os.path.join(scenes_dir, episode.scene_id)
-
-            episode.goals = self.goals_by_category[episode.goals_key]
-
-            if episode.shortest_paths is not None:
-                for path in episode.shortest_paths:
-                    for p_index, point in enumerate(path):
-                        if point is None or isinstance(point, (int, str)):
-                            point = {
-                                "action": point,
-                                "rotation": None,
-                                "position": None,
-                            }
-
-                        path[p_index] = ShortestPathPoint(**point)
-
-            self.episodes.append(episode)  # type: ignore [attr-defined]
+            self.episodes.append(  # type: ignore [attr-defined]
+                self._build_episode(episode, i, scenes_dir=scenes_dir)
+            )
@@ -7,11 +7,22 @@
 import gzip
 import json
 import os
-from typing import List, Optional
+from functools import partial
+from typing import Any, Dict, List, Optional
 
 from habitat.config import Config, read_write
 from habitat.core.dataset import ALL_SCENES_MASK, Dataset
+from habitat.core.episode_store import (
+    EpisodeStore,
+    LazyEpisodes,
+    episode_store_path,
+    is_episode_store,
+)
 from habitat.core.registry import registry
+from habitat.datasets.scene_index import (
+    SceneIndexedFile,
+    is_scene_indexed_file,
+)
 from habitat.tasks.nav.nav import (
     NavigationEpisode,
     NavigationGoal,
@@ -48,6 +59,16 @@ class PointNavDatasetV1(Dataset):
                 f"Could not find dataset file `{dataset_dir}`"
             )
 
+        datasetfile_path = config.data_path.format(split=config.split)
+        if is_scene_indexed_file(datasetfile_path):
+            # The scenes are listed in the header, no episode is loaded
+            return list(
+                map(
+                    cls.scene_from_scene_path,
+                    sorted(SceneIndexedFile(datasetfile_path).scene_ids),
+                )
+            )
+
         cfg = config.copy()
         with read_write(cfg):
             cfg.content_scenes = []
@@ -68,6 +89,26 @@ class PointNavDatasetV1(Dataset):
                 dataset = cls(cfg)
                 return list(map(cls.scene_from_scene_path, dataset.scene_ids))
 
+    @classmethod
+    def get_scene_episode_counts(cls, config: Config) -> Dict[str, int]:
+        r"""Returns the number of episodes of each scene name that would be
+        loaded with this dataset. Only reads the header of scene-indexed
+        files.
+        """
+        datasetfile_path = config.data_path.format(split=config.split)
+        if not is_scene_indexed_file(datasetfile_path):
+            return super().get_scene_episode_counts(config)
+
+        indexed_file = SceneIndexedFile(datasetfile_path)
+        scenes_to_load = set(config.content_scenes)
+        counts: Dict[str, int] = {}
+        for scene_id in sorted(indexed_file.scene_ids):
+            scene = cls.scene_from_scene_path(scene_id)
+            if ALL_SCENES_MASK in scenes_to_load or scene in scenes_to_load:
+                num_episodes = indexed_file.num_episodes(scene_id)
+                counts[scene] = counts.get(scene, 0) + num_episodes
+        return counts
+
     @staticmethod
     def _get_scenes_from_folder(
         content_scenes_path: str, dataset_dir: str
@@ -93,6 +134,13 @@ class PointNavDatasetV1(Dataset):
             return
 
         datasetfile_path = config.data_path.format(split=config.split)
+        if is_episode_store(datasetfile_path):
+            self._load_episode_stores(datasetfile_path, config)
+            return
+        if is_scene_indexed_file(datasetfile_path):
+            self._load_scene_indexed_file(datasetfile_path, config)
+            return
+
         with gzip.open(datasetfile_path, "rt") as f:
             self.from_json(f.read(), scenes_dir=config.scenes_dir)
 
@@ -123,28 +171,136 @@ class PointNavDatasetV1(Dataset):
                 filter(self.build_content_scenes_filter(config), self.episodes)
             )
 
-    def from_json(
-        self, json_str: str, scenes_dir: Optional[str] = None
+    def _load_episode_stores(
+        self, datasetfile_path: str, config: Config
     ) -> None:
-        deserialized = json.loads(json_str)
+        r"""Loads the episodes of a dataset converted with
+        :py:`habitat.datasets.convert_to_episode_store` as
+        :ref:`LazyEpisodes`, only the dataset level fields are parsed.
+        """
+        stores = [EpisodeStore(datasetfile_path)]
+        self._load_dataset_fields(stores[0].dataset_fields)
+        # The content files of a converted dataset are converted as well
+        self.content_scenes_path = episode_store_path(self.content_scenes_path)
+
+        dataset_dir = os.path.dirname(datasetfile_path)
+        has_individual_scene_files = os.path.exists(
+            self.content_scenes_path.split("{scene}")[0].format(
+                data_path=dataset_dir
+            )
+        )
+        if has_individual_scene_files:
+            scenes = config.content_scenes
+            if ALL_SCENES_MASK in scenes:
+                scenes = self._get_scenes_from_folder(
+                    content_scenes_path=self.content_scenes_path,
+                    dataset_dir=dataset_dir,
+                )
+
+            for scene in scenes:
+                store = EpisodeStore(
+                    self.content_scenes_path.format(
+                        data_path=dataset_dir, scene=scene
+                    )
+                )
+                self._load_dataset_fields(store.dataset_fields)
+                stores.append(store)
+
+        episodes: LazyEpisodes[NavigationEpisode] = LazyEpisodes(
+            stores,
+            partial(self._build_episode, scenes_dir=config.scenes_dir),
+            scene_id_fn=partial(
+                self._scene_id_in_scenes_dir, scenes_dir=config.scenes_dir
+            ),
+        )
+        if not has_individual_scene_files:
+            scenes_to_load = set(config.content_scenes)
+            if ALL_SCENES_MASK not in scenes_to_load:
+                episodes = episodes.filter_scenes(
+                    lambda s: self.scene_from_scene_path(s) in scenes_to_load
+                )
+        self.episodes = episodes  # type: ignore[assignment]
+
+    def _load_scene_indexed_file(
+        self, datasetfile_path: str, config: Config
+    ) -> None:
+        r"""Loads the episodes of the scenes in :py:`config.content_scenes`
+        from a file written by :ref:`write_scene_indexed_file`. The chunks of
+        the other scenes are neither read nor decompressed.
+        """
+        indexed_file = SceneIndexedFile(datasetfile_path)
+        self._load_dataset_fields(indexed_file.dataset_fields)
+
+        scenes_to_load = set(config.content_scenes)
+        indexed_episodes = []
+        for scene_id in indexed_file.scene_ids:
+            if (
+                ALL_SCENES_MASK not in scenes_to_load
+                and self.scene_from_scene_path(scene_id) not in scenes_to_load
+            ):
+                continue
+            scene_chunk = indexed_file.read_scene(scene_id)
+            self._load_dataset_fields(scene_chunk["dataset"])
+            indexed_episodes.extend(
+                zip(scene_chunk["indices"], scene_chunk["episodes"])
+            )
+
+        # Keep the order of the original dataset file
+        indexed_episodes.sort(key=lambda ie: ie[0])
+        self.episodes = [
+            self._build_episode(episode, i, scenes_dir=config.scenes_dir)
+            for i, episode in indexed_episodes
+        ]
+
+    def _load_dataset_fields(self, deserialized: Dict[str, Any]) -> None:
+        r"""Loads the dataset level fields of a deserialized dataset file,
+        i.e. everything but the episodes.
+        """
         if CONTENT_SCENES_PATH_FIELD in deserialized:
             self.content_scenes_path = deserialized[CONTENT_SCENES_PATH_FIELD]
 
-        for episode in deserialized["episodes"]:
-            episode = NavigationEpisode(**episode)
+    @staticmethod
+    def _scene_id_in_scenes_dir(
+        scene_id: str, scenes_dir: Optional[str] = None
+    ) -> str:
+        if scenes_dir is None:
+            return scene_id
+        if scene_id.startswith(DEFAULT_SCENE_PATH_PREFIX):
+            scene_id = scene_id[len(DEFAULT_SCENE_PATH_PREFIX) :]
+        return os.path.join(scenes_dir, scene_id)
+
+    def _build_episode(
+        self,
+        episode: Dict[str, Any],
+        index: int,
+        scenes_dir: Optional[str] = None,
+    ) -> NavigationEpisode:
+        r"""Builds an episode from its deserialized dict.
+
+        :param episode: the deserialized episode.
+        :param index: index of the episode in its dataset file.
+        :param scenes_dir: directory containing the scenes.
+        """
+        nav_episode = NavigationEpisode(**episode)
+        nav_episode.scene_id = self._scene_id_in_scenes_dir(
+            nav_episode.scene_id, scenes_dir
+        )
 
-            if scenes_dir is not None:
-                if episode.scene_id.startswith(DEFAULT_SCENE_PATH_PREFIX):
-                    episode.scene_id = episode.scene_id[
-                        len(DEFAULT_SCENE_PATH_PREFIX) :
-                    ]
+        for g_index, goal in enumerate(nav_episode.goals):
+            nav_episode.goals[g_index] = NavigationGoal(**goal)
+        if nav_episode.shortest_paths is not None:
+            for path in nav_episode.shortest_paths:
+                for p_index, point in enumerate(path):
+                    path[p_index] = ShortestPathPoint(**point)
+        return nav_episode
 
-                episode.scene_id = os.path.join(scenes_dir, episode.scene_id)
+    def from_json(
+        self, json_str: str, scenes_dir: Optional[str] = None
+    ) -> None:
+        deserialized = json.loads(json_str)
+        self._load_dataset_fields(deserialized)
 
-            for g_index, goal in enumerate(episode.goals):
-                episode.goals[g_index] = NavigationGoal(**goal)
-            if episode.shortest_paths is not None:
-                for path in episode.shortest_paths:
-                    for p_index, point in enumerate(path):
-                        path[p_index] = ShortestPathPoint(**point)
-            self.episodes.append(episode)
+        for i, episode in enumerate(deserialized["episodes"]):
+            self.episodes.append(
+                self._build_episode(episode, i, scenes_dir=scenes_dir)
+            )
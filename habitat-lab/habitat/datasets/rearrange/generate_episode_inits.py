@@ -4,34 +4,216 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+"""
+Fills the start state caches of the rearrange tasks for all the episodes of
+a dataset, so that training doesn't generate them lazily on reset. The
+episodes are split between a `VectorEnv` of `--num-workers` envs. The
+workers don't write to the caches: they return the start states they
+generated and the main process merges them into the caches. The episodes
+whose start states were merged are recorded, so an interrupted run can be
+resumed by running the same command again. For example:
+```
+python habitat/datasets/rearrange/generate_episode_inits.py --cfg-path benchmark/rearrange/pick.yaml --num-workers 8
+```
+"""
+
 import argparse
+import multiprocessing
+import os.path as osp
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
 
 from tqdm import tqdm
 
 import habitat
+from habitat.config import read_write
+from habitat.core.logging import logger
+from habitat.tasks.rearrange.utils import StartStateCache
+
+# Start states generated for an episode, as
+# {cache path: (legacy cache path, {key: start state})}
+EpisodeStartStates = Dict[str, Tuple[Optional[str], Dict[str, Any]]]
+
+
+class EpisodeInitEnv(habitat.Env):
+    """
+    Env generating the start states of given episodes, which are returned
+    instead of being saved to the caches.
+    """
+
+    def __init__(self, config, dataset=None):
+        with read_write(config):
+            config.habitat.task.should_save_to_cache = False
+        super().__init__(config=config, dataset=dataset)
+        self._episodes_by_id = {ep.episode_id: ep for ep in self.episodes}
+
+    def _pop_start_states(self) -> EpisodeStartStates:
+        return {
+            cache.cache_id: (cache.legacy_cache_file, cache.pop_unsaved())
+            for cache in vars(self.task).values()
+            if isinstance(cache, StartStateCache)
+        }
+
+    def generate_inits(
+        self, episode_ids: List[str]
+    ) -> List[Tuple[str, Optional[str], EpisodeStartStates]]:
+        """
+        Resets the env on each episode. Returns, for every episode, its
+        start states and the error that made it fail, if any.
+        """
+        results = []
+        for episode_id in episode_ids:
+            self.current_episode = self._episodes_by_id[episode_id]
+            error = None
+            try:
+                self.reset()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            results.append((episode_id, error, self._pop_start_states()))
+        return results
+
 
+def _progress_cache_path(config) -> str:
+    data_path = config.habitat.dataset.data_path.format(
+        split=config.habitat.dataset.split
+    )
+    fname = data_path.split("/")[-1].split(".")[0]
+    return osp.join(
+        osp.dirname(data_path),
+        f"{fname}_{config.habitat.task.type}_inits_done.db",
+    )
 
-def generate_inits(cfg_path, opts):
+
+def generate_inits(
+    cfg_path: str,
+    opts: Optional[List[str]] = None,
+    num_workers: int = 1,
+    episodes_per_call: int = 10,
+    max_episodes: Optional[int] = None,
+) -> List[str]:
+    """
+    Generates the start states of the episodes which don't have them yet
+    with `num_workers` envs. Returns the ids of the episodes that failed.
+    """
     config = habitat.get_config(cfg_path, opts)
-    with habitat.Env(config=config) as env:
-        for i in tqdm(range(env.number_of_episodes)):
-            if i % 100 == 0:
-                # Print the dataset we are generating initializations for. This
-                # is useful when this script runs for a long time and we don't
-                # know which dataset the job is for.
-                print(cfg_path, config.habitat.dataset.data_path)
-            env.reset()
-
-
-parser = argparse.ArgumentParser()
-parser.add_argument("--cfg-path", type=str, required=True)
-parser.add_argument(
-    "opts",
-    default=None,
-    nargs=argparse.REMAINDER,
-    help="Modify config options from command line",
-)
-args = parser.parse_args()
-
-
-generate_inits(args.cfg_path, args.opts)
+    dataset = habitat.make_dataset(
+        config.habitat.dataset.type, config=config.habitat.dataset
+    )
+    progress = StartStateCache(_progress_cache_path(config))
+    done = set(progress.keys())
+    episodes = dataset.episodes[:max_episodes]
+    # Consecutive episodes of the same scene go to the same worker
+    pending = sorted(
+        (ep for ep in episodes if ep.episode_id not in done),
+        key=lambda ep: ep.scene_id,
+    )
+    logger.info(
+        f"Generating the start states of {len(pending)} episodes,"
+        f" {len(episodes) - len(pending)} are already done"
+    )
+    if len(pending) == 0:
+        return []
+    chunks = [
+        [ep.episode_id for ep in pending[i : i + episodes_per_call]]
+        for i in range(0, len(pending), episodes_per_call)
+    ]
+
+    caches: Dict[str, StartStateCache] = {}
+    failed: List[str] = []
+
+    def merge(results) -> None:
+        start_states: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        generated: Dict[str, List[str]] = {}
+        for episode_id, error, episode_start_states in results:
+            if error is not None:
+                logger.warning(f"Episode {episode_id} failed: {error}")
+                failed.append(episode_id)
+                continue
+            generated[episode_id] = []
+            for cache_path, (
+                legacy_path,
+                values,
+            ) in episode_start_states.items():
+                if cache_path not in caches:
+                    caches[cache_path] = StartStateCache(
+                        cache_path, legacy_cache_file=legacy_path
+                    )
+                start_states[cache_path].update(values)
+                generated[episode_id].extend(values.keys())
+        for cache_path, values in start_states.items():
+            caches[cache_path].update(values)
+        # Only record the episodes once their start states are saved
+        progress.update(generated)
+
+    num_envs = min(num_workers, len(chunks))
+    with habitat.VectorEnv(
+        make_env_fn=EpisodeInitEnv,
+        env_fn_args=[(config,)] * num_envs,
+    ) as envs, tqdm(total=len(pending)) as pbar:
+        next_chunk = 0
+        for index_env in range(num_envs):
+            envs.async_call_at(
+                index_env,
+                "generate_inits",
+                {"episode_ids": chunks[next_chunk]},
+            )
+            next_chunk += 1
+        num_busy = num_envs
+        while num_busy > 0:
+            for index_env, results in envs.wait_any():
+                merge(results)
+                pbar.update(len(results))
+                pbar.set_postfix(failed=len(failed))
+                if next_chunk < len(chunks):
+                    envs.async_call_at(
+                        index_env,
+                        "generate_inits",
+                        {"episode_ids": chunks[next_chunk]},
+                    )
+                    next_chunk += 1
+                else:
+                    num_busy -= 1
+
+    if len(failed) > 0:
+        logger.warning(
+            f"{len(failed)} episodes failed and will be retried on the next run: {failed}"
+        )
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cfg-path", type=str, required=True)
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="The number of envs generating start states.",
+    )
+    parser.add_argument(
+        "--episodes-per-call",
+        type=int,
+        default=10,
+        help="The number of episodes sent to a worker at once.",
+    )
+    parser.add_argument(
+        "--max-episodes",
+        type=int,
+        default=None,
+        help="Only generate the start states of the first episodes of the dataset.",
+    )
+    parser.add_argument(
+        "opts",
+        default=None,
+        nargs=argparse.REMAINDER,
+        help="Modify config options from command line",
+    )
+    args = parser.parse_args()
+
+    generate_inits(
+        args.cfg_path,
+        args.opts,
+        num_workers=args.num_workers,
+        episodes_per_call=args.episodes_per_call,
+        max_episodes=args.max_episodes,
+    )
@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 
 import json
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import attr
 import numpy as np
@@ -66,13 +66,30 @@ class RearrangeDatasetV0(PointNavDatasetV1):
 
         super().__init__(config)
 
+    def _load_dataset_fields(self, deserialized: Dict[str, Any]) -> None:
+        pass
+
+    @staticmethod
+    def _scene_id_in_scenes_dir(
+        scene_id: str, scenes_dir: Optional[str] = None
+    ) -> str:
+        # Rearrange scene ids are scene dataset handles, not paths
+        return scene_id
+
+    def _build_episode(  # type: ignore[override]
+        self,
+        episode: Dict[str, Any],
+        index: int,
+        scenes_dir: Optional[str] = None,
+    ) -> RearrangeEpisode:
+        rearrangement_episode = RearrangeEpisode(**episode)
+        rearrangement_episode.episode_id = str(index)
+        return rearrangement_episode
+
     def from_json(
         self, json_str: str, scenes_dir: Optional[str] = None
     ) -> None:
         deserialized = json.loads(json_str)
 
         for i, episode in enumerate(deserialized["episodes"]):
-            rearrangement_episode = RearrangeEpisode(**episode)
-            rearrangement_episode.episode_id = str(i)
-
-            self.episodes.append(rearrangement_episode)
+            self.episodes.append(self._build_episode(episode, i))
@@ -25,6 +25,7 @@ from habitat.datasets.rearrange.samplers.receptacle import (
     find_receptacles,
 )
 from habitat.sims.habitat_simulator.debug_visualizer import DebugVisualizer
+from habitat.tasks.rearrange.utils import NavmeshArtifacts
 from habitat.utils.common import cull_string_list_by_substrings
 
 
@@ -77,6 +78,8 @@ class RearrangeEpisodeGenerator:
 
         # hold a habitat Simulator object for efficient re-use
         self.sim: habitat_sim.Simulator = None
+        # navmesh path -> navmesh vertices and islands, computed once per scene
+        self._navmesh_artifacts: Dict[str, NavmeshArtifacts] = {}
         # initialize an empty scene and load the SceneDataset
         self.initialize_sim("NONE", self.cfg.dataset_path)
 
@@ -91,6 +94,8 @@ class RearrangeEpisodeGenerator:
             habitat_sim.physics.ManagedRigidObject
         ] = []
         self.num_ep_generated = 0
+        # seconds of physics simulated by settle_sim for each episode
+        self.settle_times: List[float] = []
 
     def _get_resource_sets(self) -> None:
         """
@@ -372,6 +377,23 @@ class RearrangeEpisodeGenerator:
         for sampler in self._obj_samplers.values():
             sampler.reset()
 
+    def _set_navmesh_artifacts(self, navmesh_path: str) -> None:
+        """
+        Share the artifacts of the loaded navmesh with all the samplers. They are computed the first time the navmesh is loaded, or read from its cache file.
+        """
+        if navmesh_path not in self._navmesh_artifacts:
+            self._navmesh_artifacts[
+                navmesh_path
+            ] = NavmeshArtifacts.load_or_compute(
+                self.sim.pathfinder, navmesh_path
+            )
+        artifacts = self._navmesh_artifacts[navmesh_path]
+        for sampler in [
+            *self._obj_samplers.values(),
+            *self._target_samplers.values(),
+        ]:
+            sampler.navmesh_artifacts = artifacts
+
     def generate_scene(self) -> str:
         """
         Sample a new scene and re-initialize the Simulator.
@@ -433,6 +455,7 @@ class RearrangeEpisodeGenerator:
         logger.info(
             f"Generated {num_episodes} episodes in {num_episodes+failed_episodes} tries."
         )
+        logger.info(f"Settle time statistics: {self.get_settle_stats()}")
 
         return generated_episodes
 
@@ -463,6 +486,7 @@ class RearrangeEpisodeGenerator:
         self.sim.pathfinder.load_nav_mesh(navmesh_path)
 
         self._get_object_target_samplers()
+        self._set_navmesh_artifacts(navmesh_path)
         target_numbers = {
             k: sampler.target_objects_number
             for k, sampler in self._target_samplers.items()
@@ -785,49 +809,98 @@ class RearrangeEpisodeGenerator:
             self.sim, output_path="rearrange_ep_gen_output/"
         )
 
+    def _get_sampled_object_positions(self) -> np.ndarray:
+        """
+        Return the positions of the objects sampled for the episode as an (N, 3) array.
+        """
+        return np.array(
+            [np.array(obj.translation) for obj in self.ep_sampled_objects],
+            dtype=np.float64,
+        )
+
+    def get_settle_stats(self) -> Dict[str, float]:
+        """
+        Return statistics of the seconds of physics simulated by settle_sim over the generated episodes.
+        """
+        if len(self.settle_times) == 0:
+            return {}
+        settle_times = np.array(self.settle_times)
+        return {
+            "num_settles": len(settle_times),
+            "mean_settle_time": float(settle_times.mean()),
+            "max_settle_time": float(settle_times.max()),
+            "total_settle_time": float(settle_times.sum()),
+        }
+
     def settle_sim(
-        self, duration: float = 5.0, make_video: bool = True
+        self, duration: Optional[float] = None, make_video: bool = True
     ) -> bool:
         """
         Run dynamics for a few seconds to check for stability of newly placed objects and optionally produce a video.
+        In the "adaptive" settle_mode, the dynamics stop early once all objects are at rest or once an object is unstable.
         Returns whether or not the simulation was stable.
         """
         if len(self.ep_sampled_objects) == 0:
             return True
         # assert len(self.ep_sampled_objects) > 0
+        if duration is None:
+            duration = self.cfg.settle_duration
+        adaptive = self.cfg.settle_mode == "adaptive"
+        error_eps = self.cfg.settle_max_displacement
+        dt = 1.0 / 30.0
 
-        scene_bb = (
-            self.sim.get_active_scene_graph().get_root_node().cumulative_bb
-        )
-        new_obj_centroid = mn.Vector3()
-        spawn_positions = {}
-        for new_object in self.ep_sampled_objects:
-            spawn_positions[new_object.handle] = new_object.translation
-            new_obj_centroid += new_object.translation
-        new_obj_centroid /= len(self.ep_sampled_objects)
+        spawn_positions = self._get_sampled_object_positions()
         settle_db_obs: List[Any] = []
         if self._render_debug_obs:
+            scene_bb = (
+                self.sim.get_active_scene_graph().get_root_node().cumulative_bb
+            )
             self.vdb.get_observation(
-                look_at=new_obj_centroid,
+                look_at=mn.Vector3(spawn_positions.mean(axis=0)),
                 look_from=scene_bb.center(),
                 obs_cache=settle_db_obs,
             )
 
+        start_time = self.sim.get_world_time()
+        positions = spawn_positions
+        rest_time = 0.0
         while self.sim.get_world_time() < duration:
-            self.sim.step_world(1.0 / 30.0)
+            self.sim.step_world(dt)
             if self._render_debug_obs:
                 self.vdb.get_observation(obs_cache=settle_db_obs)
+            if not adaptive:
+                continue
+            prev_positions = positions
+            positions = self._get_sampled_object_positions()
+            if (
+                np.linalg.norm(positions - spawn_positions, axis=1).max()
+                > error_eps
+            ):
+                # already unstable, no need to simulate further
+                break
+            speeds = np.linalg.norm(positions - prev_positions, axis=1) / dt
+            rest_time = (
+                rest_time + dt
+                if speeds.max() < self.cfg.settle_rest_velocity
+                else 0.0
+            )
+            if rest_time >= self.cfg.settle_rest_time:
+                break
+        settle_time = self.sim.get_world_time() - start_time
+        self.settle_times.append(settle_time)
 
         # check stability of placements
-        logger.info("Computing placement stability report:")
-        max_settle_displacement = 0
-        error_eps = 0.1
+        logger.info(
+            f"Computing placement stability report after settling for {settle_time} seconds:"
+        )
+        settle_displacements = np.linalg.norm(
+            self._get_sampled_object_positions() - spawn_positions, axis=1
+        )
+        max_settle_displacement = float(settle_displacements.max())
         unstable_placements = []
-        for new_object in self.ep_sampled_objects:
-            error = (
-                spawn_positions[new_object.handle] - new_object.translation
-            ).length()
-            max_settle_displacement = max(max_settle_displacement, error)
+        for new_object, error in zip(
+            self.ep_sampled_objects, settle_displacements
+        ):
             if error > error_eps:
                 unstable_placements.append(new_object.handle)
                 logger.info(
@@ -171,6 +171,20 @@ def get_config_defaults() -> CN:
         # countertop (only need to sample for the drawer the object is in)
     ]
 
+    # ----- physics settling parameters ------
+    # After placing the objects, dynamics are simulated to reject episodes with unstable placements.
+    # "fixed" simulates for the full settle_duration.
+    # "adaptive" stops once all objects rested for settle_rest_time or as soon as one object is unstable.
+    _C.settle_mode = "fixed"
+    # the maximum number of seconds of simulation
+    _C.settle_duration = 5.0
+    # objects moving further than this from their placement are unstable
+    _C.settle_max_displacement = 0.1
+    # objects moving slower than this (units/second) are at rest (adaptive only)
+    _C.settle_rest_velocity = 0.01
+    # the number of seconds all objects must be at rest to stop (adaptive only)
+    _C.settle_rest_time = 0.5
+
     # ----- marker definitions ------
     # A marker defines a point in the local space of a rigid object or articulated link which can be registered to instances in a scene and tracked
     # Format for each marker is a dict containing:
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Runs the RearrangeEpisodeGenerator in a pool of processes. The episodes are
+split into jobs by scene and seed. Every job streams its episodes to its own
+shard as they are generated, so an interrupted run can be resumed by running
+the same command again: finished jobs are skipped and unfinished ones
+continue from their last episode. The shards are then combined into the
+final dataset with `combine_datasets`. For example:
+```
+python habitat/datasets/rearrange/run_parallel_episode_generator.py --config habitat/datasets/rearrange/configs/all_receptacles_test.yaml --out data/datasets/replica_cad/rearrange/train.json.gz --num-episodes 10000 --num-workers 8 --scenes v3_sc0_staging_00 v3_sc1_staging_00
+```
+"""
+
+import gzip
+import json
+import multiprocessing
+import os
+import os.path as osp
+import random
+import time
+from typing import List, Optional
+
+import attr
+import numpy as np
+from yacs.config import CfgNode as CN
+
+from habitat.core.logging import logger
+from habitat.core.utils import DatasetFloatJSONEncoder
+from habitat.datasets.rearrange.combine_datasets import combine_datasets
+from habitat.datasets.rearrange.rearrange_generator import (
+    RearrangeEpisodeGenerator,
+)
+from habitat.datasets.rearrange.run_episode_generator import (
+    get_config_defaults,
+)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class EpisodeGenerationJob:
+    """
+    A number of episodes to generate in a scene, or with the scene sampler of
+    the config if `scene` is None, from a seed.
+    """
+
+    job_idx: int
+    num_episodes: int
+    seed: int
+    scene: Optional[str] = None
+
+
+def make_jobs(
+    num_episodes: int,
+    episodes_per_job: int,
+    seed: int,
+    scenes: Optional[List[str]] = None,
+) -> List[EpisodeGenerationJob]:
+    """
+    Splits the episodes evenly between the scenes, then into jobs of at most
+    `episodes_per_job` episodes.
+    """
+    scene_list: List[Optional[str]] = list(scenes) if scenes else [None]
+    jobs: List[EpisodeGenerationJob] = []
+    for scene_idx, scene in enumerate(scene_list):
+        scene_episodes = num_episodes // len(scene_list) + int(
+            scene_idx < num_episodes % len(scene_list)
+        )
+        for start in range(0, scene_episodes, episodes_per_job):
+            jobs.append(
+                EpisodeGenerationJob(
+                    job_idx=len(jobs),
+                    num_episodes=min(episodes_per_job, scene_episodes - start),
+                    seed=seed + len(jobs),
+                    scene=scene,
+                )
+            )
+    return jobs
+
+
+def _shard_path(shard_dir: str, job: EpisodeGenerationJob) -> str:
+    return osp.join(shard_dir, f"shard_{job.job_idx:05d}.json.gz")
+
+
+def _read_progress(progress_path: str) -> List[str]:
+    """
+    Returns the episodes already written to the progress file of a job,
+    dropping a last line that was only partially written.
+    """
+    if not osp.exists(progress_path):
+        return []
+    episodes = []
+    with open(progress_path, "r") as f:
+        for line in f:
+            try:
+                json.loads(line)
+            except json.JSONDecodeError:
+                break
+            episodes.append(line.rstrip("\n"))
+    with open(progress_path, "w") as f:
+        f.writelines(ep + "\n" for ep in episodes)
+    return episodes
+
+
+def run_job(
+    job: EpisodeGenerationJob,
+    cfg: CN,
+    shard_dir: str,
+    limit_scene_set: Optional[str] = None,
+    debug: bool = False,
+) -> str:
+    """
+    Generates the episodes of a job that aren't generated yet and writes
+    them to the shard of the job. Every episode is appended to a progress
+    file as soon as it is generated.
+    """
+    shard_path = _shard_path(shard_dir, job)
+    if osp.exists(shard_path):
+        return shard_path
+    progress_path = shard_path[: -len(".json.gz")] + ".jsonl"
+    episodes = _read_progress(progress_path)
+
+    if len(episodes) < job.num_episodes:
+        cfg = cfg.clone()
+        if job.scene is not None:
+            cfg.scene_sampler.type = "single"
+            cfg.scene_sampler.params.scene = job.scene
+        with RearrangeEpisodeGenerator(
+            cfg=cfg,
+            debug_visualization=debug,
+            limit_scene_set=limit_scene_set,
+        ) as ep_gen, open(progress_path, "a") as progress_f:
+            for ep_idx in range(len(episodes), job.num_episodes):
+                # Seed every episode so that resumed jobs generate the same
+                # episodes as uninterrupted ones.
+                ep_seed = int(
+                    np.random.SeedSequence([job.seed, ep_idx]).generate_state(
+                        1
+                    )[0]
+                )
+                random.seed(ep_seed)
+                np.random.seed(ep_seed)
+                episode = None
+                while episode is None:
+                    episode = ep_gen.generate_single_episode()
+                # Every generator numbers its episodes from 0, make the
+                # stored ids unique in the combined file and traceable to
+                # their job. RearrangeDatasetV0 still numbers the episodes
+                # by position when loading them.
+                episode.episode_id = f"{job.job_idx}_{ep_idx}"
+                episodes.append(DatasetFloatJSONEncoder().encode(episode))
+                progress_f.write(episodes[-1] + "\n")
+                progress_f.flush()
+                os.fsync(progress_f.fileno())
+
+    # Write to a temporary file first, an existing shard is always complete.
+    with gzip.open(shard_path + ".tmp", "wt") as f:
+        f.write('{"config": null, "episodes": [%s]}' % ", ".join(episodes))
+    os.replace(shard_path + ".tmp", shard_path)
+    os.remove(progress_path)
+    logger.info(f"Finished job {job.job_idx} with {len(episodes)} episodes")
+    return shard_path
+
+
+def _run_job_star(args) -> str:
+    return run_job(*args)
+
+
+def run_parallel_episode_generator(
+    cfg: CN,
+    output_path: str,
+    num_episodes: int,
+    num_workers: int = 1,
+    episodes_per_job: int = 100,
+    seed: int = 0,
+    scenes: Optional[List[str]] = None,
+    shard_dir: Optional[str] = None,
+    limit_scene_set: Optional[str] = None,
+    debug: bool = False,
+) -> None:
+    """
+    Generates `num_episodes` episodes with `num_workers` processes and
+    combines them in the dataset at `output_path`. The shards are kept in
+    `shard_dir`, next to the output by default, and are reused if it
+    already contains some.
+    """
+    if shard_dir is None:
+        shard_dir = output_path[: -len(".json.gz")] + "_shards"
+    os.makedirs(shard_dir, exist_ok=True)
+
+    jobs = make_jobs(num_episodes, episodes_per_job, seed, scenes)
+    logger.info(f"Generating {num_episodes} episodes in {len(jobs)} jobs")
+    job_args = [(job, cfg, shard_dir, limit_scene_set, debug) for job in jobs]
+    if num_workers > 1:
+        # Spawn, as the simulator doesn't survive forks.
+        mp_ctx = multiprocessing.get_context("spawn")
+        with mp_ctx.Pool(num_workers) as pool:
+            shard_paths = list(pool.imap_unordered(_run_job_star, job_args))
+    else:
+        shard_paths = [_run_job_star(args) for args in job_args]
+
+    if osp.dirname(output_path) != "":
+        os.makedirs(osp.dirname(output_path), exist_ok=True)
+    combine_datasets(sorted(shard_paths), output_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help="Relative path to RearrangeEpisode generator config.",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default="rearrange_ep_dataset.json.gz",
+        help="Relative path to output generated RearrangeEpisodeDataset.",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        type=str,
+        default=None,
+        help="Directory of the shards of the jobs. Defaults to the output path with a '_shards' suffix.",
+    )
+    parser.add_argument(
+        "--num-episodes",
+        type=int,
+        default=1,
+        help="The number of episodes to generate.",
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=1,
+        help="The number of generator processes.",
+    )
+    parser.add_argument(
+        "--episodes-per-job",
+        type=int,
+        default=100,
+        help="The maximum number of episodes per job and shard.",
+    )
+    parser.add_argument(
+        "--scenes",
+        type=str,
+        nargs="*",
+        default=None,
+        help="Scenes to split the episodes between. Uses the scene sampler of the config if not set.",
+    )
+    parser.add_argument(
+        "--limit-scene-set",
+        type=str,
+        default=None,
+        help="Limit to one of the scene set samplers. Used to differentiate scenes from training and eval.",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Render debug frames and save images/videos during episode generation.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+    args, _ = parser.parse_known_args()
+
+    cfg = get_config_defaults()
+    if args.config is not None:
+        assert osp.exists(
+            args.config
+        ), f"Provided config, '{args.config}', does not exist."
+        cfg.merge_from_file(args.config)
+
+    output_path = args.out
+    if not output_path.endswith(".json.gz"):
+        output_path += ".json.gz"
+
+    start_time = time.time()
+    run_parallel_episode_generator(
+        cfg,
+        output_path,
+        args.num_episodes,
+        num_workers=args.num_workers,
+        episodes_per_job=args.episodes_per_job,
+        seed=args.seed,
+        scenes=args.scenes,
+        shard_dir=args.shard_dir,
+        limit_scene_set=args.limit_scene_set,
+        debug=args.debug,
+    )
+    logger.info(
+        f"Generated {args.num_episodes} episodes in {time.time()-start_time} seconds."
+    )
@@ -22,6 +22,7 @@ from habitat.datasets.rearrange.samplers.receptacle import (
     find_receptacles,
 )
 from habitat.sims.habitat_simulator.debug_visualizer import DebugVisualizer
+from habitat.tasks.rearrange.utils import NavmeshArtifacts
 
 
 class ObjectSampler:
@@ -63,6 +64,8 @@ class ObjectSampler:
             sample_region_ratio = defaultdict(lambda: 1.0)
         self.sample_region_ratio = sample_region_ratio
         self.nav_to_min_distance = nav_to_min_distance
+        # navmesh vertices and islands of the scene, shared by the samplers of a generator
+        self.navmesh_artifacts: Optional[NavmeshArtifacts] = None
         self.set_num_samples()
         # More possible parameters of note:
         # - surface vs volume
@@ -75,6 +78,7 @@ class ObjectSampler:
         # receptacle instances should be scraped for every new scene
         self.receptacle_instances = None
         self.receptacle_candidates = None
+        self.navmesh_artifacts = None
         # number of objects in the range should be reset each time
         self.set_num_samples()
 
@@ -213,13 +217,6 @@ class ObjectSampler:
         """
         num_placement_tries = 0
         new_object = None
-        navmesh_vertices = np.stack(
-            sim.pathfinder.build_navmesh_vertices(), axis=0
-        )
-        # Note: we cache the largest island to reject samples which are primarily accessible from disconnected navmesh regions. This assumption limits sampling to the largest navigable component of any scene.
-        self.largest_island_size = max(
-            [sim.pathfinder.island_radius(p) for p in navmesh_vertices]
-        )
 
         while num_placement_tries < self.max_placement_attempts:
             num_placement_tries += 1
@@ -322,6 +319,11 @@ class ObjectSampler:
         """
         if self.nav_to_min_distance == -1:
             return True
+        if self.navmesh_artifacts is None:
+            # Only computed once per scene when not provided by the generator
+            self.navmesh_artifacts = NavmeshArtifacts.compute(
+                sim.pathfinder, navmesh_hash=""
+            )
         snapped = sim.pathfinder.snap_point(new_object.translation)
         island_radius: float = sim.pathfinder.island_radius(snapped)
         dist = float(
@@ -329,9 +331,10 @@ class ObjectSampler:
                 np.array((snapped - new_object.translation))[[0, 2]]
             )
         )
+        # Note: samples which are primarily accessible from disconnected navmesh regions are rejected. This assumption limits sampling to the largest navigable component of any scene.
         return (
             dist < self.nav_to_min_distance
-            and island_radius == self.largest_island_size
+            and island_radius == self.navmesh_artifacts.max_island_size
         )
 
     def single_sample(
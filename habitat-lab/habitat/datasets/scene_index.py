@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Scene-indexed dataset files, which let a worker decompress and parse only the
+episodes of its own scenes instead of the full dataset.
+
+The file starts with a JSON header mapping every scene id to the byte range
+of a separately gzip-compressed chunk holding the episodes of that scene
+(together with their index in the original dataset file, so episodes keep
+their order and ids). Dict-valued dataset fields whose keys are per-scene
+(like the `goals_by_category` of ObjectNav datasets) are split across the
+chunks as well. To convert a dataset file:
+```
+python -m habitat.datasets.scene_index data/datasets/replica_cad/rearrange/v1/train/rearrange_easy.json.gz
+```
+Then point `habitat.dataset.data_path` to the `.indexed` file instead of the
+`json.gz` file.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import struct
+from typing import Any, Dict, List, Optional
+
+SCENE_INDEXED_EXT = ".indexed"
+SCENE_INDEX_VERSION = 1
+
+_MAGIC = b"HABSCIDX"
+_HEADER_LENGTH = struct.Struct("<Q")
+_SCENE_EXTS = (".glb", ".basis", ".scene_instance.json")
+
+
+def is_scene_indexed_file(path: str) -> bool:
+    r"""Whether :p:`path` is a scene-indexed dataset file."""
+    if not path.endswith(SCENE_INDEXED_EXT) or not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+
+def scene_indexed_path(json_path: str) -> str:
+    r"""Path of the scene-indexed file corresponding to a ``.json.gz`` (or
+    ``.json``) dataset file.
+    """
+    for ext in (".json.gz", ".json"):
+        if json_path.endswith(ext):
+            return json_path[: -len(ext)] + SCENE_INDEXED_EXT
+    return json_path + SCENE_INDEXED_EXT
+
+
+def _scene_key_prefixes(scene_id: str) -> List[str]:
+    name = os.path.basename(scene_id)
+    prefixes = [name]
+    for ext in _SCENE_EXTS:
+        if name.endswith(ext):
+            name = name[: -len(ext)]
+            prefixes.append(name)
+    return [f"{p}_" for p in prefixes]
+
+
+def _split_scene_fields(
+    deserialized: Dict[str, Any], scene_ids: List[str]
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    r"""Finds the dict-valued dataset fields whose every key starts with the
+    name of one of the scenes, and splits them by scene.
+
+    :return: field name -> scene id -> part of the field for that scene.
+    """
+    prefixes = sorted(
+        ((p, s) for s in scene_ids for p in _scene_key_prefixes(s)),
+        key=lambda ps: len(ps[0]),
+        reverse=True,
+    )
+    split_fields: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for field, value in deserialized.items():
+        if field == "episodes" or not isinstance(value, dict) or not value:
+            continue
+        by_scene: Dict[str, Dict[str, Any]] = {}
+        for key, item in value.items():
+            # Longest prefix first, so that a scene named like the prefix of
+            # another scene doesn't take its keys.
+            scene_id = next(
+                (s for p, s in prefixes if key.startswith(p)), None
+            )
+            if scene_id is None:
+                break
+            by_scene.setdefault(scene_id, {})[key] = item
+        else:
+            split_fields[field] = by_scene
+    return split_fields
+
+
+def write_scene_indexed_file(
+    deserialized: Dict[str, Any], path: str, compresslevel: int = 9
+) -> Dict[str, Any]:
+    r"""Writes the content of a deserialized dataset file to a scene-indexed
+    file.
+
+    :param deserialized: the dataset file as loaded by :py:`json.loads`.
+    :param path: path of the file to write.
+    :param compresslevel: gzip compression level of the scene chunks.
+    :return: the header of the file.
+    """
+    episodes_by_scene: Dict[str, List[int]] = {}
+    for i, episode in enumerate(deserialized["episodes"]):
+        episodes_by_scene.setdefault(episode["scene_id"], []).append(i)
+    scene_ids = list(episodes_by_scene.keys())
+    split_fields = _split_scene_fields(deserialized, scene_ids)
+
+    chunks = []
+    scenes: Dict[str, Dict[str, int]] = {}
+    offset = 0
+    for scene_id, indices in episodes_by_scene.items():
+        chunk = gzip.compress(
+            json.dumps(
+                {
+                    "indices": indices,
+                    "episodes": [deserialized["episodes"][i] for i in indices],
+                    "dataset": {
+                        field: by_scene.get(scene_id, {})
+                        for field, by_scene in split_fields.items()
+                    },
+                }
+            ).encode("utf-8"),
+            compresslevel=compresslevel,
+        )
+        scenes[scene_id] = {
+            "offset": offset,
+            "length": len(chunk),
+            "num_episodes": len(indices),
+        }
+        offset += len(chunk)
+        chunks.append(chunk)
+
+    header = {
+        "version": SCENE_INDEX_VERSION,
+        "num_episodes": len(deserialized["episodes"]),
+        "scenes": scenes,
+        "dataset": {
+            # Split fields are replaced by an empty dict, which is what the
+            # datasets expect when no scene has been loaded yet.
+            k: {} if k in split_fields else v
+            for k, v in deserialized.items()
+            if k != "episodes"
+        },
+    }
+    encoded_header = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(encoded_header)))
+        f.write(encoded_header)
+        for chunk in chunks:
+            f.write(chunk)
+    return header
+
+
+class SceneIndexedFile:
+    r"""Reader of a scene-indexed dataset file. Only the header is read
+    when opening the file, the episodes of a scene are read and decompressed
+    by :ref:`read_scene`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a scene-indexed file.")
+            (header_length,) = _HEADER_LENGTH.unpack(
+                f.read(_HEADER_LENGTH.size)
+            )
+            self.header: Dict[str, Any] = json.loads(
+                f.read(header_length).decode("utf-8")
+            )
+        if self.header["version"] != SCENE_INDEX_VERSION:
+            raise ValueError(
+                f"Unsupported scene index version {self.header['version']}"
+                f" in {path}, expected {SCENE_INDEX_VERSION}."
+            )
+        self._data_offset = len(_MAGIC) + _HEADER_LENGTH.size + header_length
+
+    @property
+    def scene_ids(self) -> List[str]:
+        r"""Scene ids of the file, in order of first appearance in the
+        original dataset file.
+        """
+        return list(self.header["scenes"].keys())
+
+    @property
+    def dataset_fields(self) -> Dict[str, Any]:
+        r"""Top-level fields of the original dataset file, other than the
+        episodes and the parts of the fields that were split by scene.
+        """
+        return self.header["dataset"]
+
+    def num_episodes(self, scene_id: Optional[str] = None) -> int:
+        r"""Number of episodes of :p:`scene_id`, or of the whole file."""
+        if scene_id is None:
+            return self.header["num_episodes"]
+        return self.header["scenes"][scene_id]["num_episodes"]
+
+    def read_scene(self, scene_id: str) -> Dict[str, Any]:
+        r"""Reads the chunk of :p:`scene_id`.
+
+        :return: a dict with the ``episodes`` of the scene, their
+            ``indices`` in the original dataset file and the per-scene part
+            of the split ``dataset`` fields.
+        """
+        entry = self.header["scenes"][scene_id]
+        with open(self.path, "rb") as f:
+            f.seek(self._data_offset + entry["offset"])
+            chunk = f.read(entry["length"])
+        return json.loads(gzip.decompress(chunk).decode("utf-8"))
+
+
+def convert_dataset_file(path: str, overwrite: bool = False) -> str:
+    indexed_path = scene_indexed_path(path)
+    if os.path.exists(indexed_path) and not overwrite:
+        print("Skipping ", path, ", already converted")
+        return indexed_path
+
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt") as f:
+            deserialized = json.loads(f.read())
+    else:
+        with open(path, "r") as f:
+            deserialized = json.loads(f.read())
+
+    header = write_scene_indexed_file(deserialized, indexed_path)
+    print(
+        "Converted ",
+        path,
+        f"({header['num_episodes']} episodes, {len(header['scenes'])} scenes)",
+    )
+    return indexed_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        type=str,
+        help="Dataset files to convert, e.g. data/datasets/replica_cad/rearrange/v1/train/rearrange_easy.json.gz",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Convert files that already have a scene-indexed file.",
+    )
+    args = parser.parse_args()
+
+    for path in args.paths:
+        convert_dataset_file(path, args.overwrite)
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+r"""Caches for the geodesic distances computed by the navigation measures.
+
+:ref:`GeodesicDistanceCache` memoizes distances per scene, keyed by the
+quantized start position and a hash of the goal positions, and can persist
+them to disk so that they are reused across runs. :ref:`GeodesicDistanceField`
+precomputes the distance to a set of goals over a grid covering the navmesh,
+turning distance queries into a lookup.
+"""
+
+import atexit
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from habitat.core.simulator import Simulator
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_CacheKey = Tuple[str, int, int, int]
+
+
+class _LRU(Generic[K, V]):
+    def __init__(
+        self,
+        max_size: int,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ):
+        self.max_size = max_size
+        self._on_evict = on_evict
+        self._items: "OrderedDict[K, V]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._items
+
+    def get(self, key: K) -> Optional[V]:
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key: K, value: V) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            old_key, old_value = self._items.popitem(last=False)
+            if self._on_evict is not None:
+                self._on_evict(old_key, old_value)
+
+    def items(self):
+        return self._items.items()
+
+
+def goal_set_hash(goals: Sequence[Sequence[float]]) -> str:
+    r"""Hash of a set of goal positions, independent of their order."""
+    goals_arr = np.asarray(goals, dtype=np.float32).reshape(-1, 3)
+    goals_arr = goals_arr[np.lexsort(goals_arr.T[::-1])]
+    return hashlib.sha1(goals_arr.tobytes()).hexdigest()
+
+
+def prefiltered_geodesic_distance(
+    sim: "Simulator",
+    position: Sequence[float],
+    goals: np.ndarray,
+    k: int,
+    slack: float = 0.05,
+) -> float:
+    r"""Exact geodesic distance from :p:`position` to the closest of
+    :p:`goals`, computed on the :p:`k` goals closest in Euclidean distance
+    first.
+
+    The Euclidean distance is a lower bound of the geodesic distance, so
+    only the other goals closer (in Euclidean distance) than the distance
+    found to these :p:`k` goals are then queried, which is usually none.
+
+    :param goals: :py:`(N, 3)` array of goal positions.
+    :param slack: margin added to the Euclidean lower bound to account for
+        the snapping of the positions to the navmesh.
+    """
+    if len(goals) <= k:
+        return sim.geodesic_distance(position, goals)
+    euclidean = np.linalg.norm(
+        goals - np.asarray(position, dtype=np.float32), axis=1
+    )
+    nearest = np.argpartition(euclidean, k)[:k]
+    distance = sim.geodesic_distance(position, goals[nearest])
+
+    remaining = euclidean < distance + slack
+    remaining[nearest] = False
+    if np.any(remaining):
+        distance = min(
+            distance, sim.geodesic_distance(position, goals[remaining])
+        )
+    return distance
+
+
+def navmesh_scene_key(sim: "Simulator", scene_id: str) -> str:
+    r"""Key identifying the navmesh of the current scene of :p:`sim`. The
+    navmesh bounds and area are part of the key so that entries persisted
+    for a navmesh are not reused once it has been recomputed.
+    """
+    pathfinder = getattr(sim, "pathfinder", None)
+    if pathfinder is None:
+        return scene_id
+    lower, upper = pathfinder.get_bounds()
+    fingerprint = np.concatenate(
+        [lower, upper, [pathfinder.navigable_area]]
+    ).astype(np.float32)
+    return f"{scene_id}:{hashlib.sha1(fingerprint.tobytes()).hexdigest()}"
+
+
+def _cache_file_name(scene_key: str, suffix: str) -> str:
+    name = os.path.splitext(os.path.basename(scene_key.split(":")[0]))[0]
+    return f"{name}-{hashlib.sha1(scene_key.encode()).hexdigest()}{suffix}"
+
+
+class GeodesicDistanceCache:
+    r"""Per-scene LRU cache of geodesic distances.
+
+    Entries are keyed by the start position, quantized to
+    :p:`quantization` meters, and by the :ref:`goal_set_hash` of the goals.
+    A distance is computed at the first position that falls into a cell and
+    reused for every position of that cell, so cached distances are off by
+    at most the size of a cell.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100000,
+        max_scenes: int = 4,
+        quantization: float = 0.01,
+        cache_dir: Optional[str] = None,
+    ):
+        r"""..
+
+        :param max_entries: maximum number of distances kept per scene.
+        :param max_scenes: maximum number of scenes kept in memory. Scenes
+            are saved to :p:`cache_dir` when they are evicted.
+        :param quantization: size in meters of the cells start positions
+            are quantized to.
+        :param cache_dir: directory the distances of each scene are loaded
+            from and saved to, :py:`None` to keep them in memory only.
+        """
+        self.max_entries = max_entries
+        self.quantization = quantization
+        self.cache_dir = cache_dir
+        self._scenes: _LRU[str, _LRU[_CacheKey, float]] = _LRU(
+            max_scenes, on_evict=self._save_scene
+        )
+        self._num_new_entries: Dict[str, int] = {}
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            atexit.register(self.save)
+
+    def _quantize(self, position: Sequence[float]) -> Tuple[int, int, int]:
+        q = np.round(
+            np.asarray(position, dtype=np.float64) / self.quantization
+        )
+        return int(q[0]), int(q[1]), int(q[2])
+
+    def _scene_path(self, scene_key: str) -> str:
+        assert self.cache_dir is not None
+        return os.path.join(
+            self.cache_dir, _cache_file_name(scene_key, ".pickle")
+        )
+
+    def _load_entries(self, scene_key: str) -> Dict[_CacheKey, float]:
+        if self.cache_dir is None or not os.path.exists(
+            self._scene_path(scene_key)
+        ):
+            return {}
+        with open(self._scene_path(scene_key), "rb") as f:
+            saved = pickle.load(f)
+        if saved["quantization"] != self.quantization:
+            return {}
+        return saved["entries"]
+
+    def _scene(self, scene_key: str) -> _LRU[_CacheKey, float]:
+        entries = self._scenes.get(scene_key)
+        if entries is None:
+            entries = _LRU(self.max_entries)
+            for k, v in self._load_entries(scene_key).items():
+                entries.put(k, v)
+            self._scenes.put(scene_key, entries)
+            self._num_new_entries[scene_key] = 0
+        return entries
+
+    def _save_scene(
+        self, scene_key: str, entries: _LRU[_CacheKey, float]
+    ) -> None:
+        if self._num_new_entries.pop(scene_key, 0) == 0:
+            return
+        if self.cache_dir is None:
+            return
+        # Merge with what other processes may have saved in the meantime
+        merged = self._load_entries(scene_key)
+        merged.update(entries.items())
+        path = self._scene_path(scene_key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"quantization": self.quantization, "entries": merged}, f
+            )
+        os.replace(tmp_path, path)
+
+    def save(self) -> None:
+        r"""Saves the scenes in memory to :ref:`cache_dir`."""
+        for scene_key, entries in list(self._scenes.items()):
+            self._save_scene(scene_key, entries)
+            self._num_new_entries[scene_key] = 0
+
+    def geodesic_distance(
+        self,
+        scene_key: str,
+        position: Sequence[float],
+        goal_set_key: str,
+        compute_fn: Callable[[], float],
+    ) -> float:
+        r"""Returns the cached distance from :p:`position` to the goal set,
+        calling :p:`compute_fn` on a miss.
+
+        :param scene_key: key of the scene, see :ref:`navmesh_scene_key`.
+        :param position: start position.
+        :param goal_set_key: :ref:`goal_set_hash` of the goals.
+        :param compute_fn: computes the distance from :p:`position`.
+        """
+        entries = self._scene(scene_key)
+        key = (goal_set_key, *self._quantize(position))
+        distance = entries.get(key)
+        if distance is None:
+            distance = float(compute_fn())
+            entries.put(key, distance)
+            self._num_new_entries[scene_key] += 1
+        return distance
+
+
+class GeodesicDistanceField:
+    r"""Geodesic distance to a set of goals, precomputed at the nodes of a
+    horizontal grid covering the navmesh at a given height.
+
+    :ref:`lookup` bilinearly interpolates the distances of the four nodes
+    around a position. Geodesic distances are 1-Lipschitz, so when the nodes
+    are connected to each other the error is bounded by a few times the grid
+    resolution. Nodes whose distances differ by more than the diagonal of a
+    cell are separated by an obstacle, the lookup fails for those. Callers
+    that need exact distances close to the goals (for instance to decide
+    success) should fall back to path finding below some distance.
+    """
+
+    def __init__(
+        self,
+        distances: np.ndarray,
+        origin: Tuple[float, float],
+        resolution: float,
+        height: float,
+        height_tolerance: float,
+    ):
+        self.distances = distances
+        self.origin = origin
+        self.resolution = resolution
+        self.height = height
+        self.height_tolerance = height_tolerance
+
+    @classmethod
+    def build(
+        cls,
+        pathfinder: Any,
+        goals: Sequence[Sequence[float]],
+        height: float,
+        resolution: float = 0.25,
+        height_tolerance: float = 0.5,
+    ) -> "GeodesicDistanceField":
+        r"""Computes the distances from every navigable node of the grid at
+        :p:`height` to the closest of :p:`goals`.
+
+        :param pathfinder: the :py:`habitat_sim.nav.PathFinder` of the scene.
+        """
+        import habitat_sim
+
+        lower, upper = pathfinder.get_bounds()
+        xs = np.arange(lower[0], upper[0] + resolution, resolution)
+        zs = np.arange(lower[2], upper[2] + resolution, resolution)
+        distances = np.full((len(zs), len(xs)), np.inf, dtype=np.float32)
+
+        # A single path object is reused for every node
+        path = habitat_sim.MultiGoalShortestPath()
+        path.requested_ends = np.asarray(goals, dtype=np.float32).reshape(
+            -1, 3
+        )
+        point = np.array([0.0, height, 0.0], dtype=np.float32)
+        for i, z in enumerate(zs):
+            point[2] = z
+            for j, x in enumerate(xs):
+                point[0] = x
+                if not pathfinder.is_navigable(point):
+                    continue
+                path.requested_start = point
+                if pathfinder.find_path(path):
+                    distances[i, j] = path.geodesic_distance
+
+        return cls(
+            distances,
+            origin=(float(lower[0]), float(lower[2])),
+            resolution=resolution,
+            height=height,
+            height_tolerance=height_tolerance,
+        )
+
+    def lookup(self, position: Sequence[float]) -> Optional[float]:
+        r"""Distance from :p:`position` to the goals, or :py:`None` if the
+        position is off the grid, too far from its height or next to a node
+        that isn't navigable.
+        """
+        if abs(position[1] - self.height) > self.height_tolerance:
+            return None
+        fx = (position[0] - self.origin[0]) / self.resolution
+        fz = (position[2] - self.origin[1]) / self.resolution
+        j, i = int(np.floor(fx)), int(np.floor(fz))
+        if (
+            i < 0
+            or j < 0
+            or i + 1 >= self.distances.shape[0]
+            or j + 1 >= self.distances.shape[1]
+        ):
+            return None
+        corners = self.distances[i : i + 2, j : j + 2]
+        if not np.all(np.isfinite(corners)):
+            return None
+        if corners.max() - corners.min() > np.sqrt(2) * self.resolution + 1e-3:
+            return None
+        tx, tz = fx - j, fz - i
+        return float(
+            (1 - tz) * ((1 - tx) * corners[0, 0] + tx * corners[0, 1])
+            + tz * ((1 - tx) * corners[1, 0] + tx * corners[1, 1])
+        )
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            distances=self.distances,
+            origin=np.asarray(self.origin),
+            resolution=self.resolution,
+            height=self.height,
+            height_tolerance=self.height_tolerance,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GeodesicDistanceField":
+        with np.load(path) as data:
+            return cls(
+                data["distances"],
+                origin=tuple(data["origin"].tolist()),
+                resolution=float(data["resolution"]),
+                height=float(data["height"]),
+                height_tolerance=float(data["height_tolerance"]),
+            )
+
+
+class GeodesicDistanceFields:
+    r"""LRU collection of :ref:`GeodesicDistanceField`, keyed by scene, goal
+    set and height, optionally persisted to disk.
+    """
+
+    def __init__(
+        self,
+        max_fields: int = 16,
+        resolution: float = 0.25,
+        height_tolerance: float = 0.5,
+        cache_dir: Optional[str] = None,
+    ):
+        self.resolution = resolution
+        self.height_tolerance = height_tolerance
+        self.cache_dir = cache_dir
+        self._fields: _LRU[Tuple[str, str, int], GeodesicDistanceField] = _LRU(
+            max_fields
+        )
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(
+        self,
+        sim: "Simulator",
+        scene_key: str,
+        goals: Sequence[Sequence[float]],
+        goal_set_key: str,
+        height: float,
+    ) -> GeodesicDistanceField:
+        r"""Returns the field of the goal set at :p:`height`, building it
+        if it is neither in memory nor on disk.
+        """
+        height_key = int(round(height / self.height_tolerance))
+        key = (scene_key, goal_set_key, height_key)
+        field = self._fields.get(key)
+        if field is not None:
+            return field
+
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(
+                self.cache_dir,
+                _cache_file_name(
+                    scene_key,
+                    f"-{goal_set_key[:16]}-{height_key}-{self.resolution}.npz",
+                ),
+            )
+        if path is not None and os.path.exists(path):
+            field = GeodesicDistanceField.load(path)
+        else:
+            field = GeodesicDistanceField.build(
+                sim.pathfinder,  # type: ignore[attr-defined]
+                goals,
+                height,
+                resolution=self.resolution,
+                height_tolerance=self.height_tolerance,
+            )
+            if path is not None:
+                field.save(path)
+        self._fields.put(key, field)
+        return field
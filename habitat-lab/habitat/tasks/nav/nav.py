@@ -6,6 +6,7 @@
 
 # TODO, lots of typing errors in here
 
+from collections import OrderedDict
 from typing import Any, List, Optional, Sequence, Tuple
 
 import attr
@@ -33,6 +34,14 @@ from habitat.core.simulator import (
 from habitat.core.spaces import ActionSpace
 from habitat.core.utils import not_none_validator, try_cv2_import
 from habitat.sims.habitat_simulator.actions import HabitatSimActions
+from habitat.tasks.nav.geodesic_cache import (
+    GeodesicDistanceCache,
+    GeodesicDistanceField,
+    GeodesicDistanceFields,
+    goal_set_hash,
+    navmesh_scene_key,
+    prefiltered_geodesic_distance,
+)
 from habitat.tasks.utils import cartesian_to_polar
 from habitat.utils.geometry_utils import (
     quaternion_from_coeff,
@@ -698,7 +707,16 @@ class Collisions(Measure):
 
 @registry.register_measure
 class TopDownMap(Measure):
-    r"""Top Down Map measure"""
+    r"""Top Down Map measure
+
+    The map of the scene is cached per navmesh, floor height and resolution,
+    so that on reset only the episode specific overlays (goals, shortest
+    path and source) are drawn, on a copy of the cached map. The agent trail
+    and the fog of war are then updated in place on every step.
+    """
+
+    # Maximum number of scene maps kept in the cache
+    max_cached_maps: int = 8
 
     def __init__(
         self, sim: "HabitatSim", config: Config, *args: Any, **kwargs: Any
@@ -715,6 +733,10 @@ class TopDownMap(Measure):
         self._previous_xy_location: Optional[Tuple[int, int]] = None
         self._top_down_map: Optional[np.ndarray] = None
         self._shortest_path_points: Optional[List[Tuple[int, int]]] = None
+        self._scene_maps: "OrderedDict[Tuple[str, float, int], np.ndarray]" = (
+            OrderedDict()
+        )
+        self._fog_of_war_line_len: Optional[float] = None
         self.line_thickness = int(
             np.round(self._map_resolution * 2 / MAP_THICKNESS_SCALAR)
         )
@@ -726,15 +748,42 @@ class TopDownMap(Measure):
     def _get_uuid(self, *args: Any, **kwargs: Any) -> str:
         return "top_down_map"
 
-    def get_original_map(self):
-        top_down_map = maps.get_topdown_map_from_sim(
-            self._sim,
-            map_resolution=self._map_resolution,
-            draw_border=self._config.draw_border,
+    def _get_scene_map(self) -> np.ndarray:
+        r"""Map of the scene at the height of the agent, from the cache when
+        the scene and floor have already been seen.
+        """
+        height = self._sim.get_agent(0).state.position[1]
+        key = (
+            navmesh_scene_key(self._sim, self._sim.habitat_config.scene),
+            round(float(height), 2),
+            self._map_resolution,
         )
+        scene_map = self._scene_maps.get(key, None)
+        if scene_map is None:
+            scene_map = maps.get_topdown_map(
+                self._sim.pathfinder,
+                height,
+                map_resolution=self._map_resolution,
+                draw_border=self._config.draw_border,
+            )
+            self._scene_maps[key] = scene_map
+            while len(self._scene_maps) > self.max_cached_maps:
+                self._scene_maps.popitem(last=False)
+        else:
+            self._scene_maps.move_to_end(key)
+        return scene_map
+
+    def get_original_map(self):
+        top_down_map = self._get_scene_map().copy()
 
         if self._config.fog_of_war.draw:
             self._fog_of_war_mask = np.zeros_like(top_down_map)
+            self._fog_of_war_line_len = (
+                self._config.fog_of_war.visibility_dist
+                / maps.calculate_meters_per_pixel(
+                    self._map_resolution, sim=self._sim
+                )
+            )
         else:
             self._fog_of_war_mask = None
 
@@ -943,16 +992,16 @@ class TopDownMap(Measure):
 
     def update_fog_of_war_mask(self, agent_position):
         if self._config.fog_of_war.draw:
-            self._fog_of_war_mask = fog_of_war.reveal_fog_of_war(
+            # The mask is allocated on reset, like the map it is then
+            # updated in place
+            fog_of_war.reveal_fog_of_war(
                 self._top_down_map,
                 self._fog_of_war_mask,
                 agent_position,
                 self.get_polar_angle(),
                 fov=self._config.fog_of_war.fov,
-                max_line_len=self._config.fog_of_war.visibility_dist
-                / maps.calculate_meters_per_pixel(
-                    self._map_resolution, sim=self._sim
-                ),
+                max_line_len=self._fog_of_war_line_len,
+                inplace=True,
             )
 
 
@@ -968,9 +1017,34 @@ class DistanceToGoal(Measure):
         self._previous_position: Optional[Tuple[float, float, float]] = None
         self._sim = sim
         self._config = config
-        self._episode_view_points: Optional[
-            List[Tuple[float, float, float]]
-        ] = None
+        self._episode_view_points: Optional[np.ndarray] = None
+        self._view_points_prefilter_k: int = config.get(
+            "view_points_prefilter_k", 0
+        )
+
+        # Both are shared by all the episodes of the environment
+        self._distance_cache: Optional[GeodesicDistanceCache] = None
+        cache_config = config.get("geodesic_cache", None)
+        if cache_config is not None and cache_config.enabled:
+            self._distance_cache = GeodesicDistanceCache(
+                max_entries=cache_config.max_entries,
+                max_scenes=cache_config.max_scenes,
+                quantization=cache_config.quantization,
+                cache_dir=cache_config.cache_dir,
+            )
+        self._distance_fields: Optional[GeodesicDistanceFields] = None
+        field_config = config.get("distance_field", None)
+        if field_config is not None and field_config.enabled:
+            self._distance_fields = GeodesicDistanceFields(
+                max_fields=field_config.max_fields,
+                resolution=field_config.resolution,
+                height_tolerance=field_config.height_tolerance,
+                cache_dir=field_config.cache_dir,
+            )
+        self._scene_id: Optional[str] = None
+        self._scene_key: Optional[str] = None
+        self._goal_set_key: Optional[str] = None
+        self._distance_field: Optional[GeodesicDistanceField] = None
 
         super().__init__(**kwargs)
 
@@ -981,13 +1055,98 @@ class DistanceToGoal(Measure):
         self._previous_position = None
         self._metric = None
         if self._config.distance_to == "VIEW_POINTS":
-            self._episode_view_points = [
-                view_point.agent_state.position
-                for goal in episode.goals
-                for view_point in goal.view_points
-            ]
+            # ObjectNav datasets share the packed view points of a goals_key
+            # among all its episodes
+            self._episode_view_points = getattr(
+                episode.goals, "view_point_positions", None
+            )
+            if self._episode_view_points is None:
+                self._episode_view_points = np.array(
+                    [
+                        view_point.agent_state.position
+                        for goal in episode.goals
+                        for view_point in goal.view_points
+                    ],
+                    dtype=np.float32,
+                ).reshape(-1, 3)
+        if (
+            self._distance_cache is not None
+            or self._distance_fields is not None
+        ):
+            self._reset_distance_caches(episode)
         self.update_metric(episode=episode, *args, **kwargs)  # type: ignore
 
+    def _goal_positions(
+        self, episode: NavigationEpisode
+    ) -> Sequence[Sequence[float]]:
+        if self._config.distance_to == "POINT":
+            return [goal.position for goal in episode.goals]
+        elif self._config.distance_to == "VIEW_POINTS":
+            return self._episode_view_points
+        else:
+            raise ValueError(
+                f"Non valid distance_to parameter was provided: {self._config.distance_to}"
+            )
+
+    def _reset_distance_caches(self, episode: NavigationEpisode) -> None:
+        if self._scene_id != episode.scene_id:
+            self._scene_id = episode.scene_id
+            self._scene_key = navmesh_scene_key(self._sim, episode.scene_id)
+        goals = self._goal_positions(episode)
+        self._goal_set_key = goal_set_hash(goals)
+        self._distance_field = None
+        if self._distance_fields is not None:
+            self._distance_field = self._distance_fields.get(
+                self._sim,
+                self._scene_key,
+                goals,
+                self._goal_set_key,
+                height=episode.start_position[1],
+            )
+
+    def _geodesic_distance(
+        self,
+        position: np.ndarray,
+        goals: Sequence[Sequence[float]],
+        episode: NavigationEpisode,
+    ) -> float:
+        if self._distance_field is not None:
+            distance = self._distance_field.lookup(position)
+            if (
+                distance is not None
+                and distance
+                >= self._config.distance_field.exact_distance_threshold
+            ):
+                return distance
+        if self._distance_cache is not None:
+            return self._distance_cache.geodesic_distance(
+                self._scene_key,
+                position,
+                self._goal_set_key,
+                lambda: self._compute_geodesic_distance(
+                    position, goals, episode
+                ),
+            )
+        return self._compute_geodesic_distance(position, goals, episode)
+
+    def _compute_geodesic_distance(
+        self,
+        position: np.ndarray,
+        goals: Sequence[Sequence[float]],
+        episode: NavigationEpisode,
+    ) -> float:
+        if (
+            self._view_points_prefilter_k > 0
+            and self._config.distance_to == "VIEW_POINTS"
+        ):
+            return prefiltered_geodesic_distance(
+                self._sim,
+                position,
+                self._episode_view_points,
+                self._view_points_prefilter_k,
+            )
+        return self._sim.geodesic_distance(position, goals, episode)
+
     def update_metric(
         self, episode: NavigationEpisode, *args: Any, **kwargs: Any
     ):
@@ -997,13 +1156,13 @@ class DistanceToGoal(Measure):
             self._previous_position, current_position, atol=1e-4
         ):
             if self._config.distance_to == "POINT":
-                distance_to_target = self._sim.geodesic_distance(
+                distance_to_target = self._geodesic_distance(
                     current_position,
                     [goal.position for goal in episode.goals],
                     episode,
                 )
             elif self._config.distance_to == "VIEW_POINTS":
-                distance_to_target = self._sim.geodesic_distance(
+                distance_to_target = self._geodesic_distance(
                     current_position, self._episode_view_points, episode
                 )
             else:
@@ -3,7 +3,7 @@
 # LICENSE file in the root directory of this source tree.
 
 import os
-from typing import Any, List, Optional
+from typing import Any, Iterable, List, Optional
 
 import attr
 import numpy as np
@@ -95,6 +95,59 @@ class ObjectGoal(NavigationGoal):
     view_points: Optional[List[ObjectViewLocation]] = None
 
 
+class ObjectGoalList(List[ObjectGoal]):
+    r"""The goals of a :ref:`ObjectGoalNavEpisode.goals_key`, shared by all
+    the episodes with that key. The positions of the view points of all the
+    goals are packed into an array the first time they are needed, so that
+    measures don't have to gather them on every episode.
+
+    The packed arrays are not updated if the list is modified afterwards.
+    """
+
+    def __init__(self, goals: Iterable[ObjectGoal] = ()):
+        super().__init__(goals)
+        self._view_point_positions: Optional[np.ndarray] = None
+        self._view_point_goal_indices: Optional[np.ndarray] = None
+
+    def __getstate__(self):
+        # The packed arrays are rebuilt when needed instead of being sent
+        # along with every pickled episode
+        return {
+            "_view_point_positions": None,
+            "_view_point_goal_indices": None,
+        }
+
+    def _pack_view_points(self) -> None:
+        positions = []
+        goal_indices = []
+        for goal_index, goal in enumerate(self):
+            if goal.view_points is None:
+                continue
+            for view_point in goal.view_points:
+                positions.append(view_point.agent_state.position)
+            goal_indices.extend([goal_index] * len(goal.view_points))
+        self._view_point_positions = np.array(
+            positions, dtype=np.float32
+        ).reshape(-1, 3)
+        self._view_point_goal_indices = np.array(goal_indices, dtype=np.int32)
+
+    @property
+    def view_point_positions(self) -> np.ndarray:
+        r"""The :py:`(N, 3)` float32 positions of the view points of all the
+        goals.
+        """
+        if self._view_point_positions is None:
+            self._pack_view_points()
+        return self._view_point_positions
+
+    @property
+    def view_point_goal_indices(self) -> np.ndarray:
+        r"""The :py:`(N,)` index of the goal of every view point."""
+        if self._view_point_goal_indices is None:
+            self._pack_view_points()
+        return self._view_point_goal_indices
+
+
 @registry.register_sensor
 class ObjectGoalSensor(Sensor):
     r"""A sensor for Object Goal specification as observations which is used in
@@ -276,6 +276,7 @@ class RearrangeGraspManager:
         self.snap_rigid_obj.transformation = (
             self._managed_robot.ee_transform @ rel_T
         )
+        self._sim.clear_scene_pos_cache()
 
     def snap_to_obj(
         self,
@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 
 import os.path as osp
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import magnum as mn
@@ -27,6 +27,7 @@ from habitat.tasks.rearrange.rearrange_grasp_manager import (
 )
 from habitat.tasks.rearrange.robot_manager import RobotManager
 from habitat.tasks.rearrange.utils import (
+    NavmeshArtifacts,
     get_aabb,
     make_render_only,
     rearrange_collision,
@@ -37,6 +38,17 @@ from habitat_sim.physics import CollisionGroups, JointMotorSettings, MotionType
 from habitat_sim.sim import SimulatorBackend
 
 
+def _matrices_from_rows(transforms: List[Any]) -> List[mn.Matrix4]:
+    """
+    Converts the row-major (4, 4) transforms of the episodes to
+    :ref:`mn.Matrix4`, which are constructed from their columns.
+    """
+    if len(transforms) == 0:
+        return []
+    columns = np.asarray(transforms, dtype=np.float32).transpose(0, 2, 1)
+    return [mn.Matrix4(c) for c in columns.tolist()]
+
+
 @registry.register_simulator(name="RearrangeSim-v0")
 class RearrangeSim(HabitatSim):
     """
@@ -45,6 +57,9 @@ class RearrangeSim(HabitatSim):
 
     ref_handle_to_rigid_obj_id: Optional[Dict[str, int]]
 
+    # Maximum number of navmeshes whose artifacts are kept in memory
+    max_cached_navmeshes: int = 16
+
     def __init__(self, config: Config):
         if len(config.agents) > 1:
             with read_write(config):
@@ -66,6 +81,18 @@ class RearrangeSim(HabitatSim):
         self.ep_info: Optional[Config] = None
         self.prev_loaded_navmesh = None
         self.prev_scene_id = None
+        self._navmesh_artifacts: Optional[NavmeshArtifacts] = None
+        # Template handle of the objects added by the episodes, by their
+        # handle in the episode
+        self._obj_template_handles: Dict[str, str] = {}
+        self._num_indexed_templates = -1
+        # Positions of the scene objects, until an object may have moved
+        self._scene_pos: Optional[np.ndarray] = None
+        self._targets_idx: Optional[np.ndarray] = None
+        self._targets_pos: Optional[np.ndarray] = None
+        self._navmesh_artifacts_cache: "OrderedDict[str, NavmeshArtifacts]" = (
+            OrderedDict()
+        )
 
         # Number of physics updates per action
         self.ac_freq_ratio = self.habitat_config.ac_freq_ratio
@@ -172,6 +199,7 @@ class RearrangeSim(HabitatSim):
             m.update()
 
     def reset(self):
+        self.clear_scene_pos_cache()
         SimulatorBackend.reset(self)
         for i in range(len(self.agents)):
             self.reset_agent(i)
@@ -295,11 +323,18 @@ class RearrangeSim(HabitatSim):
         return start_pos, start_rot
 
     def _setup_targets(self):
-        self._targets = {}
-        for target_handle, transform in self.ep_info["targets"].items():
-            self._targets[target_handle] = mn.Matrix4(
-                [[transform[j][i] for j in range(4)] for i in range(4)]
+        self._targets = dict(
+            zip(
+                self.ep_info["targets"].keys(),
+                _matrices_from_rows(list(self.ep_info["targets"].values())),
             )
+        )
+        # The targets don't change during the episode.
+        target_trans = self._get_target_trans()
+        self._targets_idx = np.array([idx for idx, _ in target_trans])
+        self._targets_pos = np.array(
+            [np.array(trans.translation) for _, trans in target_trans]
+        )
 
     def _load_navmesh(self):
         scene_name = self.ep_info["scene_id"].split("/")[-1].split(".")[0]
@@ -308,13 +343,21 @@ class RearrangeSim(HabitatSim):
         navmesh_path = osp.join(base_dir, "navmeshes", scene_name + ".navmesh")
         self.pathfinder.load_nav_mesh(navmesh_path)
 
-        self._navmesh_vertices = np.stack(
-            self.pathfinder.build_navmesh_vertices(), axis=0
-        )
-        self._island_sizes = [
-            self.pathfinder.island_radius(p) for p in self._navmesh_vertices
-        ]
-        self._max_island_size = max(self._island_sizes)
+        artifacts = self._navmesh_artifacts_cache.pop(navmesh_path, None)
+        if artifacts is None:
+            artifacts = NavmeshArtifacts.load_or_compute(
+                self.pathfinder,
+                navmesh_path,
+                self.habitat_config.navmesh_cache_dir,
+            )
+        self._navmesh_artifacts_cache[navmesh_path] = artifacts
+        while len(self._navmesh_artifacts_cache) > self.max_cached_navmeshes:
+            self._navmesh_artifacts_cache.popitem(last=False)
+
+        self._navmesh_artifacts = artifacts
+        self._navmesh_vertices = artifacts.vertices
+        self._island_sizes = artifacts.island_sizes
+        self._max_island_size = artifacts.max_island_size
 
     def _clear_objects(self, should_add_objects: bool) -> None:
         rom = self.get_rigid_object_manager()
@@ -380,44 +423,55 @@ class RearrangeSim(HabitatSim):
 
         if np.isnan(new_pos[0]) or island_radius != self._max_island_size:
             # This is a last resort, take a navmesh vertex that is closest
-            use_verts = [
-                x
-                for s, x in zip(self._island_sizes, self._navmesh_vertices)
-                if s == self._max_island_size
-            ]
-            distances = np.linalg.norm(
-                np.array(pos).reshape(1, 3) - use_verts, axis=-1
+            new_pos = self._navmesh_artifacts.closest_largest_island_vertex(
+                pos
             )
-            closest_idx = np.argmin(distances)
-            new_pos = self._navmesh_vertices[closest_idx]
 
         return new_pos
 
+    def _get_obj_template_handle(self, obj_handle: str) -> str:
+        """
+        Template handle of an object of the episodes. Templates are matched
+        to the shortened handles of the episodes once, as long as no
+        template is added or removed.
+        """
+        obj_attr_mgr = self.get_object_template_manager()
+        num_templates = obj_attr_mgr.get_num_templates()
+        if num_templates != self._num_indexed_templates:
+            self._obj_template_handles = {}
+            self._num_indexed_templates = num_templates
+
+        if obj_handle not in self._obj_template_handles:
+            matching_templates = (
+                obj_attr_mgr.get_templates_by_handle_substring(obj_handle)
+            )
+            assert (
+                len(matching_templates.values()) == 1
+            ), f"Object attributes not uniquely matched to shortened handle. '{obj_handle}' matched to {matching_templates}. TODO: relative paths as handles should fix some duplicates. For now, try renaming objects to avoid collision."
+            self._obj_template_handles[obj_handle] = list(
+                matching_templates.keys()
+            )[0]
+        return self._obj_template_handles[obj_handle]
+
     def _add_objs(self, ep_info: Config, should_add_objects: bool) -> None:
         # Load clutter objects:
         # NOTE: ep_info["rigid_objs"]: List[Tuple[str, np.array]]  # list of objects, each with (handle, transform)
         rom = self.get_rigid_object_manager()
         obj_counts: Dict[str, int] = defaultdict(int)
+        self.clear_scene_pos_cache()
 
-        for i, (obj_handle, transform) in enumerate(ep_info["rigid_objs"]):
+        transforms = _matrices_from_rows(
+            [transform for _, transform in ep_info["rigid_objs"]]
+        )
+        for i, (obj_handle, _) in enumerate(ep_info["rigid_objs"]):
             if should_add_objects:
-                obj_attr_mgr = self.get_object_template_manager()
-                matching_templates = (
-                    obj_attr_mgr.get_templates_by_handle_substring(obj_handle)
-                )
-                assert (
-                    len(matching_templates.values()) == 1
-                ), f"Object attributes not uniquely matched to shortened handle. '{obj_handle}' matched to {matching_templates}. TODO: relative paths as handles should fix some duplicates. For now, try renaming objects to avoid collision."
                 ro = rom.add_object_by_template_handle(
-                    list(matching_templates.keys())[0]
+                    self._get_obj_template_handle(obj_handle)
                 )
             else:
                 ro = rom.get_object_by_id(self.scene_obj_ids[i])
 
-            # The saved matrices need to be flipped when reloading.
-            ro.transformation = mn.Matrix4(
-                [[transform[j][i] for j in range(4)] for i in range(4)]
-            )
+            ro.transformation = transforms[i]
             ro.angular_velocity = mn.Vector3.zero_init()
             ro.linear_velocity = mn.Vector3.zero_init()
 
@@ -576,6 +630,8 @@ class RearrangeSim(HabitatSim):
         for T, ao in zip(state["art_T"], self.art_objs):
             ao.transformation = T
 
+        self.clear_scene_pos_cache()
+
         for T, i in zip(state["static_T"], self.scene_obj_ids):
             # reset object transform
             obj = rom.get_object_by_id(i)
@@ -648,6 +704,8 @@ class RearrangeSim(HabitatSim):
         if self.habitat_config.habitat_sim_v0.enable_gfx_replay_save:
             self.gfx_replay_manager.save_keyframe()
         self.step_idx += 1
+        # Objects may also have been moved kinematically by the actions.
+        self.clear_scene_pos_cache()
 
         if self.habitat_config.needs_markers:
             self._update_markers()
@@ -720,6 +778,7 @@ class RearrangeSim(HabitatSim):
 
         Never call sim.step_world directly or miss updating the robot.
         """
+        self.clear_scene_pos_cache()
 
         # optionally step physics and update the robot for benchmarking purposes
         if self.habitat_config.step_physics:
@@ -733,12 +792,7 @@ class RearrangeSim(HabitatSim):
           Note that goal_pos is the desired position of the object, not the
           starting position.
         """
-        targ_idx, targ_trans = list(zip(*self._get_target_trans()))
-
-        a, b = np.array(targ_idx), [
-            np.array(x.translation) for x in targ_trans
-        ]
-        return a, np.array(b)
+        return self._targets_idx.copy(), self._targets_pos.copy()
 
     def get_n_targets(self) -> int:
         """Get the number of rearrange targets."""
@@ -749,11 +803,25 @@ class RearrangeSim(HabitatSim):
         return self.target_start_pos
 
     def get_scene_pos(self) -> np.ndarray:
-        """Get the positions of all clutter RigidObjects in the scene as a numpy array."""
-        rom = self.get_rigid_object_manager()
-        return np.array(
-            [
-                rom.get_object_by_id(idx).translation
-                for idx in self.scene_obj_ids
-            ]
-        )
+        """Get the positions of all clutter RigidObjects in the scene as a numpy array.
+
+        The positions are read from the simulator once per step, the
+        returned array is read-only.
+        """
+        if self._scene_pos is None:
+            rom = self.get_rigid_object_manager()
+            self._scene_pos = np.array(
+                [
+                    rom.get_object_by_id(idx).translation
+                    for idx in self.scene_obj_ids
+                ]
+            )
+            self._scene_pos.flags.writeable = False
+        return self._scene_pos
+
+    def clear_scene_pos_cache(self) -> None:
+        """Must be called after moving scene objects outside of
+        :ref:`step`, :ref:`internal_step` and :ref:`set_state`, so that
+        :ref:`get_scene_pos` reads the new positions.
+        """
+        self._scene_pos = None
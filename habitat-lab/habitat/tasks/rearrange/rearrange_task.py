@@ -7,7 +7,7 @@
 import copy
 import os.path as osp
 from collections import OrderedDict
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Union
 
 import numpy as np
 from gym import spaces
@@ -19,8 +19,9 @@ from habitat.core.simulator import Sensor, SensorSuite
 from habitat.tasks.nav.nav import NavigationTask
 from habitat.tasks.rearrange.rearrange_sim import RearrangeSim
 from habitat.tasks.rearrange.utils import (
-    CacheHelper,
     CollisionDetails,
+    ContactArrays,
+    StartStateCache,
     UsesRobotInterface,
     rearrange_collision,
     rearrange_logger,
@@ -44,7 +45,7 @@ class RearrangeTask(NavigationTask):
     """
 
     _cur_episode_step: int
-    _robot_pos_start: Dict[str, Tuple[np.ndarray, float]]
+    _robot_pos_start: Optional[StartStateCache]
 
     def overwrite_sim_config(self, sim_config, episode):
         return merge_sim_episode_with_object_config(sim_config, episode)
@@ -87,17 +88,18 @@ class RearrangeTask(NavigationTask):
 
         data_path = dataset.config.data_path.format(split=dataset.config.split)
         fname = data_path.split("/")[-1].split(".")[0]
-        cache_path = osp.join(
-            osp.dirname(data_path), f"{fname}_robot_start.pickle"
-        )
+        cache_path = osp.join(osp.dirname(data_path), f"{fname}_robot_start")
 
-        if self._config.cache_robot_init or osp.exists(cache_path):
-            self._robot_init_cache = CacheHelper(
-                cache_path,
-                def_val={},
-                verbose=False,
+        if (
+            self._config.cache_robot_init
+            or osp.exists(cache_path + ".db")
+            or osp.exists(cache_path + ".pickle")
+        ):
+            self._robot_pos_start = StartStateCache(
+                cache_path + ".db",
+                should_save=self._config.should_save_to_cache,
+                legacy_cache_file=cache_path + ".pickle",
             )
-            self._robot_pos_start = self._robot_init_cache.load()
         else:
             self._robot_pos_start = None
 
@@ -135,12 +137,8 @@ class RearrangeTask(NavigationTask):
             robot_pos, robot_rot = self._sim.set_robot_base_to_random_point(
                 agent_idx=agent_idx
             )
-            if (
-                self._robot_pos_start is not None
-                and self._config.should_save_to_cache
-            ):
+            if self._robot_pos_start is not None:
                 self._robot_pos_start[start_ident] = (robot_pos, robot_rot)
-                self._robot_init_cache.save(self._robot_pos_start)
         else:
             robot_pos, robot_rot = self._robot_pos_start[start_ident]
         robot = self._sim.get_robot_data(agent_idx).robot
@@ -229,36 +227,22 @@ class RearrangeTask(NavigationTask):
         robot = self._sim.get_robot_data(robot_id).robot
         snapped_obj = grasp_mgr.snap_idx
         robot_id = robot.sim_obj.object_id
-        contact_points = self._sim.get_physics_contact_points()
-
-        def get_max_force(contact_points, check_id):
-            match_contacts = [
-                x
-                for x in contact_points
-                if check_id in [x.object_id_a, x.object_id_b]
-            ]
-            match_contacts = [
-                x for x in match_contacts if x.object_id_a != x.object_id_b
-            ]
-
-            max_force = 0
-            if len(match_contacts) > 0:
-                max_force = max([abs(x.normal_force) for x in match_contacts])
-
-            return max_force
-
-        forces = [
-            abs(x.normal_force)
-            for x in contact_points
-            if (
-                x.object_id_a not in self._ignore_collisions
-                and x.object_id_b not in self._ignore_collisions
-            )
-        ]
-        max_force = max(forces) if len(forces) > 0 else 0
+        contacts = ContactArrays.from_sim(self._sim)
+        # Self collisions don't count towards the forces of an object.
+        not_self = contacts.object_id_a != contacts.object_id_b
+
+        max_force = contacts.max_force(
+            ~contacts.involves(self._ignore_collisions)
+        )
 
-        max_obj_force = get_max_force(contact_points, snapped_obj)
-        max_robot_force = get_max_force(contact_points, robot_id)
+        max_obj_force = 0
+        if snapped_obj is not None:
+            max_obj_force = contacts.max_force(
+                not_self & contacts.involves(snapped_obj)
+            )
+        max_robot_force = contacts.max_force(
+            not_self & contacts.involves(robot_id)
+        )
         return max_robot_force, max_obj_force, max_force
 
     def get_cur_collision_info(self, agent_idx) -> CollisionDetails:
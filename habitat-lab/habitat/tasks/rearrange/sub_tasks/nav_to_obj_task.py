@@ -24,7 +24,7 @@ from habitat.tasks.rearrange.multi_task.rearrange_pddl import (
     PddlEntity,
 )
 from habitat.tasks.rearrange.rearrange_task import ADD_CACHE_KEY, RearrangeTask
-from habitat.tasks.rearrange.utils import CacheHelper, rearrange_logger
+from habitat.tasks.rearrange.utils import StartStateCache, rearrange_logger
 
 
 @dataclass
@@ -62,12 +62,12 @@ class DynNavRLEnv(RearrangeTask):
         data_path = dataset.config.data_path.format(split=dataset.config.split)
         fname = data_path.split("/")[-1].split(".")[0]
         save_dir = osp.dirname(data_path)
-        self.cache = CacheHelper(
-            osp.join(save_dir, f"{fname}_{config.type}_start.pickle"),
-            def_val={},
-            verbose=False,
+        cache_path = osp.join(save_dir, f"{fname}_{config.type}_start")
+        self.start_states = StartStateCache(
+            cache_path + ".db",
+            should_save=config.should_save_to_cache,
+            legacy_cache_file=cache_path + ".pickle",
         )
-        self.start_states = self.cache.load()
 
         task_spec_path = osp.join(
             self._config.task_spec_base_path,
@@ -262,7 +262,7 @@ class DynNavRLEnv(RearrangeTask):
             ):
                 self._nav_to_info = self.start_states[full_key]
                 rearrange_logger.debug(
-                    f"Forcing episode, loaded `{full_key}` from cache {self.cache.cache_id}."
+                    f"Forcing episode, loaded `{full_key}` from cache {self.start_states.cache_id}."
                 )
                 if not isinstance(self._nav_to_info, NavToInfo):
                     rearrange_logger.warning(  # type: ignore[unreachable]
@@ -274,10 +274,9 @@ class DynNavRLEnv(RearrangeTask):
                 self._nav_to_info = self._get_force_nav_start_info(episode)
 
                 self.start_states[full_key] = self._nav_to_info
-                if self._config.should_save_to_cache:
-                    self.cache.save(self.start_states)
+                if self.start_states.should_save:
                     rearrange_logger.debug(
-                        f"Forcing episode, saved key `{full_key}` to cache {self.cache.cache_id}."
+                        f"Forcing episode, saved key `{full_key}` to cache {self.start_states.cache_id}."
                     )
         else:
             if (
@@ -297,7 +296,7 @@ class DynNavRLEnv(RearrangeTask):
                     self._nav_to_info = None
                 else:
                     rearrange_logger.debug(
-                        f"Loaded episode from cache {self.cache.cache_id}."
+                        f"Loaded episode from cache {self.start_states.cache_id}."
                     )
 
             if (
@@ -313,10 +312,9 @@ class DynNavRLEnv(RearrangeTask):
             if self._nav_to_info is None:
                 self._nav_to_info = self._generate_nav_start_goal(episode)
                 self.start_states[episode_id] = self._nav_to_info
-                if self._config.should_save_to_cache:
-                    self.cache.save(self.start_states)
+                if self.start_states.should_save:
                     rearrange_logger.debug(
-                        f"Saved episode to cache {self.cache.cache_id}."
+                        f"Saved episode to cache {self.start_states.cache_id}."
                     )
             sim.robot.base_pos = self._nav_to_info.start_base_pos
             sim.robot.base_rot = self._nav_to_info.start_base_rot
@@ -15,7 +15,7 @@ from habitat.core.registry import registry
 from habitat.datasets.rearrange.rearrange_dataset import RearrangeEpisode
 from habitat.tasks.rearrange.rearrange_task import ADD_CACHE_KEY, RearrangeTask
 from habitat.tasks.rearrange.utils import (
-    CacheHelper,
+    StartStateCache,
     rearrange_collision,
     rearrange_logger,
 )
@@ -35,12 +35,12 @@ class RearrangePickTaskV1(RearrangeTask):
 
         fname = data_path.split("/")[-1].split(".")[0]
         save_dir = osp.dirname(data_path)
-        self.cache = CacheHelper(
-            osp.join(save_dir, f"{fname}_{config.type}_start.pickle"),
-            def_val={},
-            verbose=False,
+        cache_path = osp.join(save_dir, f"{fname}_{config.type}_start")
+        self.start_states = StartStateCache(
+            cache_path + ".db",
+            should_save=config.should_save_to_cache,
+            legacy_cache_file=cache_path + ".pickle",
         )
-        self.start_states = self.cache.load()
         self.prev_colls = None
         self.force_set_idx = None
         self._add_cache_key: str = ""
@@ -274,8 +274,6 @@ class RearrangePickTaskV1(RearrangeTask):
             )
             rearrange_logger.debug(f"Finished creating init for {self}")
             self.start_states[cache_lookup_k] = (start_pos, start_rot, sel_idx)
-            if self._config.should_save_to_cache:
-                self.cache.save(self.start_states)
 
         sim.robot.base_pos = start_pos
         sim.robot.base_rot = start_rot
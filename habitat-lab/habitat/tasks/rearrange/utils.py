@@ -4,17 +4,20 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import hashlib
 import logging
 import os
 import os.path as osp
 import pickle
+import sqlite3
 import time
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import attr
 import magnum as mn
 import numpy as np
 import quaternion
+from scipy.spatial import cKDTree
 
 import habitat_sim
 from habitat.core.logging import HabitatLogger
@@ -58,6 +61,63 @@ def get_match_link(coll, name):
     return None
 
 
+class ContactArrays:
+    """
+    The contact points of the simulator, converted to arrays in a single
+    pass, so that they are filtered with array operations instead of Python
+    loops over the contacts.
+    """
+
+    def __init__(self, contact_points: List[Any]):
+        values = np.array(
+            [
+                (
+                    c.object_id_a,
+                    c.object_id_b,
+                    c.link_id_a,
+                    c.link_id_b,
+                    c.normal_force,
+                )
+                for c in contact_points
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 5)
+        self.object_id_a = values[:, 0].astype(np.int64)
+        self.object_id_b = values[:, 1].astype(np.int64)
+        self.link_id_a = values[:, 2].astype(np.int64)
+        self.link_id_b = values[:, 3].astype(np.int64)
+        self.normal_force = values[:, 4]
+
+    @classmethod
+    def from_sim(cls, sim) -> "ContactArrays":
+        return cls(sim.get_physics_contact_points())
+
+    def __len__(self) -> int:
+        return len(self.normal_force)
+
+    def involves(self, obj_ids: Union[int, Iterable[int]]) -> np.ndarray:
+        """
+        Mask of the contacts between one of :p:`obj_ids` and any object.
+        """
+        obj_ids = np.array(
+            list(obj_ids) if isinstance(obj_ids, Iterable) else [obj_ids],
+            dtype=np.int64,
+        )
+        return np.isin(self.object_id_a, obj_ids) | np.isin(
+            self.object_id_b, obj_ids
+        )
+
+    def max_force(self, mask: Optional[np.ndarray] = None) -> float:
+        """
+        Maximum absolute normal force of the contacts of :p:`mask`, 0 if
+        there are none.
+        """
+        forces = self.normal_force if mask is None else self.normal_force[mask]
+        if len(forces) == 0:
+            return 0
+        return float(np.abs(forces).max())
+
+
 @attr.s(auto_attribs=True, kw_only=True)
 class CollisionDetails:
     obj_scene_colls: int = 0
@@ -96,64 +156,54 @@ def rearrange_collision(
     """Defines what counts as a collision for the Rearrange environment execution"""
     robot_model = sim.get_robot_data(agent_idx).robot
     grasp_mgr = sim.get_robot_data(agent_idx).grasp_mgr
-    colls = sim.get_physics_contact_points()
+    colls = ContactArrays.from_sim(sim)
     robot_id = robot_model.get_robot_sim_id()
     added_objs = sim.scene_obj_ids
     snapped_obj_id = grasp_mgr.snap_idx
 
-    def should_keep(x):
-        if ignore_base:
-            match_link = get_match_link(x, robot_id)
-            if match_link is not None and robot_model.is_base_link(match_link):
-                return False
-
-        if ignore_names is not None:
-            should_ignore = any(
-                coll_name_matches(x, ignore_name)
-                for ignore_name in ignore_names
-            )
-            if should_ignore:
-                return False
-        return True
-
     # Filter out any collisions with the ignore objects
-    colls = list(filter(should_keep, colls))
-    robot_coll_ids = []
+    robot_is_a = colls.object_id_a == robot_id
+    is_robot = robot_is_a | (colls.object_id_b == robot_id)
+    keep = np.ones(len(colls), dtype=bool)
+    if ignore_base and is_robot.any():
+        robot_links = np.where(robot_is_a, colls.link_id_a, colls.link_id_b)
+        base_links = [
+            link
+            for link in np.unique(robot_links[is_robot])
+            if robot_model.is_base_link(int(link))
+        ]
+        keep &= ~(is_robot & np.isin(robot_links, base_links))
+    if ignore_names is not None:
+        keep &= ~colls.involves(ignore_names)
 
     # Check for robot collision
-    robot_obj_colls = 0
-    robot_scene_colls = 0
-    robot_scene_matches = [c for c in colls if coll_name_matches(c, robot_id)]
-    for match in robot_scene_matches:
-        reg_obj_coll = any(
-            [coll_name_matches(match, obj_id) for obj_id in added_objs]
-        )
-        if reg_obj_coll:
-            robot_obj_colls += 1
-        else:
-            robot_scene_colls += 1
-
-        if match.object_id_a == robot_id:
-            robot_coll_ids.append(match.object_id_b)
-        else:
-            robot_coll_ids.append(match.object_id_a)
+    robot_matches = keep & is_robot
+    reg_obj_coll = colls.involves(added_objs)
+    robot_obj_colls = int((robot_matches & reg_obj_coll).sum())
+    robot_scene_colls = int((robot_matches & ~reg_obj_coll).sum())
 
     # Checking for holding object collision
     obj_scene_colls = 0
     if count_obj_colls and snapped_obj_id is not None:
-        matches = [c for c in colls if coll_name_matches(c, snapped_obj_id)]
-        for match in matches:
-            if coll_name_matches(match, robot_id):
-                continue
-            obj_scene_colls += 1
+        obj_scene_colls = int(
+            (keep & colls.involves(snapped_obj_id) & ~is_robot).sum()
+        )
 
     if get_extra_coll_data:
+        robot_coll_ids = np.where(
+            robot_is_a, colls.object_id_b, colls.object_id_a
+        )[robot_matches]
         coll_details = CollisionDetails(
             obj_scene_colls=min(obj_scene_colls, 1),
             robot_obj_colls=min(robot_obj_colls, 1),
             robot_scene_colls=min(robot_scene_colls, 1),
-            robot_coll_ids=robot_coll_ids,
-            all_colls=[(x.object_id_a, x.object_id_b) for x in colls],
+            robot_coll_ids=robot_coll_ids.tolist(),
+            all_colls=list(
+                zip(
+                    colls.object_id_a[keep].tolist(),
+                    colls.object_id_b[keep].tolist(),
+                )
+            ),
         )
     else:
         coll_details = CollisionDetails(
@@ -247,11 +297,301 @@ class CacheHelper:
             time.sleep(1.0 + np.random.uniform(0.0, 1.0))
             return self.load(load_depth + 1)
 
+    def try_load(self):
+        """
+        Loads the cache without waiting, returns the default value if it
+        doesn't exist or can't be unpickled.
+        """
+        if not self.exists():
+            return self.def_val
+        try:
+            with open(self.cache_id, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            rearrange_logger.warning(
+                f"Could not read the cache @ {self.cache_id}: {e}"
+            )
+            return self.def_val
+
     def save(self, val):
-        with open(self.cache_id, "wb") as f:
-            if self.verbose:
-                rearrange_logger.info(f"Saving cache @ {self.cache_id}")
-            pickle.dump(val, f)
+        # Write to a temporary file in the same directory and move it into
+        # place, so that other processes never read a partially written cache
+        tmp_path = f"{self.cache_id}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                if self.verbose:
+                    rearrange_logger.info(f"Saving cache @ {self.cache_id}")
+                pickle.dump(val, f)
+            os.replace(tmp_path, self.cache_id)
+        finally:
+            if osp.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class StartStateCache:
+    r"""Key-value cache of the start states generated by the rearrange
+    tasks, stored in an SQLite database so that several processes can use
+    the same cache file.
+
+    Every :ref:`__setitem__` atomically writes a single entry, instead of
+    re-pickling the whole cache like :ref:`CacheHelper`, and readers are
+    never blocked by writers. Keys missing from the values read so far are
+    looked up in the database, so entries written by other processes are
+    found too.
+
+    :param cache_file: Path of the database, created if needed.
+    :param should_save: Write new entries to the database. They are only
+        kept in memory otherwise.
+    :param legacy_cache_file: Pickle file written by :ref:`CacheHelper` for
+        the same cache, imported when the database is first created.
+    """
+
+    def __init__(
+        self,
+        cache_file: str,
+        should_save: bool = True,
+        legacy_cache_file: Optional[str] = None,
+    ):
+        self.cache_id = cache_file
+        self.should_save = should_save
+        self.legacy_cache_file = legacy_cache_file
+        self._legacy_loaded = False
+        self._values: Dict[str, Any] = {}
+        # Entries set while not saving, see pop_unsaved
+        self._unsaved: Dict[str, Any] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        # Connections can't be shared with forked processes
+        self._conn_pid: Optional[int] = None
+        self._connect()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_conn_pid"] = None
+        return state
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            return self._conn
+        is_new = not osp.exists(self.cache_id)
+        if is_new and not self.should_save:
+            if self.legacy_cache_file is not None and not self._legacy_loaded:
+                self._values.update(
+                    CacheHelper(self.legacy_cache_file, def_val={}).load()
+                )
+                self._legacy_loaded = True
+            return None
+        try:
+            conn = sqlite3.connect(self.cache_id, timeout=60.0)
+            try:
+                # Readers don't wait for writers with write-ahead logging
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.OperationalError:
+                pass
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS start_states"
+                    " (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+                )
+        except sqlite3.OperationalError as e:
+            rearrange_logger.warning(
+                f"Could not open the start state cache @ {self.cache_id}, only caching in memory: {e}"
+            )
+            self.should_save = False
+            return None
+        self._conn = conn
+        self._conn_pid = os.getpid()
+        if (
+            is_new
+            and self.legacy_cache_file is not None
+            and osp.exists(self.legacy_cache_file)
+        ):
+            self.update(
+                CacheHelper(self.legacy_cache_file, def_val={}).load(),
+                overwrite=False,
+            )
+        return conn
+
+    def _read(self, key: str) -> bool:
+        conn = self._connect()
+        if conn is None:
+            return False
+        row = conn.execute(
+            "SELECT value FROM start_states WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return False
+        self._values[key] = pickle.loads(row[0])
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values or self._read(key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return self._values[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.update({key: value})
+
+    def update(self, values: Dict[str, Any], overwrite: bool = True) -> None:
+        r"""Sets all the entries of :p:`values`, written to the database in
+        a single transaction. Existing entries are kept when :p:`overwrite`
+        is False.
+        """
+        conn = self._connect() if self.should_save else None
+        if conn is not None:
+            rows = [
+                (k, pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL))
+                for k, v in values.items()
+            ]
+            with conn:
+                conn.executemany(
+                    ("REPLACE" if overwrite else "INSERT OR IGNORE")
+                    + " INTO start_states (key, value) VALUES (?, ?)",
+                    rows,
+                )
+        for k, v in values.items():
+            if overwrite or k not in self._values:
+                self._values[k] = v
+                if conn is None:
+                    self._unsaved[k] = v
+
+    def pop_unsaved(self) -> Dict[str, Any]:
+        r"""Returns the entries set since the last call without being
+        written to the database, so that another process can write them.
+        """
+        unsaved, self._unsaved = self._unsaved, {}
+        return unsaved
+
+    def keys(self) -> List[str]:
+        r"""All the keys of the cache, including the ones written by other
+        processes.
+        """
+        conn = self._connect()
+        if conn is None:
+            return list(self._values.keys())
+        stored = [k for (k,) in conn.execute("SELECT key FROM start_states")]
+        stored_set = set(stored)
+        return stored + [k for k in self._values if k not in stored_set]
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def close(self) -> None:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._conn_pid = None
+
+
+class NavmeshArtifacts:
+    r"""Data derived from a navmesh that is slow to compute from Python: the
+    navmesh vertices, the island of each vertex (islands are identified by
+    their radius, as in :ref:`RearrangeSim.safe_snap_point`) and a KD-tree
+    over the vertices of the largest island.
+
+    :ref:`load_or_compute` computes it once per navmesh and caches it to a
+    file keyed by the hash of the navmesh file, so that loading the scene
+    again, in this or another process, only reads the cache.
+    """
+
+    def __init__(
+        self, navmesh_hash: str, vertices: np.ndarray, island_sizes: np.ndarray
+    ):
+        self.navmesh_hash = navmesh_hash
+        self.vertices = vertices
+        # Island radius of each vertex
+        self.island_sizes = island_sizes
+        # Radius of each island, and index of the island of each vertex
+        self.island_radii, self.island_ids = np.unique(
+            island_sizes, return_inverse=True
+        )
+        self.max_island_size = float(self.island_radii[-1])
+        self.largest_island_vertices = vertices[
+            island_sizes == self.max_island_size
+        ]
+        self._largest_island_tree = cKDTree(self.largest_island_vertices)
+
+    @classmethod
+    def compute(
+        cls, pathfinder: "habitat_sim.PathFinder", navmesh_hash: str
+    ) -> "NavmeshArtifacts":
+        vertices = np.stack(pathfinder.build_navmesh_vertices(), axis=0)
+        island_sizes = np.array(
+            [pathfinder.island_radius(p) for p in vertices], dtype=np.float64
+        )
+        return cls(navmesh_hash, vertices, island_sizes)
+
+    def closest_largest_island_vertex(self, pos: np.ndarray) -> np.ndarray:
+        r"""Navmesh vertex of the largest island closest to :p:`pos`."""
+        _, idx = self._largest_island_tree.query(
+            np.asarray(pos, dtype=np.float64).reshape(3)
+        )
+        return self.largest_island_vertices[idx]
+
+    @staticmethod
+    def cache_path(navmesh_path: str, cache_dir: Optional[str] = None) -> str:
+        r"""Path of the cache file of :p:`navmesh_path`, next to it when
+        :p:`cache_dir` is not specified. In :p:`cache_dir`, the file name
+        includes a digest of the absolute navmesh path, since navmeshes of
+        different scene datasets often have the same file name.
+        """
+        if cache_dir is None:
+            return navmesh_path + ".artifacts.pickle"
+        path_digest = hashlib.sha1(
+            osp.abspath(navmesh_path).encode("utf-8")
+        ).hexdigest()[:16]
+        return osp.join(
+            cache_dir,
+            f"{osp.basename(navmesh_path)}.{path_digest}.artifacts.pickle",
+        )
+
+    @classmethod
+    def load_or_compute(
+        cls,
+        pathfinder: "habitat_sim.PathFinder",
+        navmesh_path: str,
+        cache_dir: Optional[str] = None,
+    ) -> "NavmeshArtifacts":
+        r"""Loads the artifacts of the navmesh from its cache file, or
+        computes them from :p:`pathfinder` (on which the navmesh at
+        :p:`navmesh_path` must be loaded) and saves them to the cache file.
+        A cache file written for a different version of the navmesh is
+        overwritten.
+        """
+        with open(navmesh_path, "rb") as f:
+            navmesh_hash = hashlib.sha1(f.read()).hexdigest()
+        cache = CacheHelper(cls.cache_path(navmesh_path, cache_dir))
+        cached = cache.try_load()
+        if (
+            isinstance(cached, dict)
+            and cached.get("navmesh_hash") == navmesh_hash
+        ):
+            return cls(
+                navmesh_hash, cached["vertices"], cached["island_sizes"]
+            )
+
+        artifacts = cls.compute(pathfinder, navmesh_hash)
+        try:
+            if cache_dir is not None:
+                os.makedirs(cache_dir, exist_ok=True)
+            cache.save(
+                {
+                    "navmesh_hash": navmesh_hash,
+                    "vertices": artifacts.vertices,
+                    "island_sizes": artifacts.island_sizes,
+                }
+            )
+        except OSError as e:
+            rearrange_logger.warning(
+                f"Could not save the navmesh cache @ {cache.cache_id}: {e}"
+            )
+        return artifacts
 
 
 def batch_transform_point(
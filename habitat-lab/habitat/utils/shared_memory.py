@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+r"""Shared-memory transport for the observations of :ref:`VectorEnv` workers.
+
+Every fixed-shape :ref:`spaces.Box` entry of an environment's observation
+space gets a preallocated region in a single shared-memory segment per
+environment. Workers copy their observations into that segment and only send
+a small :ref:`SharedObservationsHeader` through the pipe, the parent process
+then hands out NumPy views into the segment instead of unpickled copies.
+
+The actions of :ref:`VectorEnv.async_step_batch` go the other way, through a
+:ref:`SharedActionBuffer` per environment.
+"""
+
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import attr
+import numpy as np
+from gym import spaces
+
+# Each observation lives in one of ``NUM_SLOTS`` alternating slots so that
+# the views returned for a step stay valid while the next step is computed.
+NUM_SLOTS = 2
+_ALIGNMENT = 64
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class SharedObservationSpec:
+    r"""Location of a single observation inside the shared-memory segment."""
+    key: str
+    shape: Tuple[int, ...]
+    dtype: str
+    offset: int
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+
+@attr.s(auto_attribs=True, slots=True)
+class SharedObservationsHeader:
+    r"""What is sent over the pipe in place of the observations dict.
+
+    :property slot: slot of the shared-memory segment the worker wrote into.
+    :property shared_keys: keys whose values were written to shared memory.
+    :property other: observations that could not be written to shared memory
+        (wrong shape/dtype or not a :ref:`spaces.Box`) and are pickled as usual.
+    """
+    slot: int
+    shared_keys: Tuple[str, ...]
+    other: Dict[str, Any]
+
+
+def _align(nbytes: int) -> int:
+    return (nbytes + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def start_resource_tracker() -> None:
+    r"""Starts the resource tracker of the current process. Must be called
+    before starting the worker processes so that forked workers share it
+    instead of starting their own, which would unlink the segments when the
+    workers exit.
+    """
+    from multiprocessing import resource_tracker
+
+    resource_tracker.ensure_running()
+
+
+def _close(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # Views of the observations are still referenced somewhere, the
+        # mapping will be released once they are garbage collected.
+        pass
+
+
+def build_observation_specs(
+    observation_space: spaces.Space,
+) -> Tuple[List[SharedObservationSpec], int]:
+    r"""Computes the layout of a single slot for the given observation space.
+
+    :return: the specs of the observations that can be shared and the size in
+        bytes of a single slot.
+    """
+    specs: List[SharedObservationSpec] = []
+    offset = 0
+    if not isinstance(observation_space, spaces.Dict):
+        return specs, offset
+
+    for key, space in observation_space.spaces.items():
+        if (
+            not isinstance(space, spaces.Box)
+            or space.shape is None
+            or np.dtype(space.dtype).hasobject
+        ):
+            continue
+        spec = SharedObservationSpec(
+            key=key,
+            shape=tuple(int(s) for s in space.shape),
+            dtype=np.dtype(space.dtype).str,
+            offset=offset,
+        )
+        specs.append(spec)
+        offset += _align(spec.nbytes)
+
+    return specs, offset
+
+
+def _slot_views(
+    shm: shared_memory.SharedMemory,
+    specs: List[SharedObservationSpec],
+    slot_nbytes: int,
+) -> List[Dict[str, np.ndarray]]:
+    return [
+        {
+            spec.key: np.ndarray(
+                spec.shape,
+                dtype=np.dtype(spec.dtype),
+                buffer=shm.buf,
+                offset=slot * slot_nbytes + spec.offset,
+            )
+            for spec in specs
+        }
+        for slot in range(NUM_SLOTS)
+    ]
+
+
+class SharedObservationBuffers:
+    r"""Owner of the shared-memory segment of a single environment. Lives in
+    the parent process, which creates and eventually unlinks the segment.
+    """
+
+    def __init__(self, observation_space: spaces.Space):
+        self.specs, self.slot_nbytes = build_observation_specs(
+            observation_space
+        )
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._views: List[Dict[str, np.ndarray]] = []
+        if len(self.specs) > 0:
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=NUM_SLOTS * self.slot_nbytes
+            )
+            self._views = _slot_views(self._shm, self.specs, self.slot_nbytes)
+
+    @property
+    def is_active(self) -> bool:
+        return self._shm is not None
+
+    def worker_args(self) -> Tuple[str, List[SharedObservationSpec], int]:
+        r"""Arguments needed by a :ref:`SharedObservationWriter` to attach
+        to this segment.
+        """
+        assert self._shm is not None
+        return self._shm.name, self.specs, self.slot_nbytes
+
+    def read(self, header: SharedObservationsHeader) -> Dict[str, Any]:
+        r"""Rebuilds the observations dict from a header. Shared entries are
+        zero-copy views that stay valid until the environment has been
+        stepped (or reset) :py:`NUM_SLOTS` more times.
+        """
+        views = self._views[header.slot]
+        observations = {k: views[k] for k in header.shared_keys}
+        observations.update(header.other)
+        return observations
+
+    def restore(self, result: Any) -> Any:
+        r"""Replaces the header in the result of a step or reset command by
+        the observations it refers to. Any other result is returned as is.
+        """
+        if isinstance(result, SharedObservationsHeader):
+            return self.read(result)
+        if (
+            isinstance(result, tuple)
+            and len(result) > 0
+            and isinstance(result[0], SharedObservationsHeader)
+        ):
+            return (self.read(result[0]),) + result[1:]
+        return result
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._views = []
+        _close(self._shm)
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+
+
+class SharedObservationWriter:
+    r"""Worker side of :ref:`SharedObservationBuffers`."""
+
+    def __init__(
+        self,
+        name: str,
+        specs: List[SharedObservationSpec],
+        slot_nbytes: int,
+    ):
+        # Worker processes share the resource tracker of the parent process,
+        # so attaching doesn't change who is responsible for unlinking
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._views = _slot_views(self._shm, specs, slot_nbytes)
+        self._slot = 0
+
+    def write(self, observations: Dict[str, Any]) -> SharedObservationsHeader:
+        r"""Copies the shareable observations into the next slot and returns
+        the header to send to the parent process in their place.
+        """
+        slot = self._slot
+        self._slot = (self._slot + 1) % NUM_SLOTS
+        views = self._views[slot]
+
+        shared_keys = []
+        other = {}
+        for k, v in observations.items():
+            buf = views.get(k, None)
+            if (
+                buf is not None
+                and isinstance(v, np.ndarray)
+                and v.shape == buf.shape
+                and v.dtype == buf.dtype
+            ):
+                np.copyto(buf, v)
+                shared_keys.append(k)
+            else:
+                other[k] = v
+
+        return SharedObservationsHeader(
+            slot=slot, shared_keys=tuple(shared_keys), other=other
+        )
+
+    def close(self) -> None:
+        self._views = []
+        _close(self._shm)
+
+
+def action_from_row(row: np.ndarray) -> Union[int, np.ndarray]:
+    r"""Converts a row of a batch of actions to the action of a single
+    environment: a single integer is a discrete action and is returned as a
+    python :py:`int`, anything else is returned as an array.
+    """
+    if row.size == 1 and np.issubdtype(row.dtype, np.integer):
+        return row.item()
+    return row
+
+
+class SharedActionBuffer:
+    r"""Shared-memory segment holding the next action of a single
+    environment. Lives in the parent process, which creates and eventually
+    unlinks the segment. A single slot is enough as the parent only writes
+    a new action once the worker has returned the result of the previous
+    one.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype: Any):
+        self.shape = tuple(int(s) for s in shape)
+        self.dtype = np.dtype(dtype).str
+        nbytes = int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+        self._shm: Optional[
+            shared_memory.SharedMemory
+        ] = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        self._view: Optional[np.ndarray] = np.ndarray(
+            self.shape, dtype=np.dtype(self.dtype), buffer=self._shm.buf
+        )
+
+    def matches(self, action: np.ndarray) -> bool:
+        return action.shape == self.shape and action.dtype == np.dtype(
+            self.dtype
+        )
+
+    def write(self, action: np.ndarray) -> None:
+        assert self._view is not None
+        np.copyto(self._view, action)
+
+    def worker_args(self) -> Tuple[str, Tuple[int, ...], str]:
+        r"""Arguments needed by a :ref:`SharedActionReader` to attach to
+        this segment.
+        """
+        assert self._shm is not None
+        return self._shm.name, self.shape, self.dtype
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._view = None
+        _close(self._shm)
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+
+
+class SharedActionReader:
+    r"""Worker side of :ref:`SharedActionBuffer`."""
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str):
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._view: Optional[np.ndarray] = np.ndarray(
+            shape, dtype=np.dtype(dtype), buffer=self._shm.buf
+        )
+
+    def read(self) -> Union[int, np.ndarray]:
+        r"""Returns a copy of the current action, converted with
+        :ref:`action_from_row`.
+        """
+        assert self._view is not None
+        return action_from_row(self._view.copy())
+
+    def close(self) -> None:
+        self._view = None
+        _close(self._shm)
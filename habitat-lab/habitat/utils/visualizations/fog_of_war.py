@@ -126,6 +126,7 @@ def reveal_fog_of_war(
     current_angle: float,
     fov: float = 90,
     max_line_len: float = 100,
+    inplace: bool = False,
 ) -> np.ndarray:
     r"""Reveals the fog-of-war at the current location
 
@@ -139,6 +140,9 @@ def reveal_fog_of_war(
         current_angle: The current look direction of the agent on the fog_of_war_mask
         fov: The feild of view of the agent
         max_line_len: The maximum length of the lines used to reveal the fog-of-war
+        inplace: Whether to reveal the fog-of-war on current_fog_of_war_mask
+            itself instead of on a copy. Only the revealed pixels are written,
+            so this avoids copying the whole mask on every update
 
     Returns:
         The updated fog_of_war_mask
@@ -150,7 +154,10 @@ def reveal_fog_of_war(
         -fov / 2, fov / 2, step=1.0 / max_line_len, dtype=np.float32
     )
 
-    fog_of_war_mask = current_fog_of_war_mask.copy()
+    if inplace:
+        fog_of_war_mask = current_fog_of_war_mask
+    else:
+        fog_of_war_mask = current_fog_of_war_mask.copy()
     _draw_loop(
         top_down_map,
         fog_of_war_mask,
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+r"""Microbenchmark of the queue backends available to VER. Every producer
+process plays the role of an environment worker and puts its index in the
+queue, either one message at a time (``put``) or in batches
+(``put_many``), while the main process plays the role of the inference
+worker and reads them with ``get_many``. For example:
+```
+python scripts/ver_queue_benchmark.py --num-producers 16 --num-messages 20000
+```
+"""
+
+import argparse
+import multiprocessing
+import time
+from typing import Callable, Dict
+
+from habitat_baselines.rl.ver.queue import (
+    MultiprocessingBatchedQueue,
+    RingBufferQueue,
+    use_faster_fifo,
+)
+
+QUEUE_SIZE = 1024 * 1024
+
+
+def _make_backends() -> Dict[str, Callable]:
+    backends: Dict[str, Callable] = {
+        "ring_buffer": lambda: RingBufferQueue(QUEUE_SIZE),
+        "multiprocessing": lambda: MultiprocessingBatchedQueue(),
+    }
+    if use_faster_fifo:
+        import faster_fifo
+        import faster_fifo_reduction  # noqa: F401
+
+        backends["faster_fifo"] = lambda: faster_fifo.Queue(QUEUE_SIZE)
+    return backends
+
+
+def _producer(q, barrier, env_idx: int, num_messages: int, batch_size: int):
+    barrier.wait()
+    if batch_size == 1:
+        for step in range(num_messages):
+            q.put((env_idx, step))
+    else:
+        for start in range(0, num_messages, batch_size):
+            q.put_many(
+                [
+                    (env_idx, step)
+                    for step in range(
+                        start, min(start + batch_size, num_messages)
+                    )
+                ]
+            )
+
+
+def run_benchmark(
+    make_queue: Callable,
+    num_producers: int,
+    num_messages: int,
+    batch_size: int,
+) -> float:
+    r"""Returns the number of messages per second received by the
+    consumer.
+    """
+    mp_ctx = multiprocessing.get_context("forkserver")
+    q = make_queue()
+    barrier = mp_ctx.Barrier(num_producers + 1)
+    producers = [
+        mp_ctx.Process(
+            target=_producer,
+            args=(q, barrier, env_idx, num_messages, batch_size),
+        )
+        for env_idx in range(num_producers)
+    ]
+    for p in producers:
+        p.start()
+
+    barrier.wait()
+    t_start = time.perf_counter()
+    num_received = 0
+    while num_received < num_producers * num_messages:
+        num_received += len(q.get_many(timeout=60.0))
+    elapsed = time.perf_counter() - t_start
+
+    for p in producers:
+        p.join()
+    return num_received / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-producers", type=int, default=8)
+    parser.add_argument(
+        "--num-messages",
+        type=int,
+        default=10000,
+        help="Number of messages put by each producer.",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 32],
+        help="Number of messages per put_many, 1 to use put.",
+    )
+    args = parser.parse_args()
+
+    for name, make_queue in _make_backends().items():
+        for batch_size in args.batch_sizes:
+            msgs_per_sec = run_benchmark(
+                make_queue, args.num_producers, args.num_messages, batch_size
+            )
+            print(
+                f"{name:>16} batch size {batch_size:>4}:"
+                f" {msgs_per_sec:>12,.0f} msgs/s"
+            )
@@ -4,11 +4,30 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import gzip
+import json
+import random
 from itertools import groupby, islice
 
+import attr
+import numpy as np
 import pytest
+from omegaconf import OmegaConf
 
 from habitat.core.dataset import Dataset, Episode
+from habitat.core.episode_store import (
+    EpisodeStore,
+    LazyEpisodes,
+    write_episode_store,
+)
+from habitat.datasets.object_nav.object_nav_dataset import ObjectNavDatasetV1
+from habitat.datasets.pointnav.pointnav_dataset import PointNavDatasetV1
+from habitat.datasets.scene_index import (
+    SceneIndexedFile,
+    convert_dataset_file,
+    is_scene_indexed_file,
+    write_scene_indexed_file,
+)
 from habitat.tasks.nav.nav import NavigationEpisode, NavigationGoal
 
 
@@ -27,11 +46,39 @@ def _construct_dataset(num_episodes, num_groups=10):
     return dataset
 
 
+def _construct_lazy_dataset(tmp_path, num_episodes, num_groups=10):
+    dataset = _construct_dataset(num_episodes, num_groups)
+    write_episode_store(
+        {
+            "episodes": [
+                attr.asdict(ep, filter=lambda a, _: not a.name.startswith("_"))
+                for ep in dataset.episodes
+            ]
+        },
+        str(tmp_path / "dataset.episodes"),
+    )
+    lazy_dataset = Dataset()
+    lazy_dataset.episodes = LazyEpisodes(  # type: ignore[assignment]
+        [EpisodeStore(str(tmp_path / "dataset.episodes"))],
+        lambda episode, _: Episode(**episode),
+    )
+    return dataset, lazy_dataset
+
+
 def test_scene_ids():
     dataset = _construct_dataset(100)
     assert dataset.scene_ids == ["scene_id_" + str(ii) for ii in range(10)]
 
 
+def test_scene_episode_counts(tmp_path):
+    dataset = _construct_dataset(95)
+    assert dataset.scene_episode_counts == {
+        "scene_id_" + str(ii): 10 if ii < 5 else 9 for ii in range(10)
+    }
+    _, lazy_dataset = _construct_lazy_dataset(tmp_path, 95)
+    assert lazy_dataset.scene_episode_counts == dataset.scene_episode_counts
+
+
 def test_get_scene_episodes():
     dataset = _construct_dataset(100)
     scene = "scene_id_0"
@@ -362,6 +409,202 @@ def test_preserve_order():
     assert list(episode_iter) == episodes
 
 
+def test_lazy_episodes(tmp_path):
+    dataset, lazy_dataset = _construct_lazy_dataset(tmp_path, 100)
+    assert len(lazy_dataset.episodes) == 100
+    assert lazy_dataset.scene_ids == dataset.scene_ids
+    for ep, lazy_ep in zip(dataset.episodes, lazy_dataset.episodes):
+        assert lazy_ep.episode_id == ep.episode_id
+        assert lazy_ep.scene_id == ep.scene_id
+        assert np.allclose(lazy_ep.start_rotation, ep.start_rotation)
+
+    scene_episodes = lazy_dataset.get_scene_episodes("scene_id_3")
+    assert [ep.episode_id for ep in scene_episodes] == [
+        ep.episode_id for ep in dataset.get_scene_episodes("scene_id_3")
+    ]
+
+    splits = lazy_dataset.get_splits(
+        10, 3, remove_unused_episodes=True, sort_by_episode_id=True
+    )
+    assert all(isinstance(s.episodes, LazyEpisodes) for s in splits)
+    assert all(len(s.episodes) == 3 for s in splits)
+    assert len(lazy_dataset.episodes) == 30
+    for split in splits:
+        ids = [ep.episode_id for ep in split.episodes]
+        assert ids == sorted(ids)
+
+
+def test_lazy_episodes_iterator(tmp_path):
+    dataset, lazy_dataset = _construct_lazy_dataset(tmp_path, 200)
+    episode_ids = []
+    for d in (dataset, lazy_dataset):
+        random.seed(0)
+        np.random.seed(0)
+        ep_iter = d.get_episode_iterator(
+            num_episode_sample=150,
+            max_scene_repeat_episodes=7,
+            shuffle=True,
+            cycle=True,
+        )
+        episode_ids.append([ep.episode_id for ep in islice(ep_iter, 400)])
+    assert episode_ids[0] == episode_ids[1]
+
+
+def test_scene_indexed_file(tmp_path):
+    episodes = [
+        {
+            "episode_id": str(i),
+            "scene_id": f"data/scene_{i % 3}.basis.glb",
+            "object_category": "chair",
+        }
+        for i in range(10)
+    ]
+    goals_by_category = {
+        f"scene_{i}.basis.glb_chair": [{"position": [i, 0, 0]}]
+        for i in range(3)
+    }
+    path = str(tmp_path / "dataset.indexed")
+    write_scene_indexed_file(
+        {
+            "episodes": episodes,
+            "goals_by_category": goals_by_category,
+            "category_to_task_category_id": {"chair": 0},
+        },
+        path,
+    )
+    assert is_scene_indexed_file(path)
+
+    indexed_file = SceneIndexedFile(path)
+    assert indexed_file.scene_ids == [
+        f"data/scene_{i}.basis.glb" for i in range(3)
+    ]
+    assert indexed_file.num_episodes() == 10
+    assert indexed_file.num_episodes("data/scene_0.basis.glb") == 4
+    assert indexed_file.dataset_fields == {
+        "goals_by_category": {},
+        "category_to_task_category_id": {"chair": 0},
+    }
+
+    config = OmegaConf.create(
+        {
+            "data_path": path,
+            "split": "train",
+            "scenes_dir": str(tmp_path),
+            "content_scenes": ["scene_0.basis", "scene_2.basis"],
+        }
+    )
+    assert PointNavDatasetV1.get_scene_episode_counts(config) == {
+        "scene_0.basis": 4,
+        "scene_2.basis": 3,
+    }
+
+    scene_chunk = indexed_file.read_scene("data/scene_1.basis.glb")
+    assert scene_chunk["indices"] == [1, 4, 7]
+    assert scene_chunk["episodes"] == [episodes[i] for i in (1, 4, 7)]
+    assert scene_chunk["dataset"] == {
+        "goals_by_category": {
+            "scene_1.basis.glb_chair": goals_by_category[
+                "scene_1.basis.glb_chair"
+            ]
+        }
+    }
+
+
+@pytest.mark.parametrize(
+    "content_scenes", [["*"], ["scene_0.basis", "scene_2.basis"]]
+)
+def test_scene_indexed_file_loading(tmp_path, content_scenes):
+    categories = ["chair", "bed"]
+    episodes = []
+    for i in range(12):
+        scene = f"scene_{i % 3}.basis.glb"
+        category = categories[i % 2]
+        goals = [
+            {
+                "object_id": f"{scene}_{category}_{j}",
+                "object_category": category,
+                "position": [i % 3, j, 0],
+                "view_points": [
+                    {
+                        "agent_state": {
+                            "position": [i % 3, j, 1],
+                            "rotation": [0, 0, 0, 1],
+                        },
+                        "iou": 0.5,
+                    }
+                ],
+            }
+            for j in range(2)
+        ]
+        episodes.append(
+            {
+                "episode_id": f"ep_{i}",
+                "scene_id": f"data/scene_datasets/{scene}",
+                "start_position": [i, 0, 0],
+                "start_rotation": [0, 0, 0, 1],
+                "goals": goals,
+                "shortest_paths": [[1, 0]],
+            }
+        )
+    deserialized = ObjectNavDatasetV1.dedup_goals(
+        {
+            "episodes": episodes,
+            "category_to_task_category_id": {"chair": 0, "bed": 1},
+            "category_to_mp3d_category_id": {"chair": 3, "bed": 11},
+        }
+    )
+    json_path = str(tmp_path / "train.json.gz")
+    with gzip.open(json_path, "wt") as f:
+        json.dump(deserialized, f)
+    indexed_path = convert_dataset_file(json_path)
+
+    def load(data_path):
+        return ObjectNavDatasetV1(
+            OmegaConf.create(
+                {
+                    "data_path": data_path,
+                    "split": "train",
+                    "scenes_dir": str(tmp_path / "scenes"),
+                    "content_scenes": content_scenes,
+                }
+            )
+        )
+
+    json_dataset = load(json_path)
+    indexed_dataset = load(indexed_path)
+    num_scenes = 3 if content_scenes == ["*"] else 2
+    assert len(indexed_dataset.episodes) == 4 * num_scenes
+    assert indexed_dataset.episodes == json_dataset.episodes
+    for indexed_ep, json_ep in zip(
+        indexed_dataset.episodes, json_dataset.episodes
+    ):
+        assert indexed_ep.scene_id.startswith(str(tmp_path / "scenes"))
+        assert indexed_ep.goals_key == json_ep.goals_key
+        # The goals are shared through goals_by_category
+        assert (
+            indexed_ep.goals
+            is indexed_dataset.goals_by_category[indexed_ep.goals_key]
+        )
+        assert indexed_ep.goals == json_ep.goals
+        view_point = indexed_ep.goals[0].view_points[0]
+        assert view_point.agent_state.position[2] == 1
+    assert indexed_dataset.category_to_task_category_id == {
+        "chair": 0,
+        "bed": 1,
+    }
+    assert (
+        indexed_dataset.category_to_scene_annotation_category_id
+        == json_dataset.category_to_scene_annotation_category_id
+    )
+    # Only the goals of the loaded scenes are read from the indexed file
+    assert set(indexed_dataset.goals_by_category) == {
+        ep.goals_key for ep in json_dataset.episodes
+    }
+    assert set(indexed_dataset.goals_by_category) <= set(
+        json_dataset.goals_by_category
+    )
+
+
 def test_reset_goals():
     ep = NavigationEpisode(
         episode_id="0",
@@ -7,6 +7,7 @@
 import itertools
 import multiprocessing as mp
 import os
+from typing import Any, List
 
 import numpy as np
 import pytest
@@ -398,6 +399,126 @@ def test_vec_env_call_func():
         env_ids = envs.call(["get_env_ind"] * num_envs)
         assert env_ids == list(range(num_envs))
 
+        results = envs.call_many(
+            ["set_env_ind", "get_env_ind"], [{"new_env_ind": 7}, None]
+        )
+        assert results == [[None, 7]] * num_envs
+
+        for index_env in range(num_envs):
+            envs.call_at(index_env, "set_env_ind", {"new_env_ind": index_env})
+
+        outputs, results = envs.step_and_call(
+            sample_non_stop_action_gym(envs.action_spaces[0], num_envs),
+            ["get_env_ind"],
+        )
+        assert len(outputs) == num_envs
+        assert results == [[i] for i in range(num_envs)]
+
+
+def test_vec_env_wait_any():
+    configs, datasets = _load_test_data()
+    num_envs = len(configs)
+    env_fn_args = tuple(zip(configs, datasets, range(num_envs)))
+    with habitat.VectorEnv(
+        make_env_fn=_make_dummy_env_func,
+        env_fn_args=env_fn_args,
+        multiprocessing_start_method="forkserver",
+    ) as envs:
+        envs.reset()
+        assert envs.wait_any() == []
+
+        envs.async_step(
+            sample_non_stop_action_gym(envs.action_spaces[0], num_envs)
+        )
+        completed = set()
+        while len(completed) < num_envs:
+            ready = envs.wait_any()
+            assert len(ready) > 0
+            for index_env, (obs, _, _, _) in ready:
+                assert index_env not in completed
+                assert "rgb" in obs
+                completed.add(index_env)
+        assert completed == set(range(num_envs))
+
+
+def test_shared_memory_observations():
+    configs, datasets = _load_test_data()
+    num_envs = len(configs)
+    env_fn_args = tuple(zip(configs, datasets, range(num_envs)))
+    actions: List[Any] = []
+
+    all_observations = []
+    for use_shared_memory in [False, True]:
+        with habitat.VectorEnv(
+            make_env_fn=_make_dummy_env_func,
+            env_fn_args=env_fn_args,
+            multiprocessing_start_method="forkserver",
+            use_shared_memory=use_shared_memory,
+        ) as envs:
+            # Copy the observations as shared memory views are only
+            # valid for a couple of steps
+            observations = [
+                {k: np.array(v) for k, v in obs.items()}
+                for obs in envs.reset()
+            ]
+            if len(actions) == 0:
+                actions = [
+                    sample_non_stop_action_gym(envs.action_spaces[0], num_envs)
+                    for _ in range(10)
+                ]
+            for action in actions:
+                outputs = envs.step(action)
+                observations += [
+                    {k: np.array(v) for k, v in obs.items()}
+                    for obs, _, _, _ in outputs
+                ]
+        all_observations.append(observations)
+
+    for obs, shared_obs in zip(*all_observations):
+        assert obs.keys() == shared_obs.keys()
+        for k in obs.keys():
+            assert np.array_equal(obs[k], shared_obs[k])
+
+
+def test_async_step_batch():
+    configs, datasets = _load_test_data()
+    num_envs = len(configs)
+    env_fn_args = tuple(zip(configs, datasets, range(num_envs)))
+    actions: List[Any] = []
+
+    all_observations = []
+    for use_shared_memory in [False, True]:
+        with habitat.VectorEnv(
+            make_env_fn=_make_dummy_env_func,
+            env_fn_args=env_fn_args,
+            multiprocessing_start_method="forkserver",
+            use_shared_memory=use_shared_memory,
+        ) as envs:
+            envs.reset()
+            if len(actions) == 0:
+                actions = [
+                    sample_non_stop_action_gym(envs.action_spaces[0], num_envs)
+                    for _ in range(10)
+                ]
+            observations = []
+            for action in actions:
+                if use_shared_memory:
+                    envs.async_step_batch(
+                        np.array(action, dtype=np.int64).reshape(num_envs, 1)
+                    )
+                    outputs = envs.wait_step()
+                else:
+                    outputs = envs.step(action)
+                observations += [
+                    {k: np.array(v) for k, v in obs.items()}
+                    for obs, _, _, _ in outputs
+                ]
+        all_observations.append(observations)
+
+    for obs, batch_obs in zip(*all_observations):
+        for k in obs.keys():
+            assert np.array_equal(obs[k], batch_obs[k])
+
 
 def test_close_with_paused():
     configs, _ = _load_test_data()
@@ -4,7 +4,9 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import numpy as np
 import pytest
+from omegaconf import OmegaConf
 
 from habitat.config.default import get_config
 from habitat.core.benchmark import Benchmark
@@ -14,7 +16,11 @@ from habitat_baselines.agents.mp_agents import (
     SpaManipPick,
     SpaResetModule,
 )
-from habitat_baselines.motion_planning.motion_plan import is_ompl_installed
+from habitat_baselines.motion_planning.motion_plan import (
+    MotionPlanner,
+    is_ompl_installed,
+)
+from habitat_baselines.motion_planning.robot_target import RobotTarget
 
 TEST_CFG = (
     "habitat-baselines/habitat_baselines/config/rearrange/spap_pick.yaml"
@@ -57,3 +63,92 @@ def test_pick_motion_planning():
     )
     metrics = benchmark.evaluate(pick_skill, 1)
     assert metrics[RearrangePickSuccess.cls_uuid] == 1.0
+
+
+class _StubMpSpace:
+    def get_start_goal(self):
+        return np.array([0.1, 0.1]), np.array([0.9, 0.1])
+
+
+class _CountingPlanner(MotionPlanner):
+    """
+    Motion planner without a simulator, a state is collision free if its
+    first joint is below 0.5.
+    """
+
+    def __init__(self, tmp_path, valid_cache_resolution=1e-3):
+        self.checked = []
+        super().__init__(
+            None,
+            OmegaConf.create(
+                {
+                    "debug_dir": str(tmp_path),
+                    "valid_cache_resolution": valid_cache_resolution,
+                }
+            ),
+        )
+
+    def _get_sim(self):
+        return None
+
+    def get_mp_space(self):
+        return _StubMpSpace()
+
+    def _check_state_valid(self, x, take_image):
+        self.checked.append(np.array(x))
+        self._coll_check_count += 1
+        return bool(x[0] < 0.5)
+
+
+def test_motion_planner_valid_cache(tmp_path):
+    mp = _CountingPlanner(tmp_path)
+    valid = np.array([0.2, 0.1])
+    invalid = np.array([0.7, 0.1])
+    # The first check of a plan always runs
+    assert mp._is_state_valid(valid)
+    assert mp._is_state_valid(valid)
+    assert len(mp.checked) == 2
+    # Within the cache resolution
+    assert mp._is_state_valid(valid + 1e-4)
+    assert not mp._is_state_valid(invalid)
+    assert not mp._is_state_valid(invalid)
+    assert len(mp.checked) == 3
+    # Uncached checks
+    assert mp._is_state_valid(valid, use_cache=False)
+    assert mp._is_state_valid(valid, take_image=True)
+    assert len(mp.checked) == 5
+
+    stats = mp.get_check_stats()
+    assert stats["plan_num_coll_checks"] == 5
+    assert stats["plan_coll_cache_hit_rate"] == pytest.approx(2 / 7)
+    assert stats["plan_coll_check_time"] >= 0
+
+    # A new plan starts with an empty cache
+    mp._reset_check_stats()
+    assert mp.get_check_stats()["plan_num_coll_checks"] == 0
+    assert mp._is_state_valid(valid)
+    assert len(mp.checked) == 6
+
+    # A resolution of 0 disables the cache
+    mp = _CountingPlanner(tmp_path, valid_cache_resolution=0)
+    for _ in range(3):
+        assert mp._is_state_valid(valid)
+    assert len(mp.checked) == 3
+    assert mp.get_check_stats()["plan_coll_cache_hit_rate"] == 0
+
+
+def test_motion_planner_recent_plan_stats(tmp_path):
+    mp = _CountingPlanner(tmp_path)
+    mp._mp_space = mp.get_mp_space()
+    mp.was_bad_coll = False
+    mp._is_approx_sol = False
+    for _ in range(4):
+        mp._is_state_valid(np.array([0.2, 0.1]))
+
+    # The start and goal of the failed plan are checked again, but these
+    # checks aren't counted in the stats of the plan.
+    stats = mp.get_recent_plan_stats(None, RobotTarget(is_guess=False))
+    assert len(mp.checked) == 4
+    assert stats["plan_failure"] == 1
+    assert stats["plan_num_coll_checks"] == 2
+    assert stats["plan_coll_cache_hit_rate"] == pytest.approx(2 / 4)
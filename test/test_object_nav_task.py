@@ -7,6 +7,7 @@
 import json
 import time
 
+import numpy as np
 import pytest
 
 import habitat
@@ -61,6 +62,38 @@ def test_mp3d_object_nav_dataset():
     check_json_serialization(dataset)
 
 
+def test_packed_view_points():
+    dataset_config = get_config(CFG_TEST).habitat.dataset
+    if not ObjectNavDatasetV1.check_config_paths_exist(dataset_config):
+        pytest.skip(
+            "Please download Matterport3D ObjectNav Dataset to data folder."
+        )
+
+    dataset = habitat.make_dataset(
+        id_dataset=dataset_config.type, config=dataset_config
+    )
+    for episode in dataset.episodes[:EPISODES_LIMIT]:
+        # The packed view points are shared by the episodes of a goals_key
+        assert episode.goals is dataset.goals_by_category[episode.goals_key]
+        view_points = [
+            (goal_index, view_point.agent_state.position)
+            for goal_index, goal in enumerate(episode.goals)
+            for view_point in goal.view_points
+        ]
+        assert episode.goals.view_point_positions.shape == (
+            len(view_points),
+            3,
+        )
+        assert np.allclose(
+            episode.goals.view_point_positions,
+            [position for _, position in view_points],
+        )
+        assert np.array_equal(
+            episode.goals.view_point_goal_indices,
+            [goal_index for goal_index, _ in view_points],
+        )
+
+
 @pytest.mark.parametrize("split", ["train", "val"])
 def test_dataset_splitting(split):
     dataset_config = get_config(CFG_TEST).habitat.dataset
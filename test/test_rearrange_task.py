@@ -5,19 +5,31 @@
 # LICENSE file in the root directory of this source tree.
 
 import gc
+import gzip
 import itertools
 import json
+import multiprocessing
 import os
 import os.path as osp
+import pickle
+import shutil
 import time
 from glob import glob
+from types import SimpleNamespace
+from typing import List
 
+import magnum as mn
+import numpy as np
 import pytest
 import torch
 import yaml
+from gym import spaces
+from omegaconf import OmegaConf
 
 import habitat
+import habitat.datasets.rearrange.generate_episode_inits as rr_inits
 import habitat.datasets.rearrange.run_episode_generator as rr_gen
+import habitat.datasets.rearrange.run_parallel_episode_generator as rr_par_gen
 import habitat.tasks.rearrange.rearrange_sim
 import habitat.tasks.rearrange.rearrange_task
 import habitat.utils.env_utils
@@ -25,10 +37,26 @@ from habitat.config.default import _HABITAT_CFG_DIR, get_config
 from habitat.core.embodied_task import Episode
 from habitat.core.environments import get_env_class
 from habitat.core.logging import logger
+from habitat.core.spaces import ActionSpace
 from habitat.datasets.rearrange.rearrange_dataset import RearrangeDatasetV0
+from habitat.datasets.rearrange.rearrange_generator import (
+    RearrangeEpisodeGenerator,
+)
+from habitat.datasets.rearrange.samplers.object_sampler import ObjectSampler
 from habitat.tasks.rearrange.multi_task.composite_task import CompositeTask
+from habitat.tasks.rearrange.utils import (
+    ContactArrays,
+    NavmeshArtifacts,
+    StartStateCache,
+    coll_name_matches,
+    get_match_link,
+    rearrange_collision,
+)
 from habitat_baselines.config.default import get_config as baselines_get_config
 from habitat_baselines.rl.ddppo.ddp_utils import find_free_port
+from habitat_baselines.rl.hrl import hierarchical_policy
+from habitat_baselines.rl.hrl.hierarchical_policy import HierarchicalPolicy
+from habitat_baselines.rl.hrl.skills import WaitSkillPolicy
 from habitat_baselines.run import run_exp
 
 CFG_TEST = "benchmark/rearrange/pick.yaml"
@@ -58,6 +86,383 @@ def check_json_serialization(dataset: habitat.Dataset):
     ), "JSON dataset encoding/decoding isn't consistent"
 
 
+def test_navmesh_artifacts(tmp_path):
+    class IslandsPathFinder:
+        # Two islands, the largest one is the x >= 0 half of the vertices
+        def __init__(self):
+            self.vertices = list(np.random.uniform(-5, 5, size=(200, 3)))
+            self.num_island_radius_calls = 0
+
+        def build_navmesh_vertices(self):
+            return self.vertices
+
+        def island_radius(self, p):
+            self.num_island_radius_calls += 1
+            return 5.0 if p[0] >= 0 else 2.0
+
+    pathfinder = IslandsPathFinder()
+    navmesh_path = str(tmp_path / "scene.navmesh")
+    with open(navmesh_path, "wb") as f:
+        f.write(b"navmesh")
+
+    artifacts = NavmeshArtifacts.load_or_compute(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == len(pathfinder.vertices)
+    assert artifacts.max_island_size == 5.0
+    assert len(artifacts.island_radii) == 2
+    vertices = np.stack(pathfinder.vertices)
+    largest = vertices[vertices[:, 0] >= 0]
+    for pos in np.random.uniform(-6, 6, size=(20, 3)):
+        closest = largest[np.linalg.norm(largest - pos, axis=-1).argmin()]
+        assert np.allclose(
+            artifacts.closest_largest_island_vertex(pos), closest
+        )
+
+    # Loaded from the cache file
+    cached = NavmeshArtifacts.load_or_compute(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == len(pathfinder.vertices)
+    assert np.array_equal(cached.vertices, artifacts.vertices)
+    assert np.array_equal(cached.island_ids, artifacts.island_ids)
+
+    # A modified navmesh invalidates the cache
+    with open(navmesh_path, "wb") as f:
+        f.write(b"modified navmesh")
+    NavmeshArtifacts.load_or_compute(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == 2 * len(pathfinder.vertices)
+
+    # An unreadable cache file is a cache miss and is replaced
+    cache_path = NavmeshArtifacts.cache_path(navmesh_path)
+    with open(cache_path, "wb") as f:
+        f.write(b"not a pickle")
+    NavmeshArtifacts.load_or_compute(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == 3 * len(pathfinder.vertices)
+    NavmeshArtifacts.load_or_compute(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == 3 * len(pathfinder.vertices)
+    assert sorted(os.listdir(tmp_path)) == [
+        "scene.navmesh",
+        osp.basename(cache_path),
+    ]
+
+    # Navmeshes with the same file name don't share a cache file in a cache
+    # directory
+    cache_dir = str(tmp_path / "cache")
+    other_navmesh_path = str(tmp_path / "other" / "scene.navmesh")
+    os.makedirs(osp.dirname(other_navmesh_path))
+    with open(other_navmesh_path, "wb") as f:
+        f.write(b"other navmesh")
+    NavmeshArtifacts.load_or_compute(pathfinder, navmesh_path, cache_dir)
+    NavmeshArtifacts.load_or_compute(pathfinder, other_navmesh_path, cache_dir)
+    assert pathfinder.num_island_radius_calls == 5 * len(pathfinder.vertices)
+    for path in (navmesh_path, other_navmesh_path):
+        NavmeshArtifacts.load_or_compute(pathfinder, path, cache_dir)
+    assert pathfinder.num_island_radius_calls == 5 * len(pathfinder.vertices)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def _write_start_states(cache_path, worker_idx, num_states):
+    cache = StartStateCache(cache_path)
+    for i in range(num_states):
+        cache[f"{worker_idx}_{i}"] = (np.full(3, worker_idx), float(i))
+
+
+def test_start_state_cache(tmp_path):
+    legacy_path = str(tmp_path / "train_pick_start.pickle")
+    with open(legacy_path, "wb") as f:
+        pickle.dump({"legacy": (np.zeros(3), 0.0)}, f)
+    cache_path = str(tmp_path / "train_pick_start.db")
+    cache = StartStateCache(cache_path, legacy_cache_file=legacy_path)
+    assert "legacy" in cache
+
+    # Several workers write to the same cache at once
+    num_workers, num_states = 4, 50
+    mp_ctx = multiprocessing.get_context("forkserver")
+    workers = [
+        mp_ctx.Process(
+            target=_write_start_states,
+            args=(cache_path, worker_idx, num_states),
+        )
+        for worker_idx in range(num_workers)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+        assert w.exitcode == 0
+    assert len(cache) == num_workers * num_states + 1
+    assert cache[f"{num_workers - 1}_0"][1] == 0.0
+
+    # Without saving, new states are only kept in memory
+    memory_cache = StartStateCache(cache_path, should_save=False)
+    memory_cache["unsaved"] = (np.zeros(3), 0.0)
+    assert "unsaved" in memory_cache
+    assert "unsaved" not in StartStateCache(cache_path)
+
+
+def test_object_sampler_navmesh_artifacts():
+    class SnappingPathFinder:
+        # The largest island is the x >= 0 half, points snap to y = 0
+        def __init__(self):
+            self.vertices = list(np.random.uniform(-5, 5, size=(100, 3)))
+            self.num_island_radius_calls = 0
+
+        def build_navmesh_vertices(self):
+            return self.vertices
+
+        def island_radius(self, p):
+            self.num_island_radius_calls += 1
+            return 5.0 if p[0] >= 0 else 2.0
+
+        def snap_point(self, p):
+            return np.array([p[0], 0.0, p[2]])
+
+    sim = SimpleNamespace(pathfinder=SnappingPathFinder())
+    sampler = ObjectSampler(["obj"], ["recep_set"], nav_to_min_distance=1.0)
+    for x, accessible in [(1.0, True), (-1.0, False), (2.0, True)]:
+        new_object = SimpleNamespace(translation=np.array([x, 0.5, 0.0]))
+        assert sampler._is_accessible(sim, new_object) == accessible
+    # The islands are only computed once, then every check snaps one point
+    assert sim.pathfinder.num_island_radius_calls == 100 + 3
+
+    sampler.reset()
+    assert sampler.navmesh_artifacts is None
+
+
+@pytest.mark.parametrize("settle_mode", ["fixed", "adaptive"])
+@pytest.mark.parametrize("fall_speed", [0.0, 1.0])
+def test_settle_sim(settle_mode, fall_speed):
+    class FallingSim:
+        # The last object falls at a constant speed
+        def __init__(self, objects):
+            self.objects = objects
+            self.world_time = 0.0
+
+        def get_world_time(self):
+            return self.world_time
+
+        def step_world(self, dt):
+            self.world_time += dt
+            self.objects[-1].translation[1] -= fall_speed * dt
+
+    cfg = rr_gen.get_config_defaults()
+    cfg.settle_mode = settle_mode
+    ep_gen = RearrangeEpisodeGenerator.__new__(RearrangeEpisodeGenerator)
+    ep_gen.cfg = cfg
+    ep_gen._render_debug_obs = False
+    ep_gen.settle_times = []
+    ep_gen.ep_sampled_objects = [
+        SimpleNamespace(handle=f"obj_{i}", translation=np.array([i, 1.0, 0]))
+        for i in range(3)
+    ]
+    ep_gen.sim = FallingSim(ep_gen.ep_sampled_objects)
+
+    assert ep_gen.settle_sim() == (fall_speed == 0.0)
+    settle_time = ep_gen.get_settle_stats()["max_settle_time"]
+    if settle_mode == "fixed":
+        assert settle_time >= cfg.settle_duration
+    elif fall_speed == 0.0:
+        # Stops once all the objects rested for long enough
+        assert settle_time < cfg.settle_rest_time + 0.1
+    else:
+        # Stops as soon as the falling object is unstable
+        assert settle_time < cfg.settle_max_displacement / fall_speed + 0.1
+
+
+def test_rearrange_collision():
+    def contact(id_a, id_b, link_a=-1, link_b=-1, force=1.0):
+        return SimpleNamespace(
+            object_id_a=id_a,
+            object_id_b=id_b,
+            link_id_a=link_a,
+            link_id_b=link_b,
+            normal_force=force,
+        )
+
+    # The robot has id 1 and base link 0, 5 and 6 are scene objects and 6 is
+    # held by the robot. 0 is the stage.
+    contacts = [
+        contact(1, 0, link_a=0, force=-7.0),
+        contact(1, 5, link_a=3, force=2.0),
+        contact(0, 1, link_b=2, force=-3.0),
+        contact(6, 0, force=4.0),
+        contact(6, 1, link_b=4, force=0.5),
+        contact(5, 0, force=1.0),
+        contact(1, 1, link_a=2, link_b=3, force=10.0),
+    ]
+    robot = SimpleNamespace(
+        get_robot_sim_id=lambda: 1, is_base_link=lambda link: link == 0
+    )
+    robot_data = SimpleNamespace(
+        robot=robot, grasp_mgr=SimpleNamespace(snap_idx=6)
+    )
+    sim = SimpleNamespace(
+        get_robot_data=lambda agent_idx: robot_data,
+        get_physics_contact_points=lambda: contacts,
+        scene_obj_ids=[5, 6],
+    )
+
+    did_collide, details = rearrange_collision(
+        sim, True, get_extra_coll_data=True
+    )
+    assert did_collide
+    assert details.robot_obj_colls == 1
+    assert details.robot_scene_colls == 1
+    assert details.obj_scene_colls == 1
+    assert details.robot_coll_ids == [5, 0, 6, 1]
+    assert len(details.all_colls) == 6
+
+    _, details = rearrange_collision(
+        sim, True, ignore_base=False, get_extra_coll_data=True
+    )
+    assert details.robot_coll_ids == [0, 5, 0, 6, 1]
+
+    _, details = rearrange_collision(
+        sim, True, ignore_names=[5, 6], get_extra_coll_data=True
+    )
+    assert details.robot_obj_colls == 0
+    assert details.obj_scene_colls == 0
+    assert details.robot_coll_ids == [0, 1]
+
+    robot_data.grasp_mgr.snap_idx = None
+    contacts.pop(2)
+    contacts.pop(-1)
+    did_collide, details = rearrange_collision(sim, True)
+    assert did_collide
+    assert details.robot_scene_colls == 0
+    assert details.obj_scene_colls == 0
+
+    arrays = ContactArrays(contacts)
+    assert arrays.max_force() == 7.0
+    assert arrays.max_force(arrays.involves([6])) == 4.0
+    assert arrays.max_force(~arrays.involves(range(7))) == 0
+    assert len(ContactArrays([])) == 0
+
+
+def _reference_rearrange_collision(
+    sim, count_obj_colls, ignore_names=None, ignore_base=True
+):
+    # The filtering of the contact list of rearrange_collision before it
+    # used ContactArrays
+    robot_data = sim.get_robot_data(None)
+    robot_model = robot_data.robot
+    robot_id = robot_model.get_robot_sim_id()
+    snapped_obj_id = robot_data.grasp_mgr.snap_idx
+
+    def should_keep(x):
+        if ignore_base:
+            match_link = get_match_link(x, robot_id)
+            if match_link is not None and robot_model.is_base_link(match_link):
+                return False
+        if ignore_names is not None:
+            if any(coll_name_matches(x, name) for name in ignore_names):
+                return False
+        return True
+
+    colls = list(filter(should_keep, sim.get_physics_contact_points()))
+    robot_coll_ids = []
+    robot_obj_colls = 0
+    robot_scene_colls = 0
+    for match in [c for c in colls if coll_name_matches(c, robot_id)]:
+        if any(coll_name_matches(match, i) for i in sim.scene_obj_ids):
+            robot_obj_colls += 1
+        else:
+            robot_scene_colls += 1
+        if match.object_id_a == robot_id:
+            robot_coll_ids.append(match.object_id_b)
+        else:
+            robot_coll_ids.append(match.object_id_a)
+
+    obj_scene_colls = 0
+    if count_obj_colls and snapped_obj_id is not None:
+        for match in colls:
+            if coll_name_matches(
+                match, snapped_obj_id
+            ) and not coll_name_matches(match, robot_id):
+                obj_scene_colls += 1
+    return (
+        min(obj_scene_colls, 1),
+        min(robot_obj_colls, 1),
+        min(robot_scene_colls, 1),
+        robot_coll_ids,
+        [(x.object_id_a, x.object_id_b) for x in colls],
+    )
+
+
+def _reference_max_force(contact_points, check_id):
+    # The maximum force of RearrangeTask.get_coll_forces before it used
+    # ContactArrays
+    forces = [
+        abs(x.normal_force)
+        for x in contact_points
+        if check_id in [x.object_id_a, x.object_id_b]
+        and x.object_id_a != x.object_id_b
+    ]
+    return max(forces) if len(forces) > 0 else 0
+
+
+def test_rearrange_collision_matches_reference():
+    rng = np.random.default_rng(0)
+    robot_id = 1
+    for _ in range(200):
+        contacts = [
+            SimpleNamespace(
+                object_id_a=int(rng.integers(9)),
+                object_id_b=int(rng.integers(9)),
+                link_id_a=int(rng.integers(-1, 6)),
+                link_id_b=int(rng.integers(-1, 6)),
+                normal_force=float(rng.normal()),
+            )
+            for _ in range(rng.integers(0, 30))
+        ]
+        scene_obj_ids = [
+            int(i) for i in np.flatnonzero(rng.random(9) < 0.4) if i != 1
+        ]
+        snap_idx = None
+        if len(scene_obj_ids) > 0 and rng.random() < 0.7:
+            snap_idx = int(rng.choice(scene_obj_ids))
+        robot = SimpleNamespace(
+            get_robot_sim_id=lambda: robot_id,
+            is_base_link=lambda link: link in (0, 1),
+        )
+        robot_data = SimpleNamespace(
+            robot=robot, grasp_mgr=SimpleNamespace(snap_idx=snap_idx)
+        )
+        sim = SimpleNamespace(
+            get_robot_data=lambda agent_idx: robot_data,
+            get_physics_contact_points=lambda: contacts,
+            scene_obj_ids=scene_obj_ids,
+        )
+        ignore_names = None
+        if rng.random() < 0.5:
+            ignore_names = [int(i) for i in rng.choice(9, size=2)]
+        ignore_base = bool(rng.random() < 0.5)
+        count_obj_colls = bool(rng.random() < 0.7)
+
+        did_collide, details = rearrange_collision(
+            sim,
+            count_obj_colls,
+            ignore_names=ignore_names,
+            ignore_base=ignore_base,
+            get_extra_coll_data=True,
+        )
+        expected = _reference_rearrange_collision(
+            sim, count_obj_colls, ignore_names, ignore_base
+        )
+        assert (
+            details.obj_scene_colls,
+            details.robot_obj_colls,
+            details.robot_scene_colls,
+            details.robot_coll_ids,
+            details.all_colls,
+        ) == expected
+        assert did_collide == (sum(expected[:3]) > 0)
+
+        arrays = ContactArrays(contacts)
+        not_self = arrays.object_id_a != arrays.object_id_b
+        for check_id in range(9):
+            assert arrays.max_force(
+                not_self & arrays.involves(check_id)
+            ) == _reference_max_force(contacts, check_id)
+
+
 def test_rearrange_dataset():
     dataset_config = get_config(CFG_TEST).habitat.dataset
     if not RearrangeDatasetV0.check_config_paths_exist(dataset_config):
@@ -73,6 +478,38 @@ def test_rearrange_dataset():
     check_json_serialization(dataset)
 
 
+def test_generate_episode_inits(tmp_path):
+    dataset_config = get_config(CFG_TEST).habitat.dataset
+    if not RearrangeDatasetV0.check_config_paths_exist(dataset_config):
+        pytest.skip(
+            "Please download ReplicaCAD RearrangeDataset Dataset to data folder."
+        )
+    # Copy the dataset so that the caches are written next to the copy
+    data_path = dataset_config.data_path.format(split=dataset_config.split)
+    shutil.copy(data_path, tmp_path / osp.basename(data_path))
+    opts = [f"habitat.dataset.data_path={tmp_path / osp.basename(data_path)}"]
+
+    failed = rr_inits.generate_inits(
+        CFG_TEST, opts, num_workers=2, episodes_per_call=2, max_episodes=5
+    )
+    assert failed == []
+    config = get_config(CFG_TEST, opts)
+    fname = osp.basename(data_path).split(".")[0]
+    start_states = StartStateCache(
+        str(tmp_path / f"{fname}_{config.habitat.task.type}_start.db")
+    )
+    assert len(start_states) == 5
+
+    # Resuming skips the episodes that are done
+    progress_path = rr_inits._progress_cache_path(config)
+    assert len(StartStateCache(progress_path)) == 5
+    assert (
+        rr_inits.generate_inits(CFG_TEST, opts, num_workers=2, max_episodes=5)
+        == []
+    )
+    assert len(start_states) == 5
+
+
 @pytest.mark.parametrize(
     "test_cfg_path",
     list(
@@ -133,6 +570,47 @@ def test_rearrange_tasks(test_cfg_path):
             env.reset()
 
 
+def test_rearrange_sim_cached_positions():
+    config = get_config(CFG_TEST)
+    if not RearrangeDatasetV0.check_config_paths_exist(config.habitat.dataset):
+        pytest.skip(
+            "Please download ReplicaCAD RearrangeDataset Dataset to data folder."
+        )
+
+    with habitat.Env(config=config) as env:
+        sim = env.sim
+        rom = sim.get_rigid_object_manager()
+        for _ in range(3):
+            env.reset()
+            for _ in range(5):
+                scene_pos = sim.get_scene_pos()
+                assert np.allclose(
+                    scene_pos,
+                    [
+                        rom.get_object_by_id(idx).translation
+                        for idx in sim.scene_obj_ids
+                    ],
+                )
+                targ_idxs, targ_pos = sim.get_targets()
+                for (idx, trans), targ_idx, pos in zip(
+                    sim._get_target_trans(), targ_idxs, targ_pos
+                ):
+                    assert idx == targ_idx
+                    assert np.allclose(trans.translation, pos)
+
+                # Moving an object outside of a step requires clearing the
+                # cache.
+                obj = rom.get_object_by_id(sim.scene_obj_ids[0])
+                obj.translation = obj.translation + mn.Vector3(0.0, 0.1, 0.0)
+                sim.clear_scene_pos_cache()
+                assert np.allclose(
+                    sim.get_scene_pos()[0], scene_pos[0] + [0.0, 0.1, 0.0]
+                )
+                if env.episode_over:
+                    break
+                env.step(env.action_space.sample())
+
+
 @pytest.mark.parametrize(
     "test_cfg_path",
     list(
@@ -206,6 +684,160 @@ def test_rearrange_episode_generator(
     )
 
 
+def test_parallel_rearrange_episode_generator(tmp_path):
+    cfg = rr_gen.get_config_defaults()
+    cfg.merge_from_file(GEN_TEST_CFG)
+    output_path = str(tmp_path / "dataset.json.gz")
+    shard_dir = str(tmp_path / "shards")
+
+    def generate():
+        rr_par_gen.run_parallel_episode_generator(
+            cfg,
+            output_path,
+            num_episodes=3,
+            num_workers=2,
+            episodes_per_job=2,
+            shard_dir=shard_dir,
+        )
+        dataset = RearrangeDatasetV0()
+        with gzip.open(output_path, "rt") as f:
+            dataset.from_json(f.read())
+        return dataset
+
+    def stored_episode_ids():
+        # The loader numbers the episodes by position, read the ids that
+        # were written to the combined file.
+        with gzip.open(output_path, "rt") as f:
+            return sorted(ep["episode_id"] for ep in json.load(f)["episodes"])
+
+    dataset = generate()
+    assert len(dataset.episodes) == 3
+    check_json_serialization(dataset)
+    episode_ids = stored_episode_ids()
+    assert episode_ids == ["0_0", "0_1", "1_0"]
+
+    # Resuming only regenerates the missing shard
+    finished_shard = osp.join(shard_dir, "shard_00000.json.gz")
+    finished_mtime = os.path.getmtime(finished_shard)
+    os.remove(osp.join(shard_dir, "shard_00001.json.gz"))
+    assert len(generate().episodes) == 3
+    assert os.path.getmtime(finished_shard) == finished_mtime
+
+    # Resuming a job from its progress file continues its numbering
+    with gzip.open(finished_shard, "rt") as f:
+        first_episode = json.loads(f.read())["episodes"][0]
+    os.remove(finished_shard)
+    with open(osp.join(shard_dir, "shard_00000.jsonl"), "w") as f:
+        f.write(json.dumps(first_episode) + "\n")
+    assert len(generate().episodes) == 3
+    assert stored_episode_ids() == episode_ids
+
+
+def test_hierarchical_policy_skill_batches(monkeypatch):
+    num_envs = 5
+    action_space = ActionSpace(
+        {
+            "arm_action": spaces.Dict(
+                {
+                    "arm_action": spaces.Box(-1.0, 1.0, (7,)),
+                    "grip_action": spaces.Box(-1.0, 1.0, (1,)),
+                }
+            ),
+            "rearrange_stop": spaces.Box(-1.0, 1.0, (1,)),
+        }
+    )
+    observation_space = spaces.Dict({"is_holding": spaces.Box(0.0, 1.0, (1,))})
+    skills: List[WaitSkillPolicy] = []
+    high_level_calls: List[List[bool]] = []
+
+    class RecordingWaitSkill(WaitSkillPolicy):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.act_batches: List[List[int]] = []
+            skills.append(self)
+
+        def act(self, *args, **kwargs):
+            self.act_batches.append(list(args[4]))
+            return super().act(*args, **kwargs)
+
+    class AlternatingHighLevelPolicy:
+        # Even environments wait 2 steps, odd ones 3 steps.
+        def __init__(
+            self, config, task_spec_file, num_envs, skill_name_to_idx
+        ):
+            self._skill_idxs = [
+                skill_name_to_idx["wait_2"],
+                skill_name_to_idx["wait_3"],
+            ]
+
+        def apply_mask(self, mask):
+            pass
+
+        def get_next_skill(
+            self, observations, rnn_hidden_states, prev_actions, masks, plan
+        ):
+            high_level_calls.append(plan.tolist())
+            next_skill = torch.tensor(
+                [self._skill_idxs[i % 2] for i in range(num_envs)]
+            )
+            args = [[str(2 + i % 2)] for i in range(num_envs)]
+            return next_skill, args, torch.zeros(num_envs, dtype=torch.bool)
+
+    # The skills and high level policy are looked up by name in the module
+    # of HierarchicalPolicy
+    for cls in (RecordingWaitSkill, AlternatingHighLevelPolicy):
+        monkeypatch.setattr(
+            hierarchical_policy, cls.__name__, cls, raising=False
+        )
+    skill_config = {
+        "skill_name": "RecordingWaitSkill",
+        "max_skill_steps": -1,
+        "force_end_on_timeout": False,
+    }
+    config = OmegaConf.create(
+        {
+            "hierarchical_policy": {
+                "use_skills": {"wait_2": "wait", "wait_3": "wait"},
+                "defined_skills": {"wait": skill_config},
+                "high_level_policy": {"name": "AlternatingHighLevelPolicy"},
+            }
+        }
+    )
+    full_config = OmegaConf.create(
+        {"habitat": {"task": {"task_spec_base_path": "", "task_spec": ""}}}
+    )
+    policy = HierarchicalPolicy(
+        config, full_config, observation_space, action_space, num_envs
+    )
+    assert len(skills) == 2
+
+    observations = {"is_holding": torch.zeros(num_envs, 1)}
+    hidden_states = torch.randn(num_envs, 1, 4)
+    prev_actions = torch.zeros(num_envs, 9)
+    for step in range(7):
+        # The first step starts the episodes.
+        masks = torch.full((num_envs, 1), step > 0, dtype=torch.bool)
+        _, actions, _, hidden_states = policy.act(
+            observations, hidden_states, prev_actions, masks
+        )
+        assert actions.shape == (num_envs, 9)
+
+    # Each skill acts once per step, on all of its environments.
+    assert skills[0].act_batches == [[0, 2, 4]] * 7
+    assert skills[1].act_batches == [[1, 3]] * 7
+    # The high level policy is called on steps 0, 2, 3, 4 and 6, for the
+    # environments whose skill ended.
+    assert high_level_calls == [
+        [True] * 5,
+        [True, False, True, False, True],
+        [False, True, False, True, False],
+        [True, False, True, False, True],
+        [True] * 5,
+    ]
+    # Entering a skill resets the hidden state of the environment.
+    assert (hidden_states == 0).all()
+
+
 @pytest.mark.parametrize(
     "test_cfg_path,mode",
     list(
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import gym
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+habitat_baselines = pytest.importorskip("habitat_baselines")
+
+from habitat_baselines.common.rollout_storage import RolloutStorage
+from habitat_baselines.common.tensor_dict import TensorDict
+from habitat_baselines.common.trajectory_recorder import (
+    TrajectoryReader,
+    TrajectoryRecorder,
+)
+from habitat_baselines.rl.ver.ver_rollout_storage import VERRolloutStorage
+
+
+def _make_rollouts(num_steps, num_envs, rollout_steps):
+    obs_space = gym.spaces.Dict(
+        {"obs": gym.spaces.Box(low=-1, high=1, shape=(2,), dtype=np.float32)}
+    )
+    rollouts = RolloutStorage(
+        num_steps, num_envs, obs_space, gym.spaces.Discrete(2), 4
+    )
+    for _ in range(rollout_steps):
+        rollouts.insert(
+            rewards=torch.randn(num_envs, 1),
+            value_preds=torch.randn(num_envs, 1),
+            next_masks=torch.rand(num_envs, 1) > 0.1,
+        )
+        rollouts.advance_rollout()
+    return rollouts
+
+
+@pytest.mark.parametrize("use_gae", [True, False])
+@pytest.mark.parametrize("rollout_steps", [1, 37, 128])
+def test_compute_returns_methods(use_gae, rollout_steps):
+    rollouts = _make_rollouts(128, 16, rollout_steps)
+    next_value = torch.randn(16, 1)
+
+    returns = {}
+    for method in ["loop", "vectorized", "jit", "scan"]:
+        rollouts.buffers["returns"].fill_(0)
+        rollouts.compute_returns(
+            next_value, use_gae, 0.99, 0.95, method=method
+        )
+        returns[method] = rollouts.buffers["returns"].clone()
+
+    assert torch.equal(returns["vectorized"], returns["loop"])
+    assert torch.equal(returns["jit"], returns["loop"])
+    assert torch.allclose(returns["scan"], returns["loop"], atol=1e-4)
+
+    with pytest.raises(ValueError):
+        rollouts.compute_returns(next_value, use_gae, 0.99, 0.95, "unknown")
+
+
+def _make_ver_rollouts(num_steps, num_envs):
+    obs_space = gym.spaces.Dict(
+        {"obs": gym.spaces.Box(low=-1, high=1, shape=(2,), dtype=np.float32)}
+    )
+    rollouts = VERRolloutStorage(
+        False, num_steps, num_envs, obs_space, gym.spaces.Discrete(2), 4
+    )
+    dones = torch.rand(num_steps + 1, num_envs, 1) < 0.1
+    dones[0] = False
+    episode_ids = torch.cumsum(dones.long(), 0)
+    step_ids = torch.zeros_like(episode_ids)
+    for step in range(1, num_steps + 1):
+        step_ids[step] = (step_ids[step - 1] + 1) * torch.logical_not(
+            dones[step]
+        )
+    rollouts.buffers["masks"].copy_(torch.logical_not(dones))
+    rollouts.buffers["episode_ids"].copy_(episode_ids)
+    rollouts.buffers["step_ids"].copy_(step_ids)
+    rollouts.buffers["environment_ids"].copy_(
+        torch.arange(num_envs).view(1, -1, 1).expand_as(episode_ids)
+    )
+    rollouts.buffers["rewards"].copy_(torch.randn(num_steps + 1, num_envs, 1))
+    rollouts.buffers["value_preds"].copy_(
+        torch.randn(num_steps + 1, num_envs, 1)
+    )
+    rollouts.buffers["is_stale"].copy_(
+        torch.rand(num_steps + 1, num_envs, 1) < 0.3
+    )
+    # Stale steps without a return get a new one.
+    returns = torch.randn(num_steps + 1, num_envs, 1)
+    returns[torch.rand_like(returns) < 0.1] = float("nan")
+    rollouts.buffers["returns"].copy_(returns)
+    return rollouts
+
+
+@pytest.mark.parametrize("use_gae", [True, False])
+@pytest.mark.parametrize("method", ["vectorized", "jit", "scan"])
+def test_ver_compute_returns_methods(use_gae, method):
+    rollouts = _make_ver_rollouts(64, 8)
+    initial_returns = rollouts.buffers["returns"].clone()
+
+    rollouts.compute_returns(use_gae, 0.99, 0.95, method="loop")
+    loop_returns = rollouts.buffers["returns"].clone()
+    loop_select_inds = rollouts.select_inds.copy()
+
+    rollouts.buffers["returns"].copy_(initial_returns)
+    rollouts.compute_returns(use_gae, 0.99, 0.95, method=method)
+
+    assert np.array_equal(rollouts.select_inds, loop_select_inds)
+    assert torch.allclose(
+        rollouts.buffers["returns"], loop_returns, atol=1e-4, equal_nan=True
+    )
+    # Only the bootstrap steps have no return.
+    assert torch.isnan(rollouts.buffers["returns"][-1]).all()
+    assert torch.isfinite(rollouts.buffers["returns"][:-1]).all()
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_trajectory_recorder(tmp_path, compress):
+    num_steps, num_envs, num_rollouts = 16, 4, 5
+    rollouts = _make_rollouts(num_steps, num_envs, 0)
+    rollouts.recorder = TrajectoryRecorder(
+        str(tmp_path), max_shard_bytes=8 * 1024, compress=compress
+    )
+    recorded_rewards = []
+    for _ in range(num_rollouts):
+        for _ in range(num_steps):
+            rollouts.insert(
+                rewards=torch.randn(num_envs, 1),
+                value_preds=torch.randn(num_envs, 1),
+                next_masks=torch.rand(num_envs, 1) > 0.1,
+            )
+            rollouts.advance_rollout()
+        recorded_rewards.append(
+            rollouts.buffers["rewards"][:num_steps].clone()
+        )
+        rollouts.compute_returns(torch.randn(num_envs, 1), True, 0.99, 0.95)
+        rollouts.after_update()
+    rollouts.recorder.close()
+
+    reader = TrajectoryReader(str(tmp_path))
+    assert len(reader) >= 2
+    steps = [reader.load_shard(i) for i in range(len(reader))]
+    if not compress:
+        # Every shard but the last one is full
+        shard_sizes = [len(s["rewards"]) for s in steps]
+        assert len(set(shard_sizes[:-1])) == 1
+        assert shard_sizes[-1] <= shard_sizes[0]
+    assert sum(len(s["rewards"]) for s in steps) == (
+        num_rollouts * num_steps * num_envs
+    )
+    assert torch.equal(
+        torch.cat([s["rewards"] for s in steps]),
+        torch.cat(recorded_rewards).flatten(0, 1),
+    )
+
+    num_batch_steps = 0
+    for batch in reader.recurrent_generator(num_mini_batch=2):
+        num_steps_in_batch = batch["rewards"].size(0)
+        num_batch_steps += num_steps_in_batch
+        assert batch["observations"]["obs"].size(0) == num_steps_in_batch
+        assert batch["recurrent_hidden_states"].size(0) == len(
+            batch["rnn_build_seq_info"]["first_step_for_env"]
+        )
+    assert num_batch_steps == num_rollouts * num_steps * num_envs
+
+
+def test_trajectory_recorder_writer_error(tmp_path, monkeypatch):
+    def fail_open_memmap(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(np.lib.format, "open_memmap", fail_open_memmap)
+    recorder = TrajectoryRecorder(str(tmp_path), max_pending=1)
+    steps = TensorDict(
+        episode_ids=torch.zeros(8, 1, dtype=torch.int64),
+        environment_ids=torch.arange(8).view(8, 1),
+        step_ids=torch.arange(8).view(8, 1),
+        rewards=torch.randn(8, 1),
+    )
+    # The writer fails on the first steps, recording more steps raises
+    # instead of waiting forever for room in the queue.
+    with pytest.raises(RuntimeError):
+        for _ in range(8):
+            recorder.record(steps)
+    with pytest.raises(RuntimeError):
+        recorder.close()
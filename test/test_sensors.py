@@ -16,6 +16,9 @@ from habitat.config.default import get_config
 from habitat.config.default_structured_configs import (
     CollisionsMeasurementConfig,
     CompassSensorConfig,
+    DistanceToGoalMeasurementConfig,
+    GeodesicDistanceCacheConfig,
+    GeodesicDistanceFieldConfig,
     GPSSensorConfig,
     HabitatSimDepthSensorConfig,
     HabitatSimEquirectangularDepthSensorConfig,
@@ -184,6 +187,65 @@ def test_collisions():
                 prev_collisions = collisions
 
 
+@pytest.mark.parametrize("use_distance_field", [False, True])
+def test_geodesic_distance_cache(tmp_path, use_distance_field):
+    config = get_test_config()
+    if not os.path.exists(config.habitat.simulator.scene):
+        pytest.skip("Please download Habitat test data to data folder.")
+    # Fresh sub-configs, the defaults of DistanceToGoalMeasurementConfig are
+    # shared by all its instances.
+    distance_config = DistanceToGoalMeasurementConfig(
+        geodesic_cache=GeodesicDistanceCacheConfig(
+            enabled=True, cache_dir=str(tmp_path / "cache")
+        ),
+        distance_field=GeodesicDistanceFieldConfig(
+            enabled=use_distance_field,
+            # Compare all the interpolated distances with the exact ones
+            exact_distance_threshold=0.0,
+        ),
+    )
+    with habitat.config.read_write(config):
+        config.habitat.task.measurements = {
+            "distance_to_goal": distance_config
+        }
+    tolerance = (
+        3 * distance_config.distance_field.resolution
+        if use_distance_field
+        else 2 * distance_config.geodesic_cache.quantization
+    )
+    with habitat.Env(config=config, dataset=None) as env:
+        env.reset()
+        random.seed(123)
+        np.random.seed(123)
+        goal = env.sim.sample_navigable_point()
+
+        for _ in range(5):
+            env.episode_iterator = iter(
+                [
+                    NavigationEpisode(
+                        episode_id="0",
+                        scene_id=config.habitat.simulator.scene,
+                        start_position=env.sim.sample_navigable_point(),
+                        start_rotation=[0, 0, 0, 1],
+                        goals=[NavigationGoal(position=goal)],
+                    )
+                ]
+            )
+            env.reset()
+            for _ in range(50):
+                env.step(sample_non_stop_action(env.action_space))
+                exact = env.sim.geodesic_distance(
+                    env.sim.get_agent_state().position, [goal]
+                )
+                assert np.isclose(
+                    env.get_metrics()["distance_to_goal"],
+                    exact,
+                    atol=tolerance,
+                )
+                if env.episode_over:
+                    break
+
+
 def test_pointgoal_sensor():
     config = get_test_config()
     if not os.path.exists(config.habitat.simulator.scene):
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+habitat_baselines = pytest.importorskip("habitat_baselines")
+
+from habitat_baselines.slambased.mappers import (
+    DirectDepthMapper,
+    batch_pcl_to_obstacles,
+    depth2local3d,
+)
+from habitat_baselines.slambased.path_planners import (
+    DifferentiableStarPlanner,
+    DijkstraPlanner,
+    _GridDijkstra,
+)
+from habitat_baselines.slambased.reprojection import (
+    get_map_size_in_cells,
+    project2d_pcl_into_worldmap,
+    reproject_local_to_global,
+)
+from habitat_baselines.slambased.utils import generate_2dgrid
+
+
+def _reference_pcl_to_obstacles(pts3d, map_size, cell_size, min_pts):
+    map_size_in_cells = get_map_size_in_cells(map_size, cell_size) - 1
+    obstacle_map = np.zeros((map_size_in_cells, map_size_in_cells))
+    if len(pts3d) <= min_pts:
+        return obstacle_map
+    pts2d = torch.stack([pts3d[:, 2], pts3d[:, 0]], dim=1)
+    data_idxs = torch.round(
+        project2d_pcl_into_worldmap(pts2d, map_size, cell_size)
+    )
+    u, counts = np.unique(data_idxs.long().numpy(), axis=0, return_counts=True)
+    obstacle_map[u[:, 0], u[:, 1]] = counts
+    return obstacle_map
+
+
+def _reference_depth_mapper(mapper, depth, pose):
+    # The mapping of a single depth image with numpy counting
+    fx = float(depth.size(1)) / 2.0
+    fy = float(depth.size(0)) / 2.0
+    local_3d_pcl = depth2local3d(depth, fx, fy, int(fx) - 1, int(fy) - 1)
+    survived = (local_3d_pcl[:, 2].abs() < mapper.far_th) & (
+        local_3d_pcl[:, 2].abs() >= mapper.near_th
+    )
+    map_size_in_cells = (
+        get_map_size_in_cells(mapper.map_size_meters, mapper.map_cell_size) - 1
+    )
+    if survived.sum() < 20:
+        return np.zeros((map_size_in_cells, map_size_in_cells))
+    global_3d_pcl = reproject_local_to_global(local_3d_pcl[survived], pose)
+    global_3d_pcl = global_3d_pcl[:, :3]
+    heights = -global_3d_pcl[:, 1] + mapper.camera_height
+    in_range = (heights > mapper.h_min_th) & (heights < mapper.h_max_th)
+    return _reference_pcl_to_obstacles(
+        global_3d_pcl[in_range],
+        mapper.map_size_meters,
+        mapper.map_cell_size,
+        min_pts=10,
+    )
+
+
+def test_batch_pcl_to_obstacles():
+    rng = np.random.default_rng(0)
+    map_size, cell_size, min_pts = 4, 0.2, 10
+    # The last map has too few points and is empty
+    num_pts = [300, 50, 11, min_pts]
+    pts3d = torch.from_numpy(
+        rng.uniform(-1.9, 1.9, size=(sum(num_pts), 3)).astype(np.float32)
+    )
+    batch_idxs = torch.from_numpy(
+        rng.permutation(np.repeat(np.arange(len(num_pts)), num_pts))
+    )
+    obstacle_maps = batch_pcl_to_obstacles(
+        pts3d, batch_idxs, len(num_pts), map_size, cell_size, min_pts
+    )
+    for i in range(len(num_pts)):
+        expected = _reference_pcl_to_obstacles(
+            pts3d[batch_idxs == i], map_size, cell_size, min_pts
+        )
+        assert np.array_equal(obstacle_maps[i].numpy(), expected)
+    assert obstacle_maps[:-1].sum(dim=(1, 2)).tolist() == num_pts[:-1]
+    assert obstacle_maps[-1].sum() == 0
+
+
+def test_direct_depth_mapper_batch():
+    rng = np.random.default_rng(0)
+    h, w = 32, 32
+    mapper = DirectDepthMapper(map_size=12, map_cell_size=0.1)
+    depths = torch.from_numpy(
+        rng.uniform(0.5, 3.5, size=(5, h, w)).astype(np.float32)
+    )
+    # Fewer than 20 points within the depth range
+    depths[3] = 5.0
+    depths[3, 4, :15] = 1.0
+    # 25 points within the depth range, but only 5 of them within the
+    # height range
+    depths[4] = 5.0
+    depths[4, 5, :5] = 1.0
+    depths[4, 28, :20] = 1.0
+    poses = []
+    for _ in range(len(depths)):
+        angle = rng.uniform(-np.pi, np.pi)
+        pose = np.eye(4, dtype=np.float32)
+        pose[[0, 0, 2, 2], [0, 2, 0, 2]] = [
+            np.cos(angle),
+            np.sin(angle),
+            -np.sin(angle),
+            np.cos(angle),
+        ]
+        pose[[0, 2], 3] = rng.uniform(-0.3, 0.3, size=2)
+        poses.append(torch.from_numpy(pose))
+    poses = torch.stack(poses)
+
+    obstacle_maps = mapper.forward_batch(depths, poses)
+    for depth, pose, obstacle_map in zip(depths, poses, obstacle_maps):
+        assert torch.equal(mapper(depth, pose), obstacle_map)
+        expected = _reference_depth_mapper(mapper, depth, pose)
+        assert np.array_equal(obstacle_map.numpy(), expected)
+    assert (obstacle_maps[:3].sum(dim=(1, 2)) > 0).all()
+    assert obstacle_maps[3:].sum() == 0
+
+
+def test_grid_dijkstra_update_costs():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        h, w = rng.integers(5, 25, size=2)
+        costs = rng.random((9, h, w)) * 3 + 0.1
+        start = int(rng.integers(h * w))
+        search = _GridDijkstra(costs, start)
+        for _ in range(4):
+            goal = int(rng.integers(h * w))
+            padded_goal = search.run_until(goal, w)
+            fresh = _GridDijkstra(costs, start)
+            fresh_goal = fresh.run_until(goal, w)
+            assert padded_goal == fresh_goal
+            assert search.dist[padded_goal] == pytest.approx(
+                fresh.dist[fresh_goal]
+            )
+            path = search.path_to(padded_goal)
+            assert path[0] == padded_goal and path[-1] == search.start
+            # The cost of the path is the distance to the goal
+            path_cost = 0.0
+            for u, v in zip(path[1:], path[:-1]):
+                uy, ux = search.to_index(u)
+                vy, vx = search.to_index(v)
+                k = (uy - vy + 1) + 3 * (ux - vx + 1)
+                path_cost += costs[k, vy, vx]
+            assert path_cost == pytest.approx(search.dist[padded_goal])
+
+            # Change the costs around a random cell, making them cheaper
+            # or more expensive
+            costs = costs.copy()
+            y, x = rng.integers(h), rng.integers(w)
+            roi = (
+                slice(None),
+                slice(max(0, y - 2), y + 2),
+                slice(max(0, x - 2), x + 2),
+            )
+            costs[roi] = rng.random(costs[roi].shape) * rng.choice([0.1, 10])
+            search.update_costs(costs)
+
+
+def test_dijkstra_planner_path_format():
+    h, w = 24, 24
+    obstacles = torch.zeros(1, 1, h, w)
+    # A wall with a gap
+    obstacles[:, :, 12, 3:18] = 1.0
+    coords = generate_2dgrid(h, w, False)
+    start_map = torch.zeros(1, 1, h, w)
+    start_map[0, 0, 4, 6] = 1.0
+    goal_map = torch.zeros(1, 1, h, w)
+    goal_map[0, 0, 19, 8] = 1.0
+
+    ref_path, ref_cost = DifferentiableStarPlanner(max_steps=500)(
+        obstacles, coords, start_map, goal_map
+    )
+    planner = DijkstraPlanner(max_steps=500)
+    for _ in range(2):
+        # The second call reuses the search tree
+        path, cost = planner(obstacles, coords, start_map, goal_map)
+        assert cost.shape == ref_cost.shape
+        assert cost.item() == pytest.approx(ref_cost.item(), rel=1e-4)
+        assert all(
+            p.shape == r.shape and p.dtype == r.dtype
+            for p, r in zip(path, ref_path)
+        )
+        # Both paths go from the goal to the start
+        assert torch.equal(path[0], ref_path[0])
+        assert torch.equal(path[-1], ref_path[-1])
+        assert all(
+            (a - b).abs().max().item() <= 1.0
+            for a, b in zip(path[1:], path[:-1])
+        )
+        assert all(obstacles[0, 0, int(p[0]), int(p[1])] == 0 for p in path)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import multiprocessing
+import queue
+
+import pytest
+
+torch = pytest.importorskip("torch")
+habitat_baselines = pytest.importorskip("habitat_baselines")
+
+from habitat_baselines.rl.ver.ring_buffer_queue import RingBufferQueue
+
+
+def _producer(q, env_idx, num_messages):
+    for start in range(0, num_messages, 10):
+        q.put_many([(env_idx, step) for step in range(start, start + 10)])
+    q.put((env_idx, None))
+
+
+def test_ring_buffer_queue():
+    q = RingBufferQueue(128)
+    with pytest.raises(queue.Empty):
+        q.get_nowait()
+    with pytest.raises(ValueError):
+        q.put_many([b"x" * 200])
+
+    q.put_many([1, (2, 3)])
+    q.put(b"y" * 20)
+    assert q.qsize() == 3
+    assert q.get() == 1
+    with pytest.raises(queue.Full):
+        q.put(b"z" * 80, block=False)
+    assert q.get_many() == [(2, 3), b"y" * 20]
+    assert q.empty()
+
+    # Messages wrapping around the end of the ring buffer
+    for i in range(10):
+        q.put(b"z" * (i + 30))
+        assert q.get() == b"z" * (i + 30)
+
+
+@pytest.mark.parametrize("start_method", ["fork", "forkserver"])
+def test_ring_buffer_queue_producers(start_method):
+    mp_ctx = multiprocessing.get_context(start_method)
+    num_producers, num_messages = 4, 1000
+    q = RingBufferQueue(4096)
+    producers = [
+        mp_ctx.Process(target=_producer, args=(q, env_idx, num_messages))
+        for env_idx in range(num_producers)
+    ]
+    for p in producers:
+        p.start()
+
+    received = {env_idx: [] for env_idx in range(num_producers)}
+    num_done = 0
+    while num_done < num_producers:
+        for env_idx, step in q.get_many(timeout=30.0):
+            if step is None:
+                num_done += 1
+            else:
+                received[env_idx].append(step)
+
+    for p in producers:
+        p.join()
+    # The messages of each producer arrive in order
+    for steps in received.values():
+        assert steps == list(range(num_messages))
@@ -6,6 +6,7 @@
 
 import numpy as np
 
+from habitat.utils.visualizations import fog_of_war, maps
 from habitat.utils.visualizations.utils import observations_to_image
 
 
@@ -57,3 +58,24 @@ def test_different_dim_observations_to_image():
         1570,
         3,
     ), "Resulted image resolution doesn't match."
+
+
+def test_reveal_fog_of_war_inplace():
+    top_down_map = np.full((100, 100), maps.MAP_VALID_POINT, dtype=np.uint8)
+    top_down_map[40:60, 70] = maps.MAP_INVALID_POINT
+    mask = np.zeros_like(top_down_map)
+    for position, angle in [((50, 50), 0.0), ((20, 30), 1.5), ((50, 50), 3.0)]:
+        expected = fog_of_war.reveal_fog_of_war(
+            top_down_map, mask, np.array(position), angle, max_line_len=40
+        )
+        revealed = fog_of_war.reveal_fog_of_war(
+            top_down_map,
+            mask,
+            np.array(position),
+            angle,
+            max_line_len=40,
+            inplace=True,
+        )
+        assert revealed is mask
+        assert np.array_equal(mask, expected)
+    assert mask.any() and not mask.all()